@@ -0,0 +1,57 @@
+# Núcleo de dados e cálculos compartilhado pelas páginas do app.
+#
+# Os módulos ficam fora de "pages/" porque o Streamlit trata todo .py dessa
+# pasta como uma página. Nada aqui importa streamlit, então os mesmos cálculos
+# rodam em scripts, lotes e benchmarks.
+#
+# "import nucleo" é imediato: os nomes abaixo só carregam seu módulo (e
+# pandas/numpy) no primeiro acesso, ex.: nucleo.simular(...).
+import importlib
+
+_EXPORTS = {
+    "carregar_colunas": "dados",
+    "monitor_planilha": "dados",
+    "CatalogoPlanta": "catalogo",
+    "CenarioSimulacao": "simulador",
+    "ResultadoSimulacao": "simulador",
+    "simular": "simulador",
+    "simular_lote": "simulador",
+    "varrer_cenarios": "simulador",
+    "monte_carlo": "simulador",
+    "configuracao_padrao": "pcp",
+    "horas_disponiveis": "pcp",
+    "horas_necessarias": "pcp",
+    "horas_necessarias_por_operacao": "pcp",
+    "verificar_ocupacao": "pcp",
+    "otimizar_capacidade": "pcp",
+    "ler_demanda": "pcp",
+    "RecalculoPCP": "recalculo",
+    "Comparativo": "comparacao",
+    "comparar_maq_hr": "comparacao",
+    "comparar_rendimento": "comparacao",
+    "ComparativoMultiplo": "comparacao",
+    "comparar_maq_hr_varios": "comparacao",
+    "IndiceSimilaridade": "similaridade",
+    "TabelaRendimento": "rendimento",
+    "GrafoRoteiros": "roteiros",
+    "ArmazemCenarios": "cenarios",
+    "DiferencaRevisoes": "revisoes",
+    "montar_tarefas": "programacao",
+    "programar": "programacao",
+    "gravar_excel": "exportacao",
+    "excel_bytes": "exportacao",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(nome):
+    if nome not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[nome]}"), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,362 @@
+# API HTTP local (JSON) para o simulador e a verificação de ocupação do PCP.
+# Só usa a biblioteca padrão (asyncio) além do próprio núcleo.
+#
+# Uso:
+#   python -m nucleo.api [--host 127.0.0.1] [--porta 8765] [--planilha PLANTA.xlsx]
+#
+# Rotas:
+#   GET  /saude            versão da planilha carregada
+#   POST /simular          um cenário ou {"cenarios": [...]}
+#   POST /pcp/ocupacao     uma consulta ou {"consultas": [...]}
+#
+# Cenário do simulador (mesmos campos da página; absenteísmo e novatos em %):
+#   {"produto": "...", "operacao": "...", "meta": 10000, "dias_max": 25,
+#    "maquinas": 1, "turnos": "ABC", "almoco": true, "pico": false,
+#    "fusos_parados": 0, "eficiencia_maquina": 100, "absenteismo": 0, "novatos": 0}
+#
+# Consulta de ocupação (mesmos passos da página PCP para uma FIAÇÃO):
+#   {"fiacao": "FL", "demanda": [{"PRODUTO": "...", "REVISÃO": 1, "META": 5}],
+#    "config": [{"OPERAÇÃO": "...", "Turnos": "AB", "Qntd Máquinas": 2}],
+#    "dias_uteis": 25, "absenteismo": 5, "novatos": 10}
+#
+# A planta fica em memória, compartilhada por todas as requisições, e é
+# recarregada em segundo plano quando a planilha muda (nucleo.dados).
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from nucleo.dados import CAMINHO_PLANILHA, carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.pcp import (
+    COLUNAS_DEMANDA, COLUNAS_PLANTA, horas_necessarias, horas_necessarias_por_operacao, normalizar_configuracao,
+    normalizar_demanda, operacoes_planta, preparar_planta, verificar_ocupacao
+)
+from nucleo.simulador import simular_lote
+from nucleo.viabilidade import disponiveis_fiacao
+
+TAMANHO_MAXIMO = 10 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class ErroRequisicao(Exception):
+
+    def __init__(self, mensagem, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ---------------- DADOS COMPARTILHADOS ----------------
+
+# N° FUSOS e KG/MH da primeira linha de cada (PRODUTO, OPERAÇÃO), como a
+# busca da página do simulador
+def _carregar_operacoes(caminho):
+    df = carregar_colunas(caminho, ["PRODUTO", "OPERAÇÃO", "N° FUSOS", "KG/MH"]).dropna()
+    primeiras = df.drop_duplicates(["PRODUTO", "OPERAÇÃO"])
+    kg_mh = [float(v.replace(",", ".")) if isinstance(v, str) else float(v) for v in primeiras["KG/MH"]]
+    return {
+        (produto, operacao): (int(fusos), kg)
+        for produto, operacao, fusos, kg in zip(primeiras["PRODUTO"], primeiras["OPERAÇÃO"], primeiras["N° FUSOS"], kg_mh)
+    }
+
+
+# Planta do PCP de uma versão da planilha. As horas disponíveis só dependem da
+# FIAÇÃO, da configuração e dos parâmetros gerais, então ficam em cache (a
+# cada nova versão o objeto inteiro é trocado pelo monitor).
+class _PlantaPCP:
+
+    def __init__(self, caminho):
+        df = preparar_planta(carregar_colunas(caminho, COLUNAS_PLANTA))
+        self.catalogo = CatalogoPlanta(df)
+        self.operacoes = operacoes_planta(df)
+        self.fiacoes = set(self.catalogo.valores("FIAÇÃO"))
+        self.planta = functools.lru_cache(maxsize=None)(self._planta)
+        self.disponiveis = functools.lru_cache(maxsize=256)(self._disponiveis)
+
+    def _planta(self, fiacao):
+        return self.catalogo.selecionar(fiacao=fiacao)
+
+    # "config" chega como texto JSON para servir de chave do cache
+    def _disponiveis(self, fiacao, config, dias_uteis, absenteismo_geral, novatos_geral):
+        ajustes = normalizar_configuracao(pd.DataFrame(json.loads(config))) if config else None
+        return disponiveis_fiacao(
+            fiacao, self.planta(fiacao), self.operacoes, ajustes, dias_uteis, absenteismo_geral, novatos_geral
+        )
+
+
+# ---------------- CÁLCULOS ----------------
+
+def _campo(item, nome, padrao=None, tipo=float, minimo=None):
+    valor = item.get(nome, padrao)
+    if valor is None:
+        raise ErroRequisicao(f"Campo obrigatório ausente: {nome}")
+    try:
+        convertido = tipo(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(f"Valor inválido para {nome}: {valor!r}")
+    if minimo is not None and convertido < minimo:
+        raise ErroRequisicao(f"{nome} deve ser no mínimo {minimo}: {valor!r}")
+    return convertido
+
+
+# Só true/false do JSON: bool("false") seria verdadeiro
+def _booleano(item, nome, padrao):
+    valor = item.get(nome, padrao)
+    if not isinstance(valor, bool):
+        raise ErroRequisicao(f"Valor inválido para {nome}: {valor!r} (use true ou false)")
+    return valor
+
+
+# Operação (N° FUSOS, KG/MH) e parâmetros de um cenário; ErroRequisicao se
+# o cenário é inválido (404 se o produto/operação não existe)
+def validar_cenario(cenario, operacoes):
+    if not isinstance(cenario, dict):
+        raise ErroRequisicao("Cada cenário deve ser um objeto JSON")
+    chave = (cenario.get("produto"), cenario.get("operacao"))
+    if chave not in operacoes:
+        raise ErroRequisicao(f"Operação {chave[1]!r} não encontrada para o produto {chave[0]!r}", HTTPStatus.NOT_FOUND)
+    turnos = str(cenario.get("turnos", "ABC")).upper()
+    return operacoes[chave], {
+        "meta": _campo(cenario, "meta"),
+        "dias_max": _campo(cenario, "dias_max", tipo=int, minimo=1),
+        "maquinas": _campo(cenario, "maquinas", 1, int, minimo=1),
+        "turnos": [t in turnos for t in "ABC"],
+        "almoco": _booleano(cenario, "almoco", True),
+        "pico": _booleano(cenario, "pico", False),
+        "fusos_parados": _campo(cenario, "fusos_parados", 0),
+        "eficiencia_maquina": _campo(cenario, "eficiencia_maquina", 100),
+        "absenteismo": _campo(cenario, "absenteismo", 0) / 100,
+        "novatos": _campo(cenario, "novatos", 0) / 200,
+    }
+
+
+# Todos os cenários do lote em uma única chamada vetorizada a simular_lote.
+# Cenários inválidos viram {"erro": ...} na sua posição, sem derrubar o lote.
+def simular(cenarios, operacoes):
+    validos, respostas = [], []
+    for cenario in cenarios:
+        try:
+            operacao, parametros = validar_cenario(cenario, operacoes)
+        except ErroRequisicao as erro:
+            respostas.append({"erro": str(erro)})
+            continue
+        validos.append((len(respostas), operacao, parametros))
+        respostas.append(None)
+
+    if validos:
+        def coluna(nome):
+            return np.array([v[2][nome] for v in validos])
+
+        lote = simular_lote(
+            coluna("meta"), np.array([v[1][0] for v in validos]), np.array([v[1][1] for v in validos]),
+            coluna("fusos_parados"), coluna("eficiencia_maquina"), coluna("maquinas"), coluna("almoco"),
+            coluna("pico"), coluna("turnos").reshape(-1, 3), coluna("absenteismo"), coluna("novatos"),
+            coluna("dias_max")
+        )
+        for i, (posicao, (fusos_total, kg_por_hora), _) in enumerate(validos):
+            atingido = bool(lote["atingido"][i])
+            dias = int(lote["dias"][i])
+            producao = float(lote["producao"][i])
+            respostas[posicao] = {
+                "atingido": atingido,
+                "dias": dias if atingido else None,
+                "producao_kg": round(producao, 2) if atingido else None,
+                "producao_diaria_kg": round(producao / dias, 2) if atingido else None,
+                "eficiencia_fusos_pct": round(float(lote["eficiencia_fusos"][i]) * 100, 2),
+                "eficiencia_maquina_pct": float(lote["eficiencia_maquina"][i]) * 100,
+                "fusos_total": fusos_total,
+                "kg_por_hora": kg_por_hora,
+            }
+    return respostas
+
+
+def _registros(tabela):
+    return [
+        {chave: _json(valor) for chave, valor in linha.items()}
+        for linha in tabela.to_dict("records")
+    ]
+
+
+def _json(valor):
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def ocupacao(consulta, planta):
+    if not isinstance(consulta, dict):
+        raise ErroRequisicao("Cada consulta deve ser um objeto JSON")
+    fiacao = str(consulta.get("fiacao", "")).strip().upper()
+    if fiacao not in planta.fiacoes:
+        raise ErroRequisicao(f"FIAÇÃO não encontrada: {fiacao!r}", HTTPStatus.NOT_FOUND)
+    try:
+        registros = consulta.get("demanda") or []
+        demanda = normalizar_demanda(pd.DataFrame(registros) if registros else pd.DataFrame(columns=COLUNAS_DEMANDA))
+        config = json.dumps(consulta["config"], sort_keys=True) if consulta.get("config") else None
+        resultado, exatas = planta.disponiveis(
+            fiacao, config, _campo(consulta, "dias_uteis", 25, int),
+            _campo(consulta, "absenteismo", 5), _campo(consulta, "novatos", 10)
+        )
+    except (KeyError, ValueError) as erro:
+        raise ErroRequisicao(str(erro))
+
+    produtos, sem_planta = horas_necessarias(planta.planta(fiacao), demanda)
+    checagem = verificar_ocupacao(horas_necessarias_por_operacao(produtos), resultado, exatas)
+    return {
+        "fiacao": fiacao,
+        "viavel": bool((checagem["Status"] == "✅ Viável").all()),
+        "operacoes": _registros(checagem),
+        "demanda_sem_planta": _registros(sem_planta),
+    }
+
+
+# ---------------- SERVIDOR ----------------
+
+class ServidorAPI:
+
+    def __init__(self, caminho=CAMINHO_PLANILHA, trabalhadores=4):
+        self.monitor = monitor_planilha(caminho)
+        self.monitor.registrar("api_operacoes", _carregar_operacoes)
+        self.monitor.registrar("api_pcp", _PlantaPCP)
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="api")
+        self._rotas = {
+            ("GET", "/saude"): self._saude,
+            ("POST", "/simular"): self._simular,
+            ("POST", "/pcp/ocupacao"): self._ocupacao,
+        }
+
+    def _saude(self, _):
+        return {"status": "ok", "versao_planilha": self.monitor.versao}
+
+    def _simular(self, corpo):
+        operacoes = self.monitor.obter("api_operacoes")
+        if isinstance(corpo, dict) and "cenarios" in corpo:
+            if not isinstance(corpo["cenarios"], list):
+                raise ErroRequisicao("\"cenarios\" deve ser uma lista")
+            return {"resultados": simular(corpo["cenarios"], operacoes)}
+        validar_cenario(corpo, operacoes)
+        return simular([corpo], operacoes)[0]
+
+    def _ocupacao(self, corpo):
+        planta = self.monitor.obter("api_pcp")
+        if isinstance(corpo, dict) and "consultas" in corpo:
+            if not isinstance(corpo["consultas"], list):
+                raise ErroRequisicao("\"consultas\" deve ser uma lista")
+            resultados = []
+            for consulta in corpo["consultas"]:
+                try:
+                    resultados.append(ocupacao(consulta, planta))
+                except ErroRequisicao as erro:
+                    resultados.append({"erro": str(erro)})
+            return {"resultados": resultados}
+        return ocupacao(corpo, planta)
+
+    # Processa uma requisição já lida; os cálculos rodam no pool de threads
+    # para não travar o laço de eventos
+    async def responder(self, metodo, caminho, corpo):
+        caminho = caminho.split("?", 1)[0]
+        rota = self._rotas.get((metodo, caminho))
+        if rota is None:
+            if any(c == caminho for _, c in self._rotas):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"erro": "Método não permitido"}
+            return HTTPStatus.NOT_FOUND, {"erro": "Rota não encontrada"}
+        try:
+            dados = json.loads(corpo) if corpo else {}
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"erro": "JSON inválido"}
+        try:
+            resposta = await asyncio.get_running_loop().run_in_executor(self._executor, rota, dados)
+        except ErroRequisicao as erro:
+            return erro.status, {"erro": str(erro)}
+        except Exception:
+            logger.exception("Erro ao processar %s %s", metodo, caminho)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": "Erro interno"}
+        return HTTPStatus.OK, resposta
+
+    # Uma conexão HTTP/1.1 (com keep-alive)
+    async def conexao(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    await self._enviar(escritor, HTTPStatus.BAD_REQUEST, {"erro": "Requisição inválida"}, False)
+                    break
+
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                manter = (cabecalhos.get("connection", "").lower() != "close"
+                          and (versao == "HTTP/1.1" or cabecalhos.get("connection", "").lower() == "keep-alive"))
+                tamanho = cabecalhos.get("content-length", "0") or "0"
+                if not (tamanho.isascii() and tamanho.isdigit()):
+                    # Sem saber onde o corpo termina, a conexão não pode continuar
+                    await self._enviar(escritor, HTTPStatus.BAD_REQUEST, {"erro": "Content-Length inválido"}, False)
+                    break
+                tamanho = int(tamanho)
+                if tamanho > TAMANHO_MAXIMO:
+                    await self._enviar(escritor, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erro": "Corpo muito grande"}, False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b""
+
+                status, resposta = await self.responder(metodo.upper(), caminho, corpo)
+                await self._enviar(escritor, status, resposta, manter)
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _enviar(self, escritor, status, resposta, manter):
+        corpo = json.dumps(resposta, ensure_ascii=False, default=_json).encode("utf-8")
+        cabecalho = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        escritor.write(cabecalho + corpo)
+        await escritor.drain()
+
+    async def servir(self, host="127.0.0.1", porta=8765):
+        servidor = await asyncio.start_server(self.conexao, host, porta)
+        logger.info("API ouvindo em http://%s:%s", host, porta)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(prog="python -m nucleo.api", description="API JSON local do simulador e do PCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--planilha", default=CAMINHO_PLANILHA, help="Planta de produção (.xlsx)")
+    args = parser.parse_args(argumentos)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(ServidorAPI(args.planilha).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# Benchmarks dos caminhos quentes das páginas sobre plantas sintéticas.
+#
+# Uso:
+#   python -m nucleo.benchmark [--linhas 1000 10000 100000 1000000] [--repeticoes 3]
+#       [--limite-excel 100000] [--sessoes 20] [--saida benchmark.json] [--base benchmark_anterior.json]
+#
+# Para cada tamanho, gera uma planta com as colunas reais da planilha e mede:
+# carga (planilha -> snapshot -> colunas), filtros do catálogo, comparativos
+# MQ-HR e rendimento, diferença de revisões da planta inteira, horas do PCP
+# (completas e o recálculo incremental de uma meta), simulador e exportação
+# para Excel, e a memória que cada sessão do PCP retém (seleções sobre o
+# catálogo compartilhado x cópias das mesmas seleções).
+# O resultado vai para um JSON; com --base, cada etapa é comparada com uma
+# execução anterior e o comando sai com código 1 se alguma ficou mais lenta
+# que a tolerância.
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.comparacao import comparar_maq_hr, comparar_rendimento
+from nucleo.dados import carregar_colunas, garantir_snapshot
+from nucleo.exportacao import gravar_excel
+from nucleo.pcp import (
+    COLUNAS_PLANTA, configuracao_padrao, horas_disponiveis, horas_necessarias, horas_necessarias_por_operacao,
+    operacoes_planta, preparar_planta, verificar_ocupacao
+)
+from nucleo.recalculo import RecalculoPCP
+from nucleo.revisoes import DiferencaRevisoes
+from nucleo.simulador import simular_lote, varrer_cenarios
+
+# Colunas na ordem da planilha real
+COLUNAS_SINTETICAS = [
+    "REVISÃO", "MS", "FIAÇÃO", "PRODUTO", "N° FUSOS", "N° OPERAÇÃO", "OPERAÇÃO", "% REND",
+    "KG/MH", "MAQ HR", "N_ROTEIRO", "LINHA DE PRODUÇÃO", "Diferença%"
+]
+
+_ETAPAS_ROTEIRO = ("PR", "FI", "VM", "ST")
+_RENDIMENTOS = np.array([70.0, 75.0, 80.0, 85.0, 88.0, 90.0, 92.0, 95.0, 97.0, 98.0, 99.0, 100.0])
+
+
+# Planta sintética com "linhas" linhas e o formato da planilha real: cada
+# (PRODUTO, REVISÃO) tem um roteiro de 7 a 33 operações numeradas em
+# sequência, duas linhas de produção alternativas (R1/R2) e etapas comuns.
+def planta_sintetica(linhas, semente=0, fiacoes=("FL", "FC"), operacoes_por_fiacao=50, linhas_por_fiacao=10):
+    rng = np.random.default_rng(semente)
+    tamanhos = rng.integers(7, 34, size=linhas // 7 + 1)
+    tamanhos = tamanhos[:np.searchsorted(np.cumsum(tamanhos), linhas) + 1]
+    tamanhos[-1] -= tamanhos.sum() - linhas
+    roteiros = len(tamanhos)
+
+    # Cada produto tem de 1 a 3 revisões (roteiros consecutivos)
+    revisoes = np.ones(roteiros, dtype=np.int64)
+    novo_produto = rng.random(roteiros) < 0.5
+    novo_produto[0] = True
+    produto = np.cumsum(novo_produto) - 1
+    for i in range(1, roteiros):
+        if not novo_produto[i]:
+            revisoes[i] = revisoes[i - 1] + 1
+    fiacao_produto = rng.integers(0, len(fiacoes), size=produto[-1] + 1)
+
+    grupo = np.repeat(np.arange(roteiros), tamanhos)
+    n_operacao = np.arange(linhas) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos) + 1
+    produto_linha = produto[grupo]
+    fiacao = fiacao_produto[produto_linha]
+
+    codigo_operacao = rng.integers(0, operacoes_por_fiacao, size=linhas)
+    kg_mh = np.round(rng.lognormal(np.log(60), 0.9, size=linhas), 2) + 0.5
+    maq_hr = 1000 / kg_mh
+
+    # Linha de produção: alternativa R1/R2 nas primeiras etapas, comum no final
+    etapa = np.minimum((n_operacao - 1) * len(_ETAPAS_ROTEIRO) // np.repeat(tamanhos, tamanhos), len(_ETAPAS_ROTEIRO) - 1)
+    comum = etapa == len(_ETAPAS_ROTEIRO) - 1
+    alternativa = rng.integers(1, 3, size=linhas)
+    base_linha = (produto_linha * 2) % linhas_por_fiacao
+    nomes_fiacao = np.array(fiacoes, dtype=object)[fiacao]
+    linha_1 = pd.Series(nomes_fiacao + " LINHA " + (base_linha + 1).astype(str))
+    linha_2 = pd.Series(nomes_fiacao + " LINHA " + ((base_linha + 1) % linhas_por_fiacao + 1).astype(str))
+    linha = np.where(comum, linha_1 + " & " + linha_2, np.where(alternativa == 1, linha_1, linha_2))
+
+    ms = pd.Series(produto_linha).map("{:04d}".format).to_numpy(dtype=object)
+    roteiro = (
+        nomes_fiacao + np.array(_ETAPAS_ROTEIRO, dtype=object)[etapa] + ms
+        + pd.Series(revisoes[grupo]).map("{:04d}".format).to_numpy(dtype=object)
+        + np.where(comum, "", "R" + alternativa.astype(str).astype(object))
+    )
+
+    return pd.DataFrame({
+        "REVISÃO": revisoes[grupo],
+        "MS": ms,
+        "FIAÇÃO": nomes_fiacao,
+        "PRODUTO": "PRODUTO " + pd.Series(produto_linha).astype(str),
+        "N° FUSOS": rng.choice([1, 1, 1, 2, 4, 8, 24, 240, 480], size=linhas),
+        "N° OPERAÇÃO": n_operacao,
+        "OPERAÇÃO": nomes_fiacao + " OPERAÇÃO " + codigo_operacao.astype(str).astype(object),
+        "% REND": rng.choice(_RENDIMENTOS, size=linhas),
+        "KG/MH": kg_mh,
+        "MAQ HR": maq_hr,
+        "N_ROTEIRO": roteiro,
+        "LINHA DE PRODUÇÃO": linha,
+        "Diferença%": maq_hr - 1,
+    })[COLUNAS_SINTETICAS]
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+# Bytes alocados pelo numpy/Python (tracemalloc) e pelo Arrow (strings)
+def _alocado():
+    total = tracemalloc.get_traced_memory()[0]
+    try:
+        import pyarrow
+    except ImportError:
+        return total
+    return total + pyarrow.total_allocated_bytes()
+
+
+# Memória (MB) retida por sessão do PCP: a planta da FIAÇÃO (df_raw, mantido
+# pelos fragmentos da página) e cinco seleções de produto. Mede as seleções
+# do catálogo (fatias do dado compartilhado) e, para comparação, cópias das
+# mesmas seleções (uma cópia por sessão).
+def memoria_sessoes(catalogo, sessoes=20):
+    fiacoes, produtos = catalogo.valores("FIAÇÃO"), catalogo.produtos()
+    medidas = {}
+    tracemalloc.start()
+    for modo, preparar in (("compartilhado", lambda df: df), ("copia", lambda df: df.copy(deep=True))):
+        antes, guardadas = _alocado(), []
+        for i in range(sessoes):
+            guardadas.append([preparar(catalogo.selecionar(fiacao=fiacoes[i % len(fiacoes)]))] + [
+                preparar(catalogo.selecionar(produto=produtos[(i * 5 + j) % len(produtos)])) for j in range(5)
+            ])
+        medidas[modo] = (_alocado() - antes) / 2**20 / sessoes
+        del guardadas
+    tracemalloc.stop()
+    return medidas
+
+
+# Mede as etapas de um tamanho de planta; retorna um registro por etapa
+def medir_tamanho(linhas, repeticoes=3, limite_excel=100_000, semente=0, sessoes=20):
+    planta = planta_sintetica(linhas, semente)
+    rng = np.random.default_rng(semente + 1)
+    resultados = []
+
+    def registrar(etapa, funcao, vezes=repeticoes):
+        tempos = _medir(funcao, vezes)
+        resultados.append({
+            "etapa": etapa,
+            "linhas": linhas,
+            "repeticoes": vezes,
+            "segundos_min": min(tempos),
+            "segundos_mediana": statistics.median(tempos),
+        })
+
+    def ignorar(etapa, motivo):
+        resultados.append({"etapa": etapa, "linhas": linhas, "ignorado": motivo})
+
+    # Carga: planilha .xlsx -> snapshot colunar (fria) e leitura do snapshot (quente)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "PLANTA_SINTETICA.xlsx")
+        if linhas <= limite_excel:
+            planta.to_excel(caminho, index=False)
+            registrar("carga.snapshot_frio", lambda: garantir_snapshot(caminho), vezes=1)
+            registrar("carga.colunas_pcp", lambda: carregar_colunas(caminho, COLUNAS_PLANTA))
+        else:
+            ignorar("carga.snapshot_frio", f"acima de --limite-excel ({limite_excel})")
+            ignorar("carga.colunas_pcp", f"acima de --limite-excel ({limite_excel})")
+
+    # Catálogo: montagem dos índices e filtros produto/revisão/linhas
+    pcp = preparar_planta(planta[COLUNAS_PLANTA])
+    registrar("catalogo.montar", lambda: CatalogoPlanta(pcp))
+    catalogo = CatalogoPlanta(pcp)
+    chaves = pcp[["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO"]].drop_duplicates().to_numpy()
+    consultas = chaves[rng.integers(0, len(chaves), size=100)]
+    catalogo.selecionar(produto=consultas[0][0], revisao=consultas[0][1])
+
+    def filtrar():
+        for produto, revisao, linha in consultas:
+            catalogo.selecionar(["OPERAÇÃO", "KG/MH"], produto=produto, revisao=revisao, linhas=[linha])
+    registrar("catalogo.100_filtros", filtrar)
+
+    memoria = memoria_sessoes(catalogo, sessoes)
+    resultados.append({
+        "etapa": "memoria.por_sessao",
+        "linhas": linhas,
+        "sessoes": sessoes,
+        "mb_compartilhado": round(int(catalogo.dados.memory_usage(deep=True).sum()) / 2**20, 2),
+        "mb_por_sessao": round(memoria["compartilhado"], 3),
+        "mb_por_sessao_copia": round(memoria["copia"], 3),
+    })
+
+    # Comparativos MQ-HR e rendimento entre dois produtos
+    comparacao = CatalogoPlanta(planta[["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "OPERAÇÃO", "KG/MH", "MAQ HR",
+                                        "% REND", "N° OPERAÇÃO"]].copy())
+    (p1, r1, _), (p2, r2, _) = consultas[0], consultas[1]
+    filtro1 = comparacao.selecionar(["OPERAÇÃO", "N° OPERAÇÃO", "KG/MH", "MAQ HR", "% REND"], produto=p1, revisao=r1)
+    filtro2 = comparacao.selecionar(["OPERAÇÃO", "KG/MH", "MAQ HR", "% REND"], produto=p2, revisao=r2)
+    registrar("comparacao.maq_hr", lambda: comparar_maq_hr(filtro1, filtro2, p1, p2))
+    registrar("comparacao.rendimento", lambda: comparar_rendimento(filtro1, filtro2, p1, p2))
+
+    # Última x anterior revisão de todos os produtos e o impacto nas horas
+    registrar("revisoes.diferenca", lambda: DiferencaRevisoes(planta))
+    revisoes = DiferencaRevisoes(planta)
+    registrar("revisoes.impacto", lambda: revisoes.impacto())
+
+    # PCP: horas disponíveis, horas necessárias de todos os produtos e ocupação
+    config = configuracao_padrao(operacoes_planta(pcp))
+    demanda = pcp[["PRODUTO", "REVISÃO"]].drop_duplicates().assign(**{"Meta (ton)": 5.0})
+    registrar("pcp.horas_disponiveis", lambda: horas_disponiveis(config, 25, 5, 10))
+    registrar("pcp.horas_necessarias", lambda: horas_necessarias(pcp, demanda))
+    produtos, _ = horas_necessarias(pcp, demanda)
+    disponiveis = horas_disponiveis(config, 25, 5, 10)
+    registrar("pcp.ocupacao", lambda: verificar_ocupacao(horas_necessarias_por_operacao(produtos), disponiveis))
+
+    # Mesma página depois de mudar a meta de um produto: só as etapas dele são refeitas
+    recalculo = RecalculoPCP(pcp)
+    recalculo.horas_necessarias(demanda)
+    recalculo.verificar_ocupacao(config, 25, 5, 10)
+    metas = itertools.cycle([
+        demanda.assign(**{"Meta (ton)": np.r_[meta, np.full(len(demanda) - 1, 5.0)]}) for meta in (6.0, 5.0)
+    ])
+
+    def mudar_meta():
+        recalculo.horas_necessarias(next(metas))
+        recalculo.verificar_ocupacao(config, 25, 5, 10)
+    registrar("pcp.recalculo_meta", mudar_meta)
+
+    # Simulador: um cenário por linha da planta e a varredura padrão da página
+    kg_mh = planta["KG/MH"].to_numpy()
+    fusos = planta["N° FUSOS"].to_numpy()
+    registrar("simulador.lote", lambda: simular_lote(
+        50_000, fusos, kg_mh, 0, 90, 2, True, False, "ABC", 0.05, 0.05, 25
+    ))
+    registrar("simulador.varredura", lambda: varrer_cenarios(
+        50_000, 480, 60.0, 25, np.arange(0, 49), np.arange(50, 101), np.arange(1, 11)
+    ))
+
+    # Exportação das horas necessárias (maior tabela das páginas) para Excel
+    if len(produtos) <= limite_excel:
+        def exportar():
+            with tempfile.TemporaryFile() as arquivo:
+                gravar_excel(arquivo, {"Horas_Necessarias": produtos})
+        registrar("exportacao.excel", exportar, vezes=1)
+    else:
+        ignorar("exportacao.excel", f"acima de --limite-excel ({limite_excel})")
+
+    return resultados
+
+
+def _ambiente():
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+# Etapas mais lentas que a base além da tolerância (ex.: 0.2 = 20%)
+def regressoes(resultados, base, tolerancia=0.2):
+    anteriores = {(r["etapa"], r["linhas"]): r for r in base["resultados"] if "segundos_min" in r}
+    piores = []
+    for r in resultados:
+        anterior = anteriores.get((r["etapa"], r["linhas"]))
+        if anterior is None or "segundos_min" not in r or anterior["segundos_min"] <= 0:
+            continue
+        razao = r["segundos_min"] / anterior["segundos_min"]
+        if razao > 1 + tolerancia:
+            piores.append({**r, "razao": round(razao, 2), "segundos_base": anterior["segundos_min"]})
+    return piores
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(prog="python -m nucleo.benchmark", description="Benchmarks com plantas sintéticas.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--limite-excel", type=int, default=100_000,
+                        help="Maior tabela lida/gravada em .xlsx (o openpyxl leva minutos acima disso)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sessoes", type=int, default=20, help="Sessões simuladas na medição de memória")
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Aumento aceito em relação à base (0.2 = 20%%)")
+    args = parser.parse_args(argumentos)
+
+    resultados = []
+    for linhas in args.linhas:
+        for r in medir_tamanho(linhas, args.repeticoes, args.limite_excel, args.semente, args.sessoes):
+            resultados.append(r)
+            if "mb_por_sessao" in r:
+                print(f"{r['linhas']:>9} {r['etapa']:<26} {r['mb_por_sessao']:>10.2f} MB/sessão "
+                      f"(cópias: {r['mb_por_sessao_copia']:.2f} MB; compartilhado: {r['mb_compartilhado']:.1f} MB)")
+            elif "segundos_min" in r:
+                print(f"{r['linhas']:>9} {r['etapa']:<26} {r['segundos_min'] * 1000:>10.2f} ms")
+            else:
+                print(f"{r['linhas']:>9} {r['etapa']:<26} {'ignorado':>13} ({r['ignorado']})")
+
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump({"ambiente": _ambiente(), "resultados": resultados}, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as arquivo:
+            piores = regressoes(resultados, json.load(arquivo), args.tolerancia)
+        for r in piores:
+            print(f"REGRESSÃO {r['etapa']} ({r['linhas']} linhas): "
+                  f"{r['segundos_base'] * 1000:.2f} ms -> {r['segundos_min'] * 1000:.2f} ms ({r['razao']}x)")
+        if piores:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
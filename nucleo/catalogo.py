@@ -0,0 +1,118 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Colunas usadas como chave de busca (somente as presentes no DataFrame)
+CHAVES = ("FIAÇÃO", "PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "OPERAÇÃO")
+
+# Nome do filtro -> coluna da planilha
+FILTROS = {
+    "fiacao": "FIAÇÃO",
+    "produto": "PRODUTO",
+    "revisao": "REVISÃO",
+    "linhas": "LINHA DE PRODUÇÃO",
+    "operacao": "OPERAÇÃO",
+}
+
+
+# Catálogo indexado da planta: cada combinação de colunas-chave ganha um
+# índice hash (valores -> posições das linhas), montado na primeira consulta
+# e reaproveitado nas seguintes; as chaves são indexadas pelos códigos de
+# categoria, guardados à parte.
+#
+# O catálogo é somente leitura e compartilhado por todas as sessões. As linhas
+# ficam agrupadas pela primeira chave (ordem estável), então seleções que caem
+# em um trecho contínuo (uma FIAÇÃO, um produto) são devolvidas como fatia do
+# próprio catálogo, sem cópia: o pandas (copy-on-write) só copia se a sessão
+# alterar o resultado. O índice de cada linha continua sendo a sua posição no
+# DataFrame original, e as seleções vêm na ordem original.
+class CatalogoPlanta:
+
+    def __init__(self, df, chaves=CHAVES):
+        df = df.reset_index(drop=True)
+        self.chaves = [c for c in chaves if c in df.columns]
+        if self.chaves:
+            df = df.sort_values(self.chaves[0], kind="stable")
+        self.dados = df
+        self._categorias = pd.DataFrame({c: df[c].astype("category") for c in self.chaves})
+        self._original = df.index.to_numpy()
+        self._todas = np.argsort(self._original, kind="stable")
+        self._indices = {}
+
+    def __len__(self):
+        return len(self.dados)
+
+    def _indice(self, colunas):
+        if colunas not in self._indices:
+            grupos = self._categorias.groupby(list(colunas), observed=True, sort=False, dropna=False).indices
+            self._indices[colunas] = {
+                (chave if isinstance(chave, tuple) else (chave,)): posicoes
+                for chave, posicoes in grupos.items()
+            }
+        return self._indices[colunas]
+
+    def _posicoes(self, filtros):
+        restricoes = {}
+        for nome, valor in filtros.items():
+            if valor is None:
+                continue
+            coluna = FILTROS[nome]
+            if coluna not in self.chaves:
+                raise KeyError(f"Coluna {coluna} não faz parte do catálogo")
+            restricoes[coluna] = list(valor) if nome == "linhas" else [valor]
+
+        if not restricoes:
+            return self._todas
+
+        colunas = tuple(c for c in self.chaves if c in restricoes)
+        indice = self._indice(colunas)
+        partes = [
+            indice[chave] for chave in itertools.product(*(restricoes[c] for c in colunas))
+            if chave in indice
+        ]
+        if not partes:
+            return np.empty(0, dtype=np.intp)
+        posicoes = partes[0] if len(partes) == 1 else np.sort(np.concatenate(partes))
+        # Mantém a ordem original da planilha, como um filtro booleano faria
+        originais = self._original[posicoes]
+        if len(posicoes) > 1 and not (originais[1:] > originais[:-1]).all():
+            posicoes = posicoes[np.argsort(originais, kind="stable")]
+        return posicoes
+
+    # Trecho contínuo e em ordem: fatia sem cópia; demais seleções: take.
+    # Posições contínuas fora de ordem (grupos intercalados na planilha
+    # original) não podem virar fatia, senão as linhas sairiam na ordem do
+    # catálogo e não na da planilha.
+    @staticmethod
+    def _linhas(dados, posicoes):
+        if len(posicoes) and (np.diff(posicoes) == 1).all():
+            return dados.iloc[posicoes[0]:posicoes[-1] + 1]
+        return dados.take(posicoes)
+
+    # Linhas que atendem aos filtros
+    def selecionar(self, colunas=None, **filtros):
+        dados = self.dados if colunas is None else self.dados[colunas]
+        return self._linhas(dados, self._posicoes(filtros))
+
+    # Linhas de várias seleções de uma vez (lista de dicts de filtros), com a
+    # coluna "Seleção" indicando a posição da seleção na lista
+    def selecionar_varios(self, selecoes, colunas=None):
+        posicoes = [self._posicoes(filtros) for filtros in selecoes]
+        dados = self.dados if colunas is None else self.dados[colunas]
+        resultado = dados.take(np.concatenate(posicoes) if posicoes else np.empty(0, dtype=np.intp))
+        resultado = resultado.reset_index(drop=True)
+        resultado.insert(0, "Seleção", np.repeat(np.arange(len(selecoes)), [len(p) for p in posicoes]))
+        return resultado
+
+    # Valores distintos (ordenados) de uma coluna dentro do filtro
+    def valores(self, coluna, **filtros):
+        posicoes = self._posicoes(filtros)
+        if coluna in self.chaves:
+            serie = self._categorias[coluna]
+            codigos = np.unique(serie.cat.codes.to_numpy()[posicoes])
+            return sorted(serie.cat.categories[codigos[codigos >= 0]])
+        return sorted(self.dados[coluna].iloc[posicoes].dropna().unique())
+
+    def produtos(self, **filtros):
+        return self.valores("PRODUTO", **filtros)
@@ -0,0 +1,255 @@
+# Cenários salvos do PCP e do simulador em um SQLite local.
+#
+# Cada cenário guarda os parâmetros (JSON) e as tabelas de entrada e de
+# resultado. As tabelas ficam em "blocos" endereçados pelo hash do conteúdo:
+# salvar um cenário que repete uma tabela de outro (ex.: mesma demanda) não a
+# grava de novo, e a comparação de dois cenários olha primeiro os hashes, então
+# só as tabelas que mudaram são lidas e comparadas linha a linha (pela chave
+# de cada tabela). As buscas por tipo + data, FIAÇÃO ou autor usam índices.
+#
+# O arquivo fica em cenarios/cenarios.sqlite (ou no caminho da variável de
+# ambiente PARAMOUNT_CENARIOS).
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import pandas as pd
+
+ARQUIVO_CENARIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cenarios", "cenarios.sqlite")
+
+TIPOS = ("pcp", "simulador")
+
+# Chave de cada tabela na comparação linha a linha
+CHAVES_TABELAS = {
+    "configuracao": ["OPERAÇÃO"],
+    "disponiveis": ["OPERAÇÃO"],
+    "checagem": ["OPERAÇÃO"],
+    "demanda": ["PRODUTO", "REVISÃO"],
+    "entradas": ["Posição"],
+    "simulacao": ["Posição"],
+}
+
+COLUNAS_LISTA = ["id", "tipo", "nome", "autor", "fiacao", "data", "criado_em", "versao_planta"]
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cenarios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    autor TEXT NOT NULL DEFAULT '',
+    fiacao TEXT,
+    data TEXT NOT NULL,
+    criado_em TEXT NOT NULL,
+    versao_planta TEXT,
+    parametros TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cenarios_data ON cenarios (tipo, data);
+CREATE INDEX IF NOT EXISTS cenarios_fiacao ON cenarios (tipo, fiacao, data);
+CREATE INDEX IF NOT EXISTS cenarios_autor ON cenarios (tipo, autor, data);
+CREATE TABLE IF NOT EXISTS blocos (
+    hash TEXT PRIMARY KEY,
+    conteudo BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tabelas (
+    cenario INTEGER NOT NULL REFERENCES cenarios (id) ON DELETE CASCADE,
+    nome TEXT NOT NULL,
+    hash TEXT NOT NULL REFERENCES blocos (hash),
+    PRIMARY KEY (cenario, nome)
+);
+"""
+
+
+@dataclass
+class Cenario:
+    id: int
+    tipo: str
+    nome: str
+    autor: str
+    fiacao: str
+    data: str
+    criado_em: str
+    versao_planta: str
+    parametros: dict
+    tabelas: dict
+
+
+@dataclass
+class DiferencaCenarios:
+    parametros: pd.DataFrame    # Parâmetro, A, B (só os que mudaram)
+    tabelas: dict               # nome -> linhas alteradas (ver diferenca_tabelas)
+    iguais: list                # tabelas com o mesmo conteúdo (não comparadas)
+
+
+# Tabela -> JSON (com o esquema, para voltar com os mesmos tipos)
+def _serializar(tabela):
+    return tabela.to_json(orient="table", index=False, force_ascii=False, date_format="iso").encode("utf-8")
+
+
+def _desserializar(conteudo):
+    return pd.read_json(io.StringIO(zlib.decompress(conteudo).decode("utf-8")), orient="table")
+
+
+# Linhas que mudaram entre duas versões de uma tabela, casadas pela chave:
+# "Situação" (Só em A / Só em B / Alterada) e, para cada coluna que mudou,
+# os valores em A e em B (e a diferença B - A, se numérica)
+def diferenca_tabelas(antes, depois, chave):
+    chave = [c for c in chave if c in antes.columns and c in depois.columns]
+    antes, depois = antes.copy(), depois.copy()
+    # Chaves repetidas (ex.: o mesmo produto duas vezes na demanda) casam pela ordem
+    if antes.duplicated(chave).any() or depois.duplicated(chave).any():
+        antes["Ocorrência"] = antes.groupby(chave, sort=False).cumcount() + 1
+        depois["Ocorrência"] = depois.groupby(chave, sort=False).cumcount() + 1
+        chave = [*chave, "Ocorrência"]
+
+    colunas = [c for c in antes.columns if c in depois.columns and c not in chave]
+    juntas = antes.merge(depois, on=chave, how="outer", suffixes=(" (A)", " (B)"), indicator=True, sort=True)
+    mudou = {}
+    for coluna in colunas:
+        a, b = juntas[f"{coluna} (A)"], juntas[f"{coluna} (B)"]
+        mudou[coluna] = ~((a == b).fillna(False) | (a.isna() & b.isna())) & (juntas["_merge"] == "both")
+
+    alteradas = pd.concat(mudou, axis=1).any(axis=1) if mudou else pd.Series(False, index=juntas.index)
+    situacao = juntas["_merge"].map({"left_only": "Só em A", "right_only": "Só em B", "both": "Alterada"}).astype(str)
+    manter = alteradas | (juntas["_merge"] != "both")
+
+    resultado = juntas.loc[manter, chave].copy()
+    resultado.insert(len(chave), "Situação", situacao[manter])
+    for coluna in colunas:
+        if not (mudou[coluna] | (juntas["_merge"] != "both"))[manter].any():
+            continue
+        a, b = juntas.loc[manter, f"{coluna} (A)"], juntas.loc[manter, f"{coluna} (B)"]
+        resultado[f"{coluna} (A)"] = a
+        resultado[f"{coluna} (B)"] = b
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b) and not pd.api.types.is_bool_dtype(a):
+            resultado[f"Δ {coluna}"] = b - a
+    return resultado.reset_index(drop=True)
+
+
+class ArmazemCenarios:
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or os.environ.get("PARAMOUNT_CENARIOS", ARQUIVO_CENARIOS)
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        with self._conectar() as conexao:
+            conexao.executescript(_ESQUEMA)
+
+    # Uma conexão por operação: o Streamlit atende cada sessão em uma thread
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=10)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA foreign_keys=ON")
+        return conexao
+
+    # Grava um cenário ({nome: DataFrame} em "tabelas") e retorna o id
+    def salvar(self, tipo, nome, parametros, tabelas, autor="", fiacao=None, data=None, versao_planta=None):
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de cenário desconhecido: {tipo} (use {', '.join(TIPOS)})")
+        data = (data or date.today()).isoformat() if not isinstance(data, str) else data
+        blocos = {}
+        for nome_tabela, tabela in tabelas.items():
+            conteudo = _serializar(tabela)
+            blocos[nome_tabela] = (hashlib.sha256(conteudo).hexdigest(), conteudo)
+
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "INSERT INTO cenarios (tipo, nome, autor, fiacao, data, criado_em, versao_planta, parametros) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (tipo, nome, autor or "", fiacao, data, datetime.now().isoformat(timespec="seconds"),
+                 versao_planta, json.dumps(parametros, ensure_ascii=False, default=str))
+            )
+            cenario = cursor.lastrowid
+            for nome_tabela, (hash_tabela, conteudo) in blocos.items():
+                conexao.execute("INSERT OR IGNORE INTO blocos (hash, conteudo) VALUES (?, ?)",
+                                (hash_tabela, zlib.compress(conteudo)))
+                conexao.execute("INSERT INTO tabelas (cenario, nome, hash) VALUES (?, ?, ?)",
+                                (cenario, nome_tabela, hash_tabela))
+        return cenario
+
+    # Cenários (sem as tabelas), do mais recente para o mais antigo. "desde" e
+    # "ate" são datas (inclusive); autor é comparado sem diferenciar maiúsculas.
+    def listar(self, tipo=None, fiacao=None, autor=None, desde=None, ate=None, limite=200):
+        condicoes, valores = [], []
+        for coluna, valor, operador in (
+            ("tipo", tipo, "="), ("fiacao", fiacao, "="), ("data", desde, ">="), ("data", ate, "<=")
+        ):
+            if valor is not None:
+                condicoes.append(f"{coluna} {operador} ?")
+                valores.append(valor.isoformat() if isinstance(valor, date) else valor)
+        if autor:
+            condicoes.append("autor = ? COLLATE NOCASE")
+            valores.append(autor)
+        onde = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                f"SELECT {', '.join(COLUNAS_LISTA)} FROM cenarios {onde} ORDER BY data DESC, id DESC LIMIT ?",
+                (*valores, limite)
+            ).fetchall()
+        return pd.DataFrame(linhas, columns=COLUNAS_LISTA)
+
+    def _hashes(self, conexao, cenario):
+        return dict(conexao.execute("SELECT nome, hash FROM tabelas WHERE cenario = ? ORDER BY rowid", (cenario,)).fetchall())
+
+    def _blocos(self, conexao, hashes):
+        marcadores = ", ".join("?" * len(hashes))
+        linhas = conexao.execute(f"SELECT hash, conteudo FROM blocos WHERE hash IN ({marcadores})", list(hashes))
+        return {hash_tabela: _desserializar(conteudo) for hash_tabela, conteudo in linhas}
+
+    def _registro(self, conexao, cenario):
+        linha = conexao.execute(
+            f"SELECT {', '.join(COLUNAS_LISTA)}, parametros FROM cenarios WHERE id = ?", (cenario,)
+        ).fetchone()
+        if linha is None:
+            raise KeyError(f"Cenário {cenario} não encontrado")
+        return linha
+
+    # Cenário completo: parâmetros e tabelas
+    def carregar(self, cenario):
+        with self._conectar() as conexao:
+            linha = self._registro(conexao, cenario)
+            hashes = self._hashes(conexao, cenario)
+            blocos = self._blocos(conexao, set(hashes.values())) if hashes else {}
+        return Cenario(*linha[:-1], parametros=json.loads(linha[-1]),
+                       tabelas={nome: blocos[hash_tabela] for nome, hash_tabela in hashes.items()})
+
+    def excluir(self, cenario):
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM cenarios WHERE id = ?", (cenario,))
+            conexao.execute("DELETE FROM blocos WHERE hash NOT IN (SELECT hash FROM tabelas)")
+
+    # Diferença de parâmetros e tabelas entre os cenários A e B. Tabelas com o
+    # mesmo hash nos dois nem são lidas do banco.
+    def comparar(self, cenario_a, cenario_b):
+        with self._conectar() as conexao:
+            registros = [self._registro(conexao, c) for c in (cenario_a, cenario_b)]
+            hashes_a, hashes_b = self._hashes(conexao, cenario_a), self._hashes(conexao, cenario_b)
+            nomes = [n for n in hashes_a if n in hashes_b] + [n for n in hashes_b if n not in hashes_a]
+            iguais = [n for n in nomes if hashes_a.get(n) == hashes_b.get(n)]
+            diferentes = [n for n in nomes if n not in iguais]
+            necessarios = {hashes_a[n] for n in diferentes if n in hashes_a} | {hashes_b[n] for n in diferentes if n in hashes_b}
+            blocos = self._blocos(conexao, necessarios) if necessarios else {}
+
+        vazia = pd.DataFrame()
+        tabelas = {}
+        for nome in diferentes:
+            antes = blocos[hashes_a[nome]] if nome in hashes_a else vazia
+            depois = blocos[hashes_b[nome]] if nome in hashes_b else vazia
+            if antes.empty or depois.empty:
+                tabelas[nome] = (depois if antes.empty else antes).assign(Situação="Só em B" if antes.empty else "Só em A")
+            else:
+                tabelas[nome] = diferenca_tabelas(antes, depois, CHAVES_TABELAS.get(nome, []))
+
+        parametros_a, parametros_b = ({
+            **json.loads(r[-1]), "fiacao": r[4], "versao_planta": r[7]
+        } for r in registros)
+        mudaram = [
+            (nome, *("" if valor is None else str(valor) for valor in (parametros_a.get(nome), parametros_b.get(nome))))
+            for nome in dict.fromkeys([*parametros_a, *parametros_b])
+            if parametros_a.get(nome) != parametros_b.get(nome)
+        ]
+        parametros = pd.DataFrame(mudaram, columns=["Parâmetro", "A", "B"])
+        return DiferencaCenarios(parametros=parametros, tabelas=tabelas, iguais=iguais)
@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Resultado da comparação de dois produtos operação a operação
+@dataclass
+class Comparativo:
+    tabela: pd.DataFrame  # uma linha por OPERAÇÃO, colunas "<rótulo> - <nome>"
+    colunas: list  # colunas na ordem de exibição
+    total1: float  # soma da métrica comparada no produto 1
+    total2: float
+    diferenca_total: float  # (total1 - total2) / total1, em %
+
+
+# Compara dois recortes da planta (saídas de CatalogoPlanta.selecionar) por
+# OPERAÇÃO. "metricas" mapeia coluna da planta -> rótulo exibido, na ordem das
+# colunas; "comparar" é a coluna usada na diferença percentual. O produto 1
+# precisa trazer "N° OPERAÇÃO", que define a ordem das linhas.
+def comparar_operacoes(filtro1: pd.DataFrame, filtro2: pd.DataFrame, nome1: str, nome2: str,
+                       metricas: dict, comparar: str, coluna_diferenca: str) -> Comparativo:
+    colunas1 = {coluna: f"{rotulo} - {nome1}" for coluna, rotulo in metricas.items()}
+    colunas2 = {coluna: f"{rotulo} - {nome2}" for coluna, rotulo in metricas.items()}
+
+    # Produto 1 agrupado mantendo o menor N° OPERAÇÃO; produto 2 só soma as métricas
+    if not filtro1.empty:
+        tabela1 = filtro1.rename(columns=colunas1).groupby(["OPERAÇÃO"], as_index=False).agg(
+            {"N° OPERAÇÃO": "min", **{c: "sum" for c in colunas1.values()}}
+        )
+    else:
+        tabela1 = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", *colunas1.values()])
+
+    tabela2 = filtro2.rename(columns=colunas2)[["OPERAÇÃO", *colunas2.values()]]
+    tabela2 = tabela2.groupby(["OPERAÇÃO"], as_index=False).sum(numeric_only=True)
+
+    comparativo = pd.merge(tabela1, tabela2, on=["OPERAÇÃO"], how="outer")
+
+    # Valores ausentes (operação só em um dos produtos) viram zero
+    for coluna in [*colunas1.values(), *colunas2.values()]:
+        if coluna not in comparativo.columns:
+            comparativo[coluna] = 0
+        else:
+            comparativo[coluna] = comparativo[coluna].fillna(0)
+
+    # "N° OPERAÇÃO" numérico para a ordenação correta
+    comparativo["N° OPERAÇÃO"] = pd.to_numeric(comparativo["N° OPERAÇÃO"], errors="coerce")
+
+    base1, base2 = colunas1[comparar], colunas2[comparar]
+    comparativo[coluna_diferenca] = (
+        (comparativo[base1] - comparativo[base2]) / comparativo[base1].replace(0, pd.NA)
+    ) * 100
+    comparativo[coluna_diferenca] = pd.to_numeric(comparativo[coluna_diferenca], errors="coerce").round(2)
+
+    comparativo = comparativo.sort_values(by=["N° OPERAÇÃO", "OPERAÇÃO"], ascending=True, na_position="last")
+
+    # Diferença total ponderada
+    total1 = comparativo[base1].sum()
+    total2 = comparativo[base2].sum()
+    diferenca_total = round(((total1 - total2) / total1) * 100, 2) if total1 != 0 else 0
+
+    colunas = ["N° OPERAÇÃO", "OPERAÇÃO"]
+    for coluna in metricas:
+        colunas += [colunas1[coluna], colunas2[coluna]]
+    colunas.append(coluna_diferenca)
+    return Comparativo(comparativo, colunas, total1, total2, diferenca_total)
+
+
+# Comparativo de MAQ HR (e KG/HR) da página Diferença MQ-HR
+def comparar_maq_hr(filtro1, filtro2, nome1, nome2) -> Comparativo:
+    return comparar_operacoes(
+        filtro1, filtro2, nome1, nome2,
+        metricas={"KG/MH": "KG/HR", "MAQ HR": "MAQ HR"},
+        comparar="MAQ HR",
+        coluna_diferenca="Diferença (%) MAQ HR"
+    )
+
+
+# Comparativo de % REND da página Diferença Rendimento
+def comparar_rendimento(filtro1, filtro2, nome1, nome2) -> Comparativo:
+    return comparar_operacoes(
+        filtro1, filtro2, nome1, nome2,
+        metricas={"% REND": "% REND"},
+        comparar="% REND",
+        coluna_diferenca="Diferença (%) Rendimento"
+    )
+
+
+# Resultado da comparação de várias seleções contra uma base
+@dataclass
+class ComparativoMultiplo:
+    tabela: pd.DataFrame  # uma linha por OPERAÇÃO, colunas "<rótulo> - <nome>" e "Diferença (%) - <nome>"
+    colunas: list  # colunas na ordem de exibição
+    diferencas: pd.DataFrame  # OPERAÇÃO x nome: diferença (%) contra a base (NaN onde a base é zero)
+    totais: pd.DataFrame  # uma linha por seleção: totais das métricas e diferença total (%)
+
+
+# Compara N seleções (saída de CatalogoPlanta.selecionar_varios, com a coluna
+# "Seleção") por OPERAÇÃO em um único groupby: as métricas de cada seleção
+# viram colunas e a diferença percentual contra a seleção "base" é calculada
+# de uma vez para todas, com a mesma convenção do comparativo de dois produtos
+# ((base - seleção) / base). A ordem das linhas segue o N° OPERAÇÃO da base.
+def comparar_varios(dados: pd.DataFrame, nomes: list, base: int, metricas: dict,
+                    comparar: str) -> ComparativoMultiplo:
+    selecoes = range(len(nomes))
+    somas = dados.groupby(["OPERAÇÃO", "Seleção"], sort=False)[list(metricas)].sum()
+    largo = somas.unstack("Seleção", fill_value=0).reindex(
+        columns=pd.MultiIndex.from_product([list(metricas), selecoes]), fill_value=0
+    )
+
+    na_base = (dados["Seleção"] == base).to_numpy()
+    numero = pd.to_numeric(dados["N° OPERAÇÃO"], errors="coerce").to_numpy()[na_base]
+    ordem = pd.Series(numero).groupby(dados["OPERAÇÃO"].to_numpy()[na_base]).min()
+    largo.insert(0, "N° OPERAÇÃO", ordem.reindex(largo.index))
+    largo = largo.sort_values("N° OPERAÇÃO", na_position="last", kind="stable")
+
+    valores = largo[comparar].to_numpy(dtype=float)
+    referencia = valores[:, [base]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diferencas = np.where(referencia != 0, (referencia - valores) / referencia * 100, np.nan)
+    diferencas = pd.DataFrame(diferencas.round(2), index=largo.index, columns=nomes)
+
+    colunas_tabela = {"N° OPERAÇÃO": largo["N° OPERAÇÃO"]}
+    for coluna, rotulo in metricas.items():
+        for i, nome in enumerate(nomes):
+            colunas_tabela[f"{rotulo} - {nome}"] = largo[(coluna, i)]
+    for i, nome in enumerate(nomes):
+        if i != base:
+            colunas_tabela[f"Diferença (%) - {nome}"] = diferencas[nome]
+    tabela = pd.DataFrame(colunas_tabela).reset_index()
+
+    somas_totais = largo[comparar].sum().to_numpy(dtype=float)
+    total_base = somas_totais[base]
+    totais = pd.DataFrame({"Seleção": nomes})
+    for coluna, rotulo in metricas.items():
+        totais[f"Total {rotulo}"] = largo[coluna].sum().to_numpy()
+    totais["Diferença Total (%)"] = (
+        ((total_base - somas_totais) / total_base * 100).round(2) if total_base != 0 else 0.0
+    )
+
+    colunas = ["N° OPERAÇÃO", "OPERAÇÃO", *tabela.columns[2:]]
+    return ComparativoMultiplo(tabela[colunas], colunas, diferencas, totais)
+
+
+# Comparativo de MAQ HR (e KG/HR) de várias seleções da página Diferença MQ-HR
+def comparar_maq_hr_varios(dados, nomes, base=0) -> ComparativoMultiplo:
+    return comparar_varios(dados, nomes, base, metricas={"KG/MH": "KG/HR", "MAQ HR": "MAQ HR"}, comparar="MAQ HR")
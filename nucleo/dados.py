@@ -0,0 +1,304 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+CAMINHO_PLANILHA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "pages",
+    "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx"
+)
+
+# Pasta (ao lado da planilha) onde ficam os snapshots colunares
+PASTA_SNAPSHOT = ".snapshot_planta"
+VERSAO_FORMATO = 1
+VERSOES_MANTIDAS = 2
+
+logger = logging.getLogger(__name__)
+
+
+# Tamanho + mtime + hash do conteúdo da planilha
+def impressao_digital(caminho=CAMINHO_PLANILHA):
+    info = os.stat(caminho)
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            sha.update(bloco)
+    return {
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": sha.hexdigest()
+    }
+
+
+def _pasta_base(caminho):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho)), PASTA_SNAPSHOT)
+
+
+def _ler_json(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_json(caminho, conteudo):
+    # Grava em arquivo temporário e troca com os.replace (atômico)
+    pasta = os.path.dirname(caminho)
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+# Converte uma coluna do DataFrame em arrays .npy (valores + máscara de nulos)
+def _serializar_coluna(serie):
+    if (pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie)
+            or pd.api.types.is_datetime64_any_dtype(serie)):
+        return "numerico", serie.to_numpy(), None
+
+    valores = serie.to_numpy(dtype=object)
+    nulos = serie.isna().to_numpy()
+    if all(isinstance(v, str) for v in valores[~nulos]):
+        texto = np.where(nulos, "", valores).astype(str)
+        return "texto", texto, nulos
+
+    # Colunas com tipos misturados (ex.: "1,5" e 1.5) ficam como objeto
+    return "objeto", valores, None
+
+
+def _construir_snapshot(caminho, impressao, destino):
+    df = pd.read_excel(caminho)
+    base = os.path.dirname(destino)
+    temporario = tempfile.mkdtemp(dir=base, prefix=".tmp-")
+
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        tipo, valores, nulos = _serializar_coluna(df[nome])
+        arquivo = f"c{i:03d}.npy"
+        np.save(os.path.join(temporario, arquivo), valores, allow_pickle=(tipo == "objeto"))
+        arquivo_nulos = None
+        if nulos is not None and nulos.any():
+            arquivo_nulos = f"c{i:03d}.nulos.npy"
+            np.save(os.path.join(temporario, arquivo_nulos), nulos)
+        colunas.append({"nome": str(nome), "tipo": tipo, "arquivo": arquivo, "nulos": arquivo_nulos})
+
+    manifesto = {
+        "versao_formato": VERSAO_FORMATO,
+        "planilha": impressao,
+        "linhas": len(df),
+        "colunas": colunas
+    }
+    with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+
+    # Outro processo pode ter terminado o mesmo snapshot antes
+    try:
+        os.rename(temporario, destino)
+    except OSError:
+        shutil.rmtree(temporario, ignore_errors=True)
+        if not os.path.isdir(destino):
+            raise
+
+
+def _limpar_versoes_antigas(base, atual):
+    versoes = [
+        os.path.join(base, nome) for nome in os.listdir(base)
+        if not nome.startswith(".") and os.path.isdir(os.path.join(base, nome))
+    ]
+    versoes.sort(key=os.path.getmtime, reverse=True)
+    for pasta in versoes[VERSOES_MANTIDAS:]:
+        if os.path.basename(pasta) != atual:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+# Garante que existe um snapshot da versão atual da planilha e retorna sua pasta.
+# Se tamanho e mtime batem com o último snapshot, nem o hash é recalculado.
+def garantir_snapshot(caminho=CAMINHO_PLANILHA):
+    base = _pasta_base(caminho)
+    os.makedirs(base, exist_ok=True)
+    ponteiro = os.path.join(base, "atual.json")
+
+    info = os.stat(caminho)
+    atual = _ler_json(ponteiro)
+    if (atual and atual.get("versao_formato") == VERSAO_FORMATO
+            and atual["tamanho"] == info.st_size and atual["mtime_ns"] == info.st_mtime_ns
+            and os.path.isdir(os.path.join(base, atual["sha256"]))):
+        return os.path.join(base, atual["sha256"])
+
+    impressao = impressao_digital(caminho)
+    destino = os.path.join(base, impressao["sha256"])
+    if not os.path.isdir(destino):
+        _construir_snapshot(caminho, impressao, destino)
+
+    _gravar_json(ponteiro, dict(impressao, versao_formato=VERSAO_FORMATO))
+    _limpar_versoes_antigas(base, impressao["sha256"])
+    return destino
+
+
+def _ler_coluna(pasta, coluna):
+    caminho = os.path.join(pasta, coluna["arquivo"])
+    if coluna["tipo"] == "objeto":
+        return pd.Series(np.load(caminho, allow_pickle=True), name=coluna["nome"])
+
+    valores = np.load(caminho, mmap_mode="r")
+    if coluna["tipo"] == "numerico":
+        return pd.Series(np.asarray(valores), name=coluna["nome"])
+
+    serie = pd.Series(valores, name=coluna["nome"], dtype="str")
+    if coluna["nulos"]:
+        serie = serie.mask(np.load(os.path.join(pasta, coluna["nulos"])))
+    return serie
+
+
+# Colunas já lidas da versão atual de cada planilha (pasta do snapshot ->
+# {nome: Series}). Cada coluna é lida uma vez por versão e as páginas e
+# sessões recebem DataFrames que apontam para os mesmos dados: as numéricas
+# são o próprio .npy mapeado em memória (somente leitura, compartilhado pelo
+# cache de páginas do sistema) e as de texto, strings do pandas (Arrow).
+# Com o copy-on-write do pandas, quem alterar um DataFrame recebido ganha
+# uma cópia só da coluna alterada, sem afetar as demais páginas.
+_colunas_lidas = {}
+_trava_colunas = threading.Lock()
+
+
+def _coluna_compartilhada(pasta, coluna):
+    base = os.path.dirname(pasta)
+    with _trava_colunas:
+        if _colunas_lidas.get(base, (None,))[0] != pasta:
+            _colunas_lidas[base] = (pasta, {})
+        lidas = _colunas_lidas[base][1]
+        if coluna["nome"] not in lidas:
+            lidas[coluna["nome"]] = _ler_coluna(pasta, coluna)
+        return lidas[coluna["nome"]]
+
+
+# Carrega apenas as colunas pedidas a partir do snapshot colunar (sem cópia:
+# ver _colunas_lidas)
+def carregar_colunas(caminho=CAMINHO_PLANILHA, colunas=None):
+    pasta = garantir_snapshot(caminho)
+    with open(os.path.join(pasta, "manifesto.json"), encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+
+    por_nome = {c["nome"]: c for c in manifesto["colunas"]}
+    if colunas is None:
+        colunas = list(por_nome)
+    faltando = [nome for nome in colunas if nome not in por_nome]
+    if faltando:
+        raise KeyError(f"Colunas não encontradas na planilha: {faltando}")
+
+    return pd.DataFrame({nome: _coluna_compartilhada(pasta, por_nome[nome]) for nome in colunas}, copy=False)
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return info.st_size, info.st_mtime_ns
+
+
+# Mantém os objetos derivados da planilha (catálogos de cada página) e os
+# recarrega em segundo plano quando o arquivo muda. A troca de versão é feita
+# de uma vez para todas as páginas; quem já pegou a versão antiga continua
+# com ela até o próximo rerun.
+class MonitorPlanilha:
+
+    def __init__(self, caminho=CAMINHO_PLANILHA, intervalo=5.0):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self._construtores = {}
+        self._estado = {"assinatura": None, "versao": None, "objetos": {}}
+        self._trava = threading.Lock()
+        self._recarregando = threading.Lock()
+        self._ultima_falha = None
+        self._thread = None
+
+    @property
+    def versao(self):
+        return self._estado["versao"]
+
+    # Registra um construtor(caminho) -> objeto, usado a cada nova versão
+    def registrar(self, nome, construtor):
+        with self._trava:
+            self._construtores[nome] = construtor
+        if self._estado["versao"] is None:
+            self._recarregar(esperar=True)
+        self._iniciar()
+
+    def obter(self, nome):
+        objetos = self._estado["objetos"]
+        if nome in objetos:
+            return objetos[nome]
+
+        # Registrado depois da última carga: constrói sobre a versão atual
+        objeto = self._construtores[nome](self.caminho)
+        with self._trava:
+            self._estado = dict(self._estado, objetos={**self._estado["objetos"], nome: objeto})
+        return objeto
+
+    def _iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._observar, name="monitor-planilha", daemon=True)
+            self._thread.start()
+
+    def _observar(self):
+        while True:
+            time.sleep(self.intervalo)
+            self.verificar()
+
+    # Compara tamanho/mtime com a versão carregada; se mudou, recarrega
+    def verificar(self):
+        try:
+            assinatura = _assinatura(self.caminho)
+        except OSError:
+            return False
+        if assinatura in (self._estado["assinatura"], self._ultima_falha):
+            return False
+        return self._recarregar()
+
+    def _recarregar(self, esperar=False):
+        if not self._recarregando.acquire(blocking=esperar):
+            return False
+        if esperar and self._estado["versao"] is not None:
+            # Outra thread fez a primeira carga enquanto esperávamos
+            self._recarregando.release()
+            return False
+        try:
+            assinatura = _assinatura(self.caminho)
+            try:
+                versao = os.path.basename(garantir_snapshot(self.caminho))
+                with self._trava:
+                    construtores = dict(self._construtores)
+                objetos = {nome: construtor(self.caminho) for nome, construtor in construtores.items()}
+            except Exception:
+                # Planilha ainda sendo salva ou inválida: mantém a versão atual
+                if self._estado["versao"] is None:
+                    raise
+                logger.exception("Falha ao recarregar %s; mantendo a versão %s", self.caminho, self.versao)
+                self._ultima_falha = assinatura
+                return False
+            with self._trava:
+                self._estado = {"assinatura": assinatura, "versao": versao, "objetos": objetos}
+            self._ultima_falha = None
+            return True
+        finally:
+            self._recarregando.release()
+
+
+_monitores = {}
+_trava_monitores = threading.Lock()
+
+
+# Um monitor por planilha, compartilhado por todas as páginas do processo
+def monitor_planilha(caminho=CAMINHO_PLANILHA):
+    chave = os.path.abspath(caminho)
+    with _trava_monitores:
+        if chave not in _monitores:
+            _monitores[chave] = MonitorPlanilha(caminho)
+        return _monitores[chave]
@@ -0,0 +1,119 @@
+# Exportação das tabelas para Excel (.xlsx).
+#
+# As páginas não montam mais a planilha a cada execução: passam ao
+# st.download_button um callable (excel_sob_demanda) que só gera o arquivo
+# quando o botão é clicado, em outra thread. O resultado fica em cache pelo
+# hash do conteúdo das tabelas, então cliques repetidos (ou outra sessão com
+# os mesmos dados) não geram o arquivo de novo.
+#
+# A gravação é linha a linha em blocos, com o xlsxwriter em modo
+# constant_memory (ou o openpyxl em modo write_only, se o xlsxwriter não
+# estiver instalado): a memória não cresce com o tamanho da tabela.
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+LINHAS_POR_BLOCO = 10_000
+LIMITE_CACHE_BYTES = 64 * 2**20
+
+_cache = OrderedDict()
+_trava_cache = threading.Lock()
+
+
+# Hash do conteúdo (abas, colunas, tipos e valores) das tabelas
+def hash_planilhas(planilhas):
+    sha = hashlib.blake2b(digest_size=16)
+    for nome, tabela in planilhas.items():
+        sha.update(repr((nome, list(tabela.columns), [str(t) for t in tabela.dtypes], len(tabela))).encode())
+        sha.update(pd.util.hash_pandas_object(tabela, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+# Valores Python de um bloco de linhas (nulos viram célula vazia)
+def _linhas(tabela, inicio, fim):
+    colunas = []
+    for _, serie in tabela.iloc[inicio:fim].items():
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valores = [None if pd.isna(v) else v.to_pydatetime() for v in serie]
+        else:
+            valores = serie.astype(object).where(serie.notna(), None).tolist()
+        colunas.append(valores)
+    return zip(*colunas)
+
+
+def _gravar_xlsxwriter(destino, planilhas, xlsxwriter):
+    livro = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,
+        "remove_timezone": True,
+        "nan_inf_to_errors": True,
+        "default_date_format": "dd/mm/yyyy hh:mm",
+    })
+    negrito = livro.add_format({"bold": True})
+    for nome, tabela in planilhas.items():
+        aba = livro.add_worksheet(nome[:31])
+        aba.write_row(0, 0, [str(coluna) for coluna in tabela.columns], negrito)
+        linha = 1
+        for inicio in range(0, len(tabela), LINHAS_POR_BLOCO):
+            for valores in _linhas(tabela, inicio, inicio + LINHAS_POR_BLOCO):
+                aba.write_row(linha, 0, valores)
+                linha += 1
+    livro.close()
+
+
+def _gravar_openpyxl(destino, planilhas):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    livro = Workbook(write_only=True)
+    for nome, tabela in planilhas.items():
+        aba = livro.create_sheet(nome[:31])
+        cabecalho = []
+        for coluna in tabela.columns:
+            celula = WriteOnlyCell(aba, value=str(coluna))
+            celula.font = Font(bold=True)
+            cabecalho.append(celula)
+        aba.append(cabecalho)
+        for inicio in range(0, len(tabela), LINHAS_POR_BLOCO):
+            for valores in _linhas(tabela, inicio, inicio + LINHAS_POR_BLOCO):
+                aba.append([v.replace(tzinfo=None) if hasattr(v, "tzinfo") and v.tzinfo else v for v in valores])
+    livro.save(destino)
+
+
+# Grava {nome da aba: DataFrame} em um arquivo (caminho ou objeto binário)
+def gravar_excel(destino, planilhas):
+    try:
+        import xlsxwriter
+    except ImportError:
+        _gravar_openpyxl(destino, planilhas)
+    else:
+        _gravar_xlsxwriter(destino, planilhas, xlsxwriter)
+
+
+# Bytes do .xlsx, em cache (LRU limitado em bytes) pelo hash do conteúdo
+def excel_bytes(planilhas):
+    chave = hash_planilhas(planilhas)
+    with _trava_cache:
+        if chave in _cache:
+            _cache.move_to_end(chave)
+            return _cache[chave]
+
+    saida = io.BytesIO()
+    gravar_excel(saida, planilhas)
+    conteudo = saida.getvalue()
+
+    with _trava_cache:
+        if len(conteudo) <= LIMITE_CACHE_BYTES:
+            _cache[chave] = conteudo
+            while sum(len(c) for c in _cache.values()) > LIMITE_CACHE_BYTES:
+                _cache.popitem(last=False)
+    return conteudo
+
+
+# Callable sem argumentos para o "data" do st.download_button: o arquivo só é
+# gerado quando o usuário clica em baixar
+def excel_sob_demanda(planilhas):
+    return lambda: excel_bytes(planilhas)
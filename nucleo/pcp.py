@@ -0,0 +1,410 @@
+import numpy as np
+import pandas as pd
+
+from nucleo.simulador import COMBINACOES_TURNOS, TURNOS, horas_por_dia, mascara_turnos_lote
+
+COLUNAS_TURNO = [f"Turno {t}" for t in TURNOS]
+
+# Valores padrão de cada OPERAÇÃO na tabela de configuração
+PADRAO = {
+    "Turno A": True,
+    "Turno B": True,
+    "Turno C": True,
+    "Qntd Máquinas": 1,
+    "Almoço": "Sim",
+    "Pico": "Não",
+    "Eficiência %": 85,
+    "Fusos Parados": 0.0,
+}
+
+COLUNAS_RESULTADO = [
+    "OPERAÇÃO",
+    "Turnos",
+    "Almoço",
+    "Pico",
+    "Eficiência %",
+    "Fusos Parados",
+    "Qntd Máquinas",
+    "Absenteismo %",
+    "Novatos %",
+    "Horas líquidas/dia",
+    "Horas Disponíveis (Total)"
+]
+
+# "A, B, C" para cada combinação de turnos (índice = A*4 + B*2 + C)
+_NOMES_TURNOS = np.array([
+    ", ".join(t for t, ativo in zip(TURNOS, (codigo & 4, codigo & 2, codigo & 1)) if ativo)
+    for codigo in range(8)
+], dtype=object)
+
+
+# Colunas da planta usadas pelo PCP
+COLUNAS_PLANTA = ["N° OPERAÇÃO", "OPERAÇÃO", "N° FUSOS", "KG/MH", "PRODUTO", "FIAÇÃO", "LINHA DE PRODUÇÃO", "REVISÃO"]
+
+
+# Padroniza a planta lida com COLUNAS_PLANTA (sem linhas incompletas)
+def preparar_planta(df):
+    df = df.dropna().copy()
+    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+    df["N° OPERAÇÃO"] = df["N° OPERAÇÃO"].astype(int)
+    df["FIAÇÃO"] = df["FIAÇÃO"].astype(str).str.strip().str.upper()
+    df["LINHA DE PRODUÇÃO"] = df["LINHA DE PRODUÇÃO"].astype(str).str.strip().str.upper()
+    return df
+
+
+# N° FUSOS e KG/MH de cada OPERAÇÃO (primeira ocorrência na planta)
+def operacoes_planta(df):
+    return (
+        df.groupby("OPERAÇÃO")
+        .agg({
+            "N° FUSOS": "first",
+            "KG/MH": "first"
+        })
+        .reset_index()
+        .sort_values(by="OPERAÇÃO")
+    )
+
+
+# Tabela de configuração (uma linha por OPERAÇÃO) com os valores padrão
+def configuracao_padrao(operacoes):
+    config = operacoes[["OPERAÇÃO", "N° FUSOS"]].reset_index(drop=True).copy()
+    for coluna, valor in PADRAO.items():
+        config[coluna] = valor
+    return config
+
+
+# Horas líquidas por dia e horas disponíveis no período (arrays com broadcast;
+# "turnos" é uma máscara (..., 3) de A, B, C)
+def _horas(turnos, almoco, pico, total_fusos, fusos_parados, eficiencia, maquinas,
+           dias_uteis, absenteismo_geral, novatos_geral):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator_fusos = np.where(total_fusos != 0, (total_fusos - fusos_parados) / total_fusos, 1.0)
+    horas_liquidas = horas_por_dia(turnos, almoco, pico) * fator_fusos
+
+    fator_final = (1 - absenteismo_geral / 100) * (1 - novatos_geral / 200) * (eficiencia / 100)
+    horas_disp = dias_uteis * horas_liquidas * fator_final * maquinas
+    return horas_liquidas, horas_disp
+
+
+def _parametros(config):
+    total_fusos = config["N° FUSOS"].to_numpy(dtype=float)
+    return {
+        "turnos": config[COLUNAS_TURNO].fillna(False).to_numpy(dtype=bool),
+        "almoco": config["Almoço"].to_numpy() == "Sim",
+        "pico": config["Pico"].to_numpy() == "Sim",
+        "total_fusos": total_fusos,
+        "fusos_parados": np.clip(config["Fusos Parados"].fillna(0).to_numpy(dtype=float), 0, total_fusos),
+        "eficiencia": config["Eficiência %"].fillna(0).to_numpy(),
+        "maquinas": config["Qntd Máquinas"].fillna(1).to_numpy(),
+    }
+
+
+# Horas disponíveis de todas as operações de uma vez, com a mesma fórmula
+# (e ordem de operações) do cálculo linha a linha
+def horas_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral):
+    p = _parametros(config)
+    turnos, fusos_parados, eficiencia, maquinas = p["turnos"], p["fusos_parados"], p["eficiencia"], p["maquinas"]
+    horas_liquidas, horas_disp = _horas(**p, dias_uteis=dias_uteis, absenteismo_geral=absenteismo_geral, novatos_geral=novatos_geral)
+
+    codigos = turnos[:, 0] * 4 + turnos[:, 1] * 2 + turnos[:, 2]
+    resultado = pd.DataFrame({
+        "OPERAÇÃO": config["OPERAÇÃO"].to_numpy(),
+        "Turnos": _NOMES_TURNOS[codigos],
+        "Almoço": config["Almoço"].to_numpy(),
+        "Pico": config["Pico"].to_numpy(),
+        "Eficiência %": eficiencia,
+        "Fusos Parados": fusos_parados,
+        "Qntd Máquinas": maquinas,
+        "Absenteismo %": absenteismo_geral,
+        "Novatos %": novatos_geral,
+        "Horas líquidas/dia": np.round(horas_liquidas, 2),
+        "Horas Disponíveis (Total)": np.round(horas_disp, 2)
+    })
+    return resultado[COLUNAS_RESULTADO]
+
+
+# Horas disponíveis sem arredondar, por OPERAÇÃO: a base da viabilidade na
+# verificação de ocupação, a mesma que a otimização usa
+def horas_disponiveis_exatas(config, dias_uteis, absenteismo_geral, novatos_geral):
+    horas_disp = _horas(**_parametros(config), dias_uteis=dias_uteis, absenteismo_geral=absenteismo_geral,
+                        novatos_geral=novatos_geral)[1]
+    return pd.Series(horas_disp, index=config["OPERAÇÃO"].to_numpy())
+
+
+# ---------------- DEMANDA (HORAS NECESSÁRIAS) ----------------
+
+COLUNAS_DEMANDA = ["PRODUTO", "REVISÃO", "Meta (ton)"]
+
+# Nomes aceitos para a coluna de meta no arquivo de demanda
+_ALIASES_META = {"META", "META (TON)", "META_TON", "META TON", "META (T)", "TONELADAS", "TON"}
+
+
+# Converte números vindos como texto, aceitando o formato brasileiro ("1.234,5")
+def _numero(serie):
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie
+    texto = serie.astype(str).str.strip()
+    virgula = texto.str.contains(",", regex=False)
+    texto = texto.where(~virgula, texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(texto, errors="coerce")
+
+
+# Lê uma tabela CSV ou XLSX (caminho ou arquivo enviado pelo st.file_uploader)
+def _ler_tabela(arquivo, nome_arquivo=None):
+    nome_arquivo = (nome_arquivo or getattr(arquivo, "name", "") or str(arquivo)).lower()
+    if nome_arquivo.endswith((".xlsx", ".xls")):
+        return pd.read_excel(arquivo)
+    # Aceita "," ou ";" como separador (Excel em português exporta com ";")
+    return pd.read_csv(arquivo, sep=None, engine="python", encoding="utf-8-sig")
+
+
+# Lê um arquivo de demanda (CSV ou XLSX) com PRODUTO, REVISÃO e meta em toneladas
+def ler_demanda(arquivo, nome_arquivo=None):
+    return normalizar_demanda(_ler_tabela(arquivo, nome_arquivo))
+
+
+# Padroniza uma tabela de demanda (arquivo ou registros JSON)
+def normalizar_demanda(bruto):
+    colunas = {}
+    for coluna in bruto.columns:
+        chave = str(coluna).strip().upper()
+        if chave == "PRODUTO":
+            colunas[coluna] = "PRODUTO"
+        elif chave in ("REVISÃO", "REVISAO"):
+            colunas[coluna] = "REVISÃO"
+        elif chave in _ALIASES_META:
+            colunas[coluna] = "Meta (ton)"
+    demanda = bruto.rename(columns=colunas)
+
+    faltando = [c for c in COLUNAS_DEMANDA if c not in demanda.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes no arquivo de demanda: {', '.join(faltando)}")
+
+    demanda = demanda[COLUNAS_DEMANDA].dropna(subset=["PRODUTO"]).copy()
+    demanda["PRODUTO"] = demanda["PRODUTO"].astype(str).str.strip()
+    demanda["Meta (ton)"] = _numero(demanda["Meta (ton)"]).fillna(0.0).astype(float)
+    return demanda.reset_index(drop=True)
+
+
+# ---------------- CONFIGURAÇÃO EM ARQUIVO ----------------
+
+_VERDADEIROS = {"TRUE", "SIM", "S", "X", "1", "1.0", "VERDADEIRO"}
+
+# Tipo de cada coluna ajustável da configuração
+_TIPOS_CONFIG = {
+    "Turno A": bool,
+    "Turno B": bool,
+    "Turno C": bool,
+    "Qntd Máquinas": int,
+    "Almoço": object,
+    "Pico": object,
+    "Eficiência %": float,
+    "Fusos Parados": float,
+}
+
+
+# Lê a configuração de capacidade (CSV ou XLSX): uma linha por OPERAÇÃO e,
+# opcionalmente, FIAÇÃO (em branco vale para todas). Aceita as colunas da
+# tabela de configuração do PCP; os turnos podem vir em "Turno A/B/C" ou em
+# uma coluna "Turnos" ("A, B, C" ou "ABC"), como na exportação de horas
+# disponíveis. Colunas ausentes ficam com o valor padrão.
+def ler_configuracao(arquivo, nome_arquivo=None):
+    return normalizar_configuracao(_ler_tabela(arquivo, nome_arquivo))
+
+
+# Padroniza uma tabela de configuração (arquivo ou registros JSON)
+def normalizar_configuracao(bruto):
+    bruto = bruto.rename(columns={c: str(c).strip() for c in bruto.columns})
+    bruto = bruto.rename(columns={c: c.upper() for c in bruto.columns if c.upper() in ("OPERAÇÃO", "FIAÇÃO", "TURNOS")})
+    if "OPERAÇÃO" not in bruto.columns:
+        raise ValueError("Coluna obrigatória ausente no arquivo de configuração: OPERAÇÃO")
+
+    ajustes = pd.DataFrame({"OPERAÇÃO": bruto["OPERAÇÃO"].astype(str).str.strip().str.upper()})
+    fiacao = bruto["FIAÇÃO"] if "FIAÇÃO" in bruto.columns else pd.Series(None, index=bruto.index, dtype=object)
+    ajustes["FIAÇÃO"] = fiacao.where(fiacao.isna(), fiacao.astype(str).str.strip().str.upper())
+
+    if "TURNOS" in bruto.columns:
+        turnos = bruto["TURNOS"].fillna("").astype(str).str.upper()
+        for turno, coluna in zip(TURNOS, COLUNAS_TURNO):
+            ajustes[coluna] = turnos.str.contains(turno, regex=False)
+    for coluna in COLUNAS_TURNO:
+        if coluna in bruto.columns:
+            ajustes[coluna] = bruto[coluna].astype(str).str.strip().str.upper().isin(_VERDADEIROS)
+    for coluna in ("Almoço", "Pico"):
+        if coluna in bruto.columns:
+            ajustes[coluna] = np.where(bruto[coluna].astype(str).str.strip().str.upper().isin(_VERDADEIROS), "Sim", "Não")
+    for coluna in ("Qntd Máquinas", "Eficiência %", "Fusos Parados"):
+        if coluna in bruto.columns:
+            ajustes[coluna] = _numero(bruto[coluna])
+    return ajustes
+
+
+# Aplica os ajustes lidos por ler_configuracao sobre a configuração padrão de
+# uma FIAÇÃO; linhas específicas da FIAÇÃO têm precedência sobre as gerais
+def mesclar_configuracao(config, ajustes, fiacao=None):
+    config = config.astype(_TIPOS_CONFIG).set_index("OPERAÇÃO")
+    gerais = ajustes[ajustes["FIAÇÃO"].isna()]
+    especificos = ajustes[ajustes["FIAÇÃO"] == fiacao] if fiacao is not None else ajustes.iloc[0:0]
+    for parte in (gerais, especificos):
+        valores = parte.drop(columns="FIAÇÃO").drop_duplicates("OPERAÇÃO", keep="last").set_index("OPERAÇÃO")
+        valores = valores[valores.index.isin(config.index)]
+        for coluna in valores.columns:
+            preenchidos = valores[coluna].dropna()
+            if _TIPOS_CONFIG[coluna] is int:
+                preenchidos = preenchidos.round()
+            config.loc[preenchidos.index, coluna] = preenchidos.astype(_TIPOS_CONFIG[coluna])
+    return config.reset_index()
+
+
+# Horas de cada etapa (meta em toneladas), arredondadas como na exportação
+def horas_etapas(meta, kg_mh):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.round(np.where(kg_mh > 0, (meta * 1000) / kg_mh, 0.0), 2)
+
+
+# Demanda com a REVISÃO no mesmo tipo da planta (número ou texto)
+def padronizar_demanda(planta, demanda):
+    demanda = demanda[COLUNAS_DEMANDA].reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(planta["REVISÃO"]):
+        return demanda.assign(REVISÃO=_numero(demanda["REVISÃO"]))
+    return demanda.assign(REVISÃO=demanda["REVISÃO"].astype(str).str.strip())
+
+
+# Horas necessárias por produto e operação: um merge da demanda com a planta
+# (PRODUTO, REVISÃO, OPERAÇÃO, KG/MH) no lugar do laço produto a produto.
+# Retorna também as linhas da demanda sem correspondência na planta.
+def horas_necessarias(planta, demanda):
+    demanda = padronizar_demanda(planta, demanda)
+    planta = planta[["PRODUTO", "REVISÃO", "OPERAÇÃO", "KG/MH"]]
+
+    combinado = demanda.merge(planta, on=["PRODUTO", "REVISÃO"], how="left", indicator=True)
+    sem_planta = combinado.loc[combinado["_merge"] == "left_only", COLUNAS_DEMANDA].drop_duplicates()
+    combinado = combinado[combinado["_merge"] == "both"]
+
+    kg_mh = combinado["KG/MH"].to_numpy(dtype=float)
+    meta = combinado["Meta (ton)"].to_numpy(dtype=float)
+
+    df_produtos = pd.DataFrame({
+        "Produto": combinado["PRODUTO"].to_numpy(),
+        "OPERAÇÃO": combinado["OPERAÇÃO"].to_numpy(),
+        "KG/MH": kg_mh,
+        "Meta (ton)": meta,
+        "Horas Necessárias": horas_etapas(meta, kg_mh)
+    })
+    return df_produtos, sem_planta.reset_index(drop=True)
+
+
+# Soma das horas necessárias por OPERAÇÃO
+def horas_necessarias_por_operacao(df_produtos):
+    return (
+        df_produtos.groupby("OPERAÇÃO")["Horas Necessárias"].sum().reset_index()
+        .rename(columns={"Horas Necessárias": "Horas Necessárias (Total)"})
+    )
+
+
+# Colunas da verificação final (ocupação por operação)
+COLUNAS_CHECAGEM = [
+    "OPERAÇÃO",
+    "Turnos",
+    "Almoço",
+    "Pico",
+    "Eficiência %",
+    "Fusos Parados",
+    "Qntd Máquinas",
+    "Absenteismo %",
+    "Novatos %",
+    "Horas Disponíveis (Total)",
+    "Horas Necessárias (Total)",
+    "Diferença (Disp - Nec)",
+    "Ocupação (%)",
+    "Status"
+]
+
+
+# Horas necessárias x disponíveis por operação, com ocupação e status. Com
+# "exatas" (horas_disponiveis_exatas), diferença, status e ocupação saem das
+# horas sem arredondar, como na otimização; sem, das horas da tabela.
+def verificar_ocupacao(necessarias, resultado, exatas=None):
+    checagem = pd.merge(necessarias, resultado, on="OPERAÇÃO", how="left")
+    disponiveis = checagem["Horas Disponíveis (Total)"]
+    if exatas is not None:
+        disponiveis = checagem["OPERAÇÃO"].map(exatas[~exatas.index.duplicated()])
+    diferenca = disponiveis - checagem["Horas Necessárias (Total)"]
+    checagem["Diferença (Disp - Nec)"] = diferenca if exatas is None else diferenca.round(2)
+    checagem["Status"] = np.where(diferenca >= 0, "✅ Viável", "❌ Inválido")
+    checagem["Ocupação (%)"] = ((checagem["Horas Necessárias (Total)"] / disponiveis) * 100).round(2)
+    return checagem[COLUNAS_CHECAGEM].sort_values(by="OPERAÇÃO")
+
+
+# ---------------- OTIMIZAÇÃO DE CAPACIDADE ----------------
+
+# Menor configuração (máquinas x turnos) que torna viável cada operação com
+# demanda, mantendo almoço, pico, eficiência e fusos parados da configuração.
+# As operações não disputam recursos entre si, então o problema se separa por
+# operação: para cada combinação de turnos o mínimo de máquinas é um teto de
+# divisão, e a melhor combinação sai de uma busca exata vetorizada
+# (operações x combinações). Critério: menos máquinas x turnos, depois menos
+# máquinas, depois menos turnos.
+def otimizar_capacidade(config, necessarias, dias_uteis, absenteismo_geral, novatos_geral,
+                        combinacoes=COMBINACOES_TURNOS, maquinas_max=None):
+    config = config.reset_index(drop=True)
+    p = _parametros(config)
+    horas_nec = config["OPERAÇÃO"].map(
+        necessarias.set_index("OPERAÇÃO")["Horas Necessárias (Total)"]
+    ).to_numpy(dtype=float)
+    com_demanda = ~np.isnan(horas_nec)
+    horas_nec = np.nan_to_num(horas_nec)
+
+    mascaras = mascara_turnos_lote(combinacoes)
+    qtd_turnos = mascaras.sum(axis=1)
+    linha = {chave: p[chave][:, None] for chave in ("almoco", "pico", "total_fusos", "fusos_parados", "eficiencia")}
+
+    def disponiveis(turnos, maquinas, **parametros):
+        return _horas(turnos, maquinas=maquinas, dias_uteis=dias_uteis, absenteismo_geral=absenteismo_geral,
+                      novatos_geral=novatos_geral, **parametros)[1]
+
+    # Horas de uma máquina para cada operação (linhas) e combinação (colunas)
+    por_maquina = disponiveis(mascaras[None, :, :], 1, **linha)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        maquinas = np.ceil(horas_nec[:, None] / por_maquina)
+    maquinas = np.where(horas_nec[:, None] <= 0, 1, maquinas)
+    maquinas = np.where(np.isfinite(maquinas) & (maquinas >= 1), maquinas, np.where(por_maquina > 0, 1, np.inf))
+    # Arredondamento de ponto flutuante: garante horas disponíveis >= necessárias
+    maquinas = np.where(disponiveis(mascaras[None, :, :], maquinas, **linha) < horas_nec[:, None], maquinas + 1, maquinas)
+    if maquinas_max is not None:
+        maquinas = np.where(maquinas > maquinas_max, np.inf, maquinas)
+
+    custo = maquinas * qtd_turnos
+    ordem = np.lexsort((np.broadcast_to(qtd_turnos, custo.shape), maquinas, custo), axis=1)
+    melhor = ordem[:, 0]
+    linhas = np.arange(len(config))
+    viavel = np.isfinite(custo[linhas, melhor])
+    aplicar = com_demanda & viavel
+
+    otimizada = config.copy()
+    novos_turnos = mascaras[melhor]
+    for i, coluna in enumerate(COLUNAS_TURNO):
+        otimizada[coluna] = np.where(aplicar, novos_turnos[:, i], p["turnos"][:, i])
+    otimizada["Qntd Máquinas"] = np.where(aplicar, maquinas[linhas, melhor], p["maquinas"]).astype(int)
+
+    horas_disp = disponiveis(
+        _parametros(otimizada)["turnos"], otimizada["Qntd Máquinas"].to_numpy(),
+        **{chave: p[chave] for chave in linha}
+    )
+    atual = horas_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral)
+    sugerido = horas_disponiveis(otimizada, dias_uteis, absenteismo_geral, novatos_geral)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ocupacao = np.round(horas_nec / horas_disp * 100, 2)
+
+    resumo = pd.DataFrame({
+        "OPERAÇÃO": config["OPERAÇÃO"].to_numpy(),
+        "Turnos (atual)": atual["Turnos"].to_numpy(),
+        "Máquinas (atual)": p["maquinas"],
+        "Turnos (sugerido)": sugerido["Turnos"].to_numpy(),
+        "Máquinas (sugerido)": otimizada["Qntd Máquinas"].to_numpy(),
+        "Horas Necessárias (Total)": horas_nec,
+        "Horas Disponíveis (sugerido)": np.round(horas_disp, 2),
+        "Ocupação (%)": ocupacao,
+        "Status": np.where(viavel, "✅ Viável", "❌ Sem solução")
+    })[com_demanda]
+    return otimizada, resumo.sort_values(by="OPERAÇÃO").reset_index(drop=True)
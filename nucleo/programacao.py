@@ -0,0 +1,138 @@
+import heapq
+
+import numpy as np
+
+from nucleo.pcp import _horas, _parametros
+
+COLUNAS_PROGRAMA = [
+    "Pedido", "PRODUTO", "REVISÃO", "Sequência", "N° OPERAÇÃO", "OPERAÇÃO",
+    "Máquina", "Duração (h)", "Início (h)", "Fim (h)"
+]
+
+
+# Conjunto de linhas de um valor de "LINHA DE PRODUÇÃO" ("Zinser FM1 & Zinser FM2")
+def linhas_producao(valor):
+    if not isinstance(valor, str):
+        return set()
+    return {parte.strip().upper() for parte in valor.split("&") if parte.strip()}
+
+
+# Operações de cada pedido, na ordem do roteiro (N° OPERAÇÃO).
+# A planta lista as linhas alternativas (ex.: Zinser FM1 / FM2) do mesmo
+# produto; o roteiro do pedido usa as operações da "LINHA DE PRODUÇÃO" do
+# pedido (ou, sem ela, a primeira linha do produto) e as operações comuns.
+def montar_tarefas(planta, pedidos):
+    pedidos = pedidos.reset_index(drop=True).copy()
+    if "Pedido" not in pedidos.columns:
+        pedidos["Pedido"] = np.arange(1, len(pedidos) + 1)
+    if "LINHA DE PRODUÇÃO" not in pedidos.columns:
+        pedidos["LINHA DE PRODUÇÃO"] = None
+
+    colunas = ["PRODUTO", "REVISÃO", "N° OPERAÇÃO", "OPERAÇÃO", "KG/MH", "LINHA DE PRODUÇÃO"]
+    planta = planta[colunas].sort_values(["PRODUTO", "REVISÃO", "N° OPERAÇÃO"], kind="stable")
+    padrao = (
+        planta.dropna(subset=["LINHA DE PRODUÇÃO"])
+        .groupby(["PRODUTO", "REVISÃO"])["LINHA DE PRODUÇÃO"].first()
+        .map(lambda valor: min(linhas_producao(valor), default=None))
+        .rename("_linha_padrao")
+        .reset_index()
+    )
+
+    tarefas = pedidos.rename(columns={"LINHA DE PRODUÇÃO": "_linha_pedido"}).merge(
+        planta, on=["PRODUTO", "REVISÃO"], how="inner"
+    ).merge(padrao, on=["PRODUTO", "REVISÃO"], how="left")
+
+    linha_pedido = tarefas["_linha_pedido"].where(tarefas["_linha_pedido"].notna(), tarefas["_linha_padrao"])
+    no_roteiro = [
+        not linhas_op or linha is None or str(linha).strip().upper() in linhas_op
+        for linha, linhas_op in zip(linha_pedido, map(linhas_producao, tarefas["LINHA DE PRODUÇÃO"]))
+    ]
+    tarefas = tarefas[np.asarray(no_roteiro, dtype=bool)].copy()
+
+    kg_mh = tarefas["KG/MH"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tarefas["Duração (h)"] = np.where(kg_mh > 0, tarefas["Meta (ton)"].to_numpy(dtype=float) * 1000 / kg_mh, 0.0)
+    tarefas = tarefas.sort_values(["Pedido", "N° OPERAÇÃO"], kind="stable")
+    tarefas["Sequência"] = tarefas.groupby("Pedido").cumcount() + 1
+    return tarefas.drop(columns=["_linha_pedido", "_linha_padrao"]).reset_index(drop=True)
+
+
+# Fator horas de máquina -> horas de calendário de cada operação da
+# configuração do PCP: 24 / horas produtivas por máquina por dia (turnos,
+# almoço, pico, fusos parados, eficiência, absenteísmo e novatos).
+# Operações sem horas produtivas ficam com fator infinito.
+def fator_calendario(config, absenteismo_geral, novatos_geral):
+    p = _parametros(config)
+    p["maquinas"] = 1
+    _, horas_dia = _horas(**p, dias_uteis=1, absenteismo_geral=absenteismo_geral, novatos_geral=novatos_geral)
+    with np.errstate(divide="ignore"):
+        fator = np.where(horas_dia > 0, 24 / np.where(horas_dia > 0, horas_dia, 1), np.inf)
+    return dict(zip(config["OPERAÇÃO"], fator))
+
+
+# Programação com capacidade finita. Cada OPERAÇÃO é um recurso com
+# "maquinas[operacao]" máquinas idênticas (padrão 1) e cada pedido percorre
+# suas operações na ordem da "Sequência". Uma fila de eventos (heap) libera a
+# próxima operação de um pedido quando a anterior termina; a operação vai
+# para a máquina do recurso que fica livre primeiro. Empates são decididos
+# pela prioridade do pedido (menor primeiro) e depois pela ordem dos pedidos.
+# "liberacao" e "prioridade" são dicionários pedido -> valor.
+#
+# "fator_tempo" converte horas de máquina em horas de calendário por
+# operação (ex.: 24 / horas produtivas por dia); padrão 1.
+def programar(tarefas, maquinas=None, fator_tempo=None, liberacao=None, prioridade=None):
+    maquinas = maquinas or {}
+    fator_tempo = fator_tempo or {}
+    liberacao = liberacao or {}
+    prioridade = prioridade or {}
+
+    tarefas = tarefas.sort_values(["Pedido", "Sequência"], kind="stable").reset_index(drop=True)
+    operacoes = tarefas["OPERAÇÃO"].to_numpy()
+    pedidos = tarefas["Pedido"].to_numpy()
+    duracao = tarefas["Duração (h)"].to_numpy(dtype=float) * np.array(
+        [fator_tempo.get(op, 1.0) for op in operacoes], dtype=float
+    )
+
+    # Posição da primeira operação de cada pedido e quantas ele tem
+    inicio_pedido = np.flatnonzero(np.r_[True, pedidos[1:] != pedidos[:-1]]) if len(pedidos) else np.empty(0, int)
+    fim_pedido = np.r_[inicio_pedido[1:], len(pedidos)]
+
+    livres = {}
+    eventos = []
+    for ordem, (primeira, ultima) in enumerate(zip(inicio_pedido, fim_pedido)):
+        pedido = pedidos[primeira]
+        heapq.heappush(eventos, (float(liberacao.get(pedido, 0.0)), prioridade.get(pedido, 0), ordem, primeira, ultima))
+
+    maquina = np.zeros(len(tarefas), dtype=np.int64)
+    inicio = np.zeros(len(tarefas))
+    fim = np.zeros(len(tarefas))
+    while eventos:
+        pronto, prio, ordem, atual, ultima = heapq.heappop(eventos)
+        recurso = operacoes[atual]
+        if recurso not in livres:
+            livres[recurso] = [(0.0, m) for m in range(1, int(maquinas.get(recurso, 1)) + 1)]
+        livre_em, numero = heapq.heappop(livres[recurso])
+
+        inicio[atual] = max(pronto, livre_em)
+        fim[atual] = inicio[atual] + duracao[atual]
+        maquina[atual] = numero
+        heapq.heappush(livres[recurso], (fim[atual], numero))
+        if atual + 1 < ultima:
+            heapq.heappush(eventos, (fim[atual], prio, ordem, atual + 1, ultima))
+
+    programa = tarefas.assign(**{
+        "Duração (h)": np.round(duracao, 2),
+        "Máquina": maquina,
+        "Início (h)": np.round(inicio, 2),
+        "Fim (h)": np.round(fim, 2)
+    })
+    return programa[[c for c in COLUNAS_PROGRAMA if c in programa.columns]]
+
+
+# Conclusão de cada pedido (fim da última operação)
+def conclusao_pedidos(programa):
+    return (
+        programa.groupby(["Pedido", "PRODUTO", "REVISÃO"], sort=False)
+        .agg(**{"Início (h)": ("Início (h)", "min"), "Conclusão (h)": ("Fim (h)", "max")})
+        .reset_index()
+    )
@@ -0,0 +1,206 @@
+# Recálculo incremental das etapas do PCP entre execuções da página.
+#
+# Etapas e dependências:
+#   demanda ──> horas necessárias (por etapa) ──> soma por OPERAÇÃO ──┐
+#   configuração + parâmetros gerais ──> horas disponíveis ──────────┴─> ocupação
+#
+# - Horas necessárias: a planta da FIAÇÃO é ordenada uma vez por (PRODUTO,
+#   REVISÃO) e cada linha da demanda aponta para o seu trecho (sem merge). A
+#   cada chamada, a demanda nova é comparada linha a linha com a anterior:
+#     - meta alterada: só as etapas daquela linha são recalculadas e a
+#       diferença é somada nos totais por OPERAÇÃO;
+#     - produto/revisão alterado, linha nova ou removida: as etapas antigas da
+#       linha saem dos totais e as novas entram;
+#     - linhas iguais não são tocadas.
+#   Os totais por OPERAÇÃO ficam em centésimos de hora (inteiros), então as
+#   atualizações por diferença não acumulam erro de arredondamento.
+# - Horas disponíveis e ocupação: guardadas com a chave das suas entradas
+#   (hash da configuração e parâmetros; versão das horas necessárias) e só
+#   recalculadas quando ela muda.
+# Os resultados são os mesmos de horas_necessarias, horas_necessarias_por_operacao,
+# horas_disponiveis e verificar_ocupacao (nucleo.pcp).
+import numpy as np
+import pandas as pd
+
+from nucleo.pcp import (
+    COLUNAS_DEMANDA, horas_disponiveis, horas_disponiveis_exatas, horas_etapas, padronizar_demanda, verificar_ocupacao
+)
+
+COLUNAS_PRODUTOS = ["Produto", "OPERAÇÃO", "KG/MH", "Meta (ton)", "Horas Necessárias"]
+
+
+# Índices das etapas da planta de cada linha (trechos [início, fim)) e a
+# linha de cada etapa, na ordem das linhas
+def _etapas_das_linhas(linhas, inicio, fim):
+    tamanhos = fim - inicio
+    fins = np.cumsum(tamanhos)
+    total = int(fins[-1]) if len(fins) else 0
+    posicoes = np.arange(total) - np.repeat(fins - tamanhos, tamanhos) + np.repeat(inicio, tamanhos)
+    return posicoes, np.repeat(linhas, tamanhos)
+
+
+class HorasNecessariasIncrementais:
+
+    def __init__(self, planta):
+        planta = planta[["PRODUTO", "REVISÃO", "OPERAÇÃO", "KG/MH"]]
+        self.planta = planta
+        ordenada = planta.sort_values(["PRODUTO", "REVISÃO"], kind="stable")
+        produtos, revisoes = ordenada["PRODUTO"].to_numpy(), ordenada["REVISÃO"].to_numpy()
+        novo = np.r_[True, (produtos[1:] != produtos[:-1]) | (revisoes[1:] != revisoes[:-1])] if len(ordenada) else np.zeros(0, dtype=bool)
+        inicios = np.flatnonzero(novo)
+        self._chaves = pd.MultiIndex.from_arrays([produtos[inicios], revisoes[inicios]])
+        self._inicio_chave = inicios
+        self._fim_chave = np.r_[inicios[1:], len(ordenada)].astype(np.int64)
+
+        self.operacoes = pd.Index(np.unique(ordenada["OPERAÇÃO"].to_numpy()), name="OPERAÇÃO")
+        self._nomes_operacoes = self.operacoes.to_numpy(dtype=object)
+        self._codigo_planta = self.operacoes.get_indexer(ordenada["OPERAÇÃO"])
+        self._kg_planta = ordenada["KG/MH"].to_numpy(dtype=float)
+
+        # Estado: a última demanda e as suas etapas
+        self.demanda = pd.DataFrame(columns=COLUNAS_DEMANDA)
+        self._chave_linha = np.zeros(0, dtype=np.int64)    # chave da planta de cada linha (-1: fora da planta)
+        self._meta_linha = np.zeros(0)
+        self._linha = np.zeros(0, dtype=np.int64)          # por etapa
+        self._etapa = np.zeros(0, dtype=np.int64)          # posição na planta ordenada
+        self._horas = np.zeros(0)
+        self._centesimos = np.zeros(len(self.operacoes), dtype=np.int64)
+        self._etapas_operacao = np.zeros(len(self.operacoes), dtype=np.int64)
+        self.versao = 0
+        self._produtos = None
+        self._textos = None
+
+    def _somar(self, codigos, horas, sinal):
+        centesimos = np.rint(np.nan_to_num(horas) * 100)
+        n = len(self.operacoes)
+        self._centesimos += sinal * np.rint(np.bincount(codigos, weights=centesimos, minlength=n)).astype(np.int64)
+        self._etapas_operacao += sinal * np.bincount(codigos, minlength=n)
+
+    # Atualiza com a demanda (PRODUTO, REVISÃO, Meta (ton)) e retorna a
+    # versão, que muda sempre que algum resultado muda
+    def atualizar(self, demanda):
+        demanda = padronizar_demanda(self.planta, demanda)
+        n, anterior = len(demanda), len(self._chave_linha)
+        chave = self._chaves.get_indexer(pd.MultiIndex.from_frame(demanda[["PRODUTO", "REVISÃO"]])) if n else np.zeros(0, dtype=np.int64)
+        meta = demanda["Meta (ton)"].to_numpy(dtype=float)
+
+        comum = min(n, anterior)
+        mesma_chave = chave[:comum] == self._chave_linha[:comum]
+        mesma_meta = (meta[:comum] == self._meta_linha[:comum]) | (np.isnan(meta[:comum]) & np.isnan(self._meta_linha[:comum]))
+        linhas_meta = np.flatnonzero(mesma_chave & ~mesma_meta)
+        estrutura = np.r_[np.flatnonzero(~mesma_chave), np.arange(comum, max(n, anterior))]
+        # Produto/revisão iguais: o texto exibido pode mudar mesmo sem mudar os cálculos
+        if not len(linhas_meta) and not len(estrutura) and demanda.equals(self.demanda):
+            return self.versao
+
+        # Meta alterada: recalcula só as etapas dessas linhas e soma a diferença
+        if len(linhas_meta):
+            afetadas = np.isin(self._linha, linhas_meta)
+            codigos = self._codigo_planta[self._etapa[afetadas]]
+            novas = horas_etapas(meta[self._linha[afetadas]], self._kg_planta[self._etapa[afetadas]])
+            self._somar(codigos, self._horas[afetadas], -1)
+            self._somar(codigos, novas, 1)
+            self._horas[afetadas] = novas
+
+        # Produto/revisão alterado, linhas novas ou removidas: troca as etapas dessas linhas
+        if len(estrutura):
+            saem = np.isin(self._linha, estrutura)
+            self._somar(self._codigo_planta[self._etapa[saem]], self._horas[saem], -1)
+            entram = estrutura[estrutura < n]
+            entram = entram[chave[entram] >= 0]
+            etapas, linhas = _etapas_das_linhas(entram, self._inicio_chave[chave[entram]], self._fim_chave[chave[entram]])
+            horas = horas_etapas(meta[linhas], self._kg_planta[etapas])
+            self._somar(self._codigo_planta[etapas], horas, 1)
+
+            linha = np.r_[self._linha[~saem], linhas]
+            ordem = np.argsort(linha, kind="stable")
+            self._linha = linha[ordem]
+            self._etapa = np.r_[self._etapa[~saem], etapas][ordem]
+            self._horas = np.r_[self._horas[~saem], horas][ordem]
+            self._textos = None
+
+        self.demanda, self._chave_linha, self._meta_linha = demanda, chave, meta
+        self.versao += 1
+        self._produtos = None
+        return self.versao
+
+    # Mesmo resultado de pcp.horas_necessarias para a demanda atual. As colunas
+    # de texto (com o tipo que o pandas infere, como lá) só são remontadas
+    # quando as etapas mudam, não numa troca de meta.
+    def produtos(self):
+        if self._textos is None:
+            self._textos = (
+                pd.Series(self.demanda["PRODUTO"].to_numpy()[self._linha]),
+                pd.Series(self._nomes_operacoes[self._codigo_planta[self._etapa]]),
+            )
+        if self._produtos is None:
+            self._produtos = pd.DataFrame({
+                "Produto": self._textos[0],
+                "OPERAÇÃO": self._textos[1],
+                "KG/MH": self._kg_planta[self._etapa],
+                "Meta (ton)": self._meta_linha[self._linha],
+                "Horas Necessárias": self._horas,
+            }, columns=COLUNAS_PRODUTOS)
+        return self._produtos
+
+    def sem_planta(self):
+        return self.demanda.loc[self._chave_linha < 0, COLUNAS_DEMANDA].drop_duplicates().reset_index(drop=True)
+
+    # Mesmo resultado de pcp.horas_necessarias_por_operacao
+    def por_operacao(self):
+        presentes = self._etapas_operacao > 0
+        return pd.DataFrame({
+            "OPERAÇÃO": self.operacoes.to_numpy()[presentes],
+            "Horas Necessárias (Total)": self._centesimos[presentes] / 100,
+        })
+
+
+# Etapas do PCP de uma FIAÇÃO com os resultados guardados entre execuções
+class RecalculoPCP:
+
+    def __init__(self, planta):
+        self.necessarias = HorasNecessariasIncrementais(planta)
+        self._guardados = {}
+
+    def _etapa(self, nome, chave, calcular):
+        guardado = self._guardados.get(nome)
+        if guardado is None or guardado[0] != chave:
+            guardado = self._guardados[nome] = (chave, calcular())
+        return guardado[1]
+
+    # Horas necessárias por etapa e linhas sem planta (como pcp.horas_necessarias)
+    def horas_necessarias(self, demanda):
+        self.necessarias.atualizar(demanda)
+        return self.necessarias.produtos(), self.necessarias.sem_planta()
+
+    def horas_necessarias_por_operacao(self):
+        return self._etapa("necessárias por operação", self.necessarias.versao, self.necessarias.por_operacao)
+
+    @staticmethod
+    def _chave_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral):
+        return (
+            tuple(config.columns), pd.util.hash_pandas_object(config, index=False).to_numpy().tobytes(),
+            dias_uteis, absenteismo_geral, novatos_geral
+        )
+
+    # Tabela de horas disponíveis e as horas sem arredondar (base do status)
+    def _disponiveis(self, config, dias_uteis, absenteismo_geral, novatos_geral):
+        return self._etapa(
+            "horas disponíveis", self._chave_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral),
+            lambda: (
+                horas_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral).sort_values(by="OPERAÇÃO"),
+                horas_disponiveis_exatas(config, dias_uteis, absenteismo_geral, novatos_geral)
+            )
+        )
+
+    def horas_disponiveis(self, config, dias_uteis, absenteismo_geral, novatos_geral):
+        return self._disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral)[0]
+
+    # Ocupação das últimas horas necessárias (por operação) x horas disponíveis
+    # da configuração (as duas etapas vêm do que já estiver guardado)
+    def verificar_ocupacao(self, config, dias_uteis, absenteismo_geral, novatos_geral):
+        disponiveis, exatas = self._disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral)
+        chave = (self.necessarias.versao, self._chave_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral))
+        return self._etapa(
+            "ocupação", chave, lambda: verificar_ocupacao(self.horas_necessarias_por_operacao(), disponiveis, exatas)
+        )
@@ -0,0 +1,129 @@
+# Rendimento acumulado ao longo do roteiro de cada (PRODUTO, REVISÃO, LINHA).
+#
+# A rota de uma linha são as operações do produto que passam por ela (mais as
+# operações sem linha), em ordem de N° OPERAÇÃO. Em cada operação:
+#   Rendimento Acumulado (%)  = produto dos % REND da primeira operação até ela
+#   Kg Entrada / Kg Final     = kg que precisam entrar na operação para sair
+#                               1 kg de produto acabado no fim da rota
+#                               (1 / produto dos % REND dela até o fim)
+# O "Kg Entrada / Kg Final" da primeira operação é a matéria-prima por kg de
+# produto. A tabela inteira é montada uma vez por versão da planilha, com
+# produtos acumulados por grupo (sem laço por produto). % REND vazio ou zero
+# conta como 100% (coluna "REND Informado" = False).
+import numpy as np
+import pandas as pd
+
+from nucleo.dados import carregar_colunas
+from nucleo.programacao import linhas_producao
+
+COLUNAS_RENDIMENTO = ["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "N° OPERAÇÃO", "OPERAÇÃO", "% REND"]
+CHAVE_ROTA = ["PRODUTO", "REVISÃO", "LINHA"]
+SEM_LINHA = "(SEM LINHA)"
+
+
+# Uma linha por (operação, linha da rota): operações com várias linhas
+# ("A & B") entram em todas, e as sem linha entram em todas as linhas do
+# produto. Ordenada por rota (CHAVE_ROTA) e N° OPERAÇÃO.
+def separar_linhas(df):
+    linhas = {valor: sorted(linhas_producao(valor)) or np.nan for valor in df["LINHA DE PRODUÇÃO"].unique()}
+    df = df.assign(LINHA=df["LINHA DE PRODUÇÃO"].map(linhas)).explode("LINHA")
+
+    com_linha = df[df["LINHA"].notna()]
+    sem_linha = df[df["LINHA"].isna()].drop(columns="LINHA")
+    linhas_produto = com_linha[["PRODUTO", "REVISÃO", "LINHA"]].drop_duplicates()
+    sem_linha = sem_linha.merge(linhas_produto, on=["PRODUTO", "REVISÃO"], how="left")
+    sem_linha["LINHA"] = sem_linha["LINHA"].fillna(SEM_LINHA)
+
+    rotas = pd.concat([com_linha, sem_linha], ignore_index=True)
+    return rotas.sort_values([*CHAVE_ROTA, "N° OPERAÇÃO"], kind="stable", ignore_index=True)
+
+
+# Rotas de rendimento da planilha, uma linha por (operação, linha da rota)
+def expandir_rotas(df):
+    df = df[COLUNAS_RENDIMENTO].copy()
+    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+    df["N° OPERAÇÃO"] = pd.to_numeric(df["N° OPERAÇÃO"], errors="coerce")
+    df["% REND"] = pd.to_numeric(df["% REND"], errors="coerce")
+    df = df.dropna(subset=["PRODUTO", "REVISÃO"])
+    return separar_linhas(df).drop(columns="LINHA DE PRODUÇÃO")
+
+
+# Rendimento acumulado e kg de entrada por kg final de todas as rotas de uma
+# vez. "rotas" precisa estar ordenada por rota e N° OPERAÇÃO.
+def acumular(rotas, rendimento="% REND"):
+    rend = rotas[rendimento].to_numpy(dtype=float)
+    informado = np.isfinite(rend) & (rend > 0)
+    fator = np.where(informado, rend / 100, 1.0)
+
+    codigos = rotas.groupby(CHAVE_ROTA, sort=False, observed=True).ngroup().to_numpy()
+    por_rota = pd.Series(fator).groupby(codigos)
+    acumulado = por_rota.cumprod().to_numpy()
+    # Produto do fim da rota até a operação: cumprod na ordem inversa
+    restante = pd.Series(fator[::-1]).groupby(codigos[::-1]).cumprod().to_numpy()[::-1]
+
+    resultado = rotas.copy()
+    resultado["REND Informado"] = informado
+    resultado["Rendimento Acumulado (%)"] = (acumulado * 100).round(4)
+    resultado["Kg Entrada / Kg Final"] = (1 / restante).round(6)
+    return resultado
+
+
+# Uma linha por rota: operações, rendimento total e matéria-prima por kg final
+def resumo_rotas(tabela):
+    rotas = tabela.assign(**{"Operações sem REND": ~tabela["REND Informado"]}).groupby(CHAVE_ROTA, sort=False, observed=True)
+    return pd.DataFrame({
+        "Operações": rotas.size(),
+        "Rendimento Total (%)": rotas["Rendimento Acumulado (%)"].last(),
+        "Kg Matéria-Prima / Kg Final": rotas["Kg Entrada / Kg Final"].first(),
+        "Operações sem REND": rotas["Operações sem REND"].sum(),
+    }).reset_index()
+
+
+# Tabela materializada de rendimento acumulado (construída pelo monitor_planilha
+# a cada versão) com consulta instantânea de uma rota
+class TabelaRendimento:
+
+    def __init__(self, df):
+        self.tabela = acumular(expandir_rotas(df))
+        self.resumo = resumo_rotas(self.tabela)
+        # Cada rota ocupa um trecho contínuo da tabela ordenada, na mesma ordem do resumo
+        fins = self.resumo["Operações"].cumsum().to_numpy()
+        chaves = zip(*(self.resumo[c].tolist() for c in CHAVE_ROTA))
+        self._trechos = {chave: (fim - n, fim) for chave, fim, n in zip(chaves, fins, self.resumo["Operações"].to_numpy())}
+        self._linhas = {}
+        for produto, revisao, linha in self._trechos:
+            self._linhas.setdefault((produto, revisao), []).append(linha)
+
+    def linhas(self, produto, revisao):
+        return sorted(self._linhas.get((produto, revisao), []))
+
+    def rota(self, produto, revisao, linha):
+        inicio, fim = self._trechos.get((produto, revisao, linha), (0, 0))
+        return self.tabela.iloc[inicio:fim]
+
+    # What-if: novos % REND por OPERAÇÃO ({operação: % REND}) aplicados em todas
+    # as rotas. Retorna o resumo de cada rota afetada antes e depois.
+    def simular(self, novos_rendimentos):
+        novos = pd.Series(novos_rendimentos, dtype=float)
+        novos.index = novos.index.astype(str).str.strip().str.upper()
+        afetadas = self.tabela["OPERAÇÃO"].isin(novos.index)
+        if not afetadas.any():
+            return pd.DataFrame(columns=[*CHAVE_ROTA, "Kg Matéria-Prima / Kg Final", "Kg Matéria-Prima / Kg Final (novo)",
+                                         "Variação (%)", "Rendimento Total (%)", "Rendimento Total (%) (novo)"])
+
+        # Só as rotas que passam por alguma operação alterada são recalculadas
+        rotas_afetadas = self.tabela.loc[afetadas, CHAVE_ROTA].drop_duplicates()
+        recorte = self.tabela.merge(rotas_afetadas, on=CHAVE_ROTA, sort=False)
+        recorte["% REND"] = recorte["OPERAÇÃO"].map(novos).fillna(recorte["% REND"])
+        depois = resumo_rotas(acumular(recorte))
+
+        comparacao = self.resumo.merge(depois, on=CHAVE_ROTA, suffixes=("", " (novo)"))
+        antes, novo = comparacao["Kg Matéria-Prima / Kg Final"], comparacao["Kg Matéria-Prima / Kg Final (novo)"]
+        comparacao["Variação (%)"] = ((novo - antes) / antes * 100).round(2)
+        return comparacao[[*CHAVE_ROTA, "Kg Matéria-Prima / Kg Final", "Kg Matéria-Prima / Kg Final (novo)",
+                           "Variação (%)", "Rendimento Total (%)", "Rendimento Total (%) (novo)"]]
+
+
+# Construtor para o monitor_planilha
+def tabela_planilha(caminho):
+    return TabelaRendimento(carregar_colunas(caminho, COLUNAS_RENDIMENTO))
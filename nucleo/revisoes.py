@@ -0,0 +1,169 @@
+# Diferença entre a última e a penúltima REVISÃO de todos os produtos.
+#
+# Montada uma vez por versão da planilha (monitor_planilha), sem laço por
+# produto:
+#   - as duas revisões mais recentes de cada produto (ordem numérica da
+#     REVISÃO) saem de uma ordenação dos pares (PRODUTO, REVISÃO);
+#   - as etapas das duas revisões são agregadas por (PRODUTO, OPERAÇÃO) em um
+#     único groupby e postas lado a lado (anterior x atual). Operações que
+#     aparecem em mais de uma etapa (ex.: em linhas de produção diferentes)
+#     somam MAQ HR e horas por tonelada; KG/MH e % REND usam a média;
+#   - horas por tonelada = soma de 1000 / KG/MH das etapas, a mesma conta das
+#     horas necessárias do PCP, e é a base do impacto na capacidade.
+# Operações que só existem em uma das revisões (incluindo as renomeadas)
+# aparecem como "Nova" ou "Removida".
+import numpy as np
+import pandas as pd
+
+from nucleo.dados import carregar_colunas
+
+COLUNAS_REVISOES = ["PRODUTO", "REVISÃO", "FIAÇÃO", "N° OPERAÇÃO", "OPERAÇÃO", "KG/MH", "MAQ HR", "% REND"]
+METRICAS = ["KG/MH", "MAQ HR", "% REND"]
+VERSOES = ("Anterior", "Atual")
+
+# Variação usada no ranking das operações novas ou removidas (a carga inteira
+# da operação aparece ou some)
+VARIACAO_NOVA_REMOVIDA = 100.0
+
+
+# Última e penúltima REVISÃO dos produtos com mais de uma revisão
+def ultimas_revisoes(df):
+    pares = df[["PRODUTO", "REVISÃO"]].drop_duplicates()
+    pares = pares.assign(_ordem=pd.to_numeric(pares["REVISÃO"], errors="coerce"))
+    pares = pares.sort_values(["PRODUTO", "_ordem", "REVISÃO"], kind="stable", ignore_index=True)
+    posicao = pares.groupby("PRODUTO", sort=False).cumcount(ascending=False).to_numpy()
+    atual = pares.loc[posicao == 0, ["PRODUTO", "REVISÃO"]]
+    anterior = pares.loc[posicao == 1, ["PRODUTO", "REVISÃO"]]
+    return anterior.merge(atual, on="PRODUTO", suffixes=(" Anterior", " Atual")).rename(columns={
+        "REVISÃO Anterior": "Revisão Anterior", "REVISÃO Atual": "Revisão Atual"
+    })
+
+
+def _variacao(anterior, atual):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(anterior != 0, (atual - anterior) / np.abs(anterior) * 100, np.nan)
+
+
+class DiferencaRevisoes:
+
+    def __init__(self, df):
+        df = df[COLUNAS_REVISOES].copy()
+        df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+        df["N° OPERAÇÃO"] = pd.to_numeric(df["N° OPERAÇÃO"], errors="coerce")
+        for metrica in METRICAS:
+            df[metrica] = pd.to_numeric(df[metrica], errors="coerce")
+        df = df.dropna(subset=["PRODUTO", "REVISÃO"])
+        self.revisoes = ultimas_revisoes(df)
+
+        # Etapas das duas revisões de cada produto, marcadas com a versão
+        versoes = pd.concat([
+            self.revisoes[["PRODUTO", f"Revisão {versao}"]].rename(columns={f"Revisão {versao}": "REVISÃO"}).assign(Versão=versao)
+            for versao in VERSOES
+        ])
+        etapas = df.merge(versoes, on=["PRODUTO", "REVISÃO"])
+        kg_mh = etapas["KG/MH"].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            etapas["Horas/ton"] = np.where(kg_mh > 0, 1000 / kg_mh, 0.0)
+
+        agregado = etapas.groupby(["PRODUTO", "OPERAÇÃO", "Versão"], sort=False).agg(**{
+            "FIAÇÃO": ("FIAÇÃO", "first"),
+            "N° OPERAÇÃO": ("N° OPERAÇÃO", "min"),
+            "Etapas": ("OPERAÇÃO", "size"),
+            "KG/MH": ("KG/MH", "mean"),
+            "MAQ HR": ("MAQ HR", "sum"),
+            "% REND": ("% REND", "mean"),
+            "Horas/ton": ("Horas/ton", "sum"),
+        })
+        largo = agregado.unstack("Versão").reindex(columns=list(VERSOES), level=1)
+
+        tabela = largo.index.to_frame(index=False)
+        presente = {versao: largo[("Etapas", versao)].notna().to_numpy() for versao in VERSOES}
+        tabela["FIAÇÃO"] = largo[("FIAÇÃO", "Atual")].fillna(largo[("FIAÇÃO", "Anterior")]).to_numpy()
+        tabela["N° OPERAÇÃO"] = largo[("N° OPERAÇÃO", "Atual")].fillna(largo[("N° OPERAÇÃO", "Anterior")]).to_numpy()
+        tabela["Situação"] = np.select(
+            [presente["Anterior"] & presente["Atual"], presente["Atual"]], ["Alterada", "Nova"], "Removida"
+        )
+
+        # Mudou: alguma métrica diferente (vazio nos dois lados conta como igual)
+        mudou = np.zeros(len(tabela), dtype=bool)
+        variacoes = []
+        for metrica in [*METRICAS, "Horas/ton"]:
+            anterior = largo[(metrica, "Anterior")].to_numpy(dtype=float)
+            atual = largo[(metrica, "Atual")].to_numpy(dtype=float)
+            tabela[f"{metrica} (Anterior)"] = anterior
+            tabela[f"{metrica} (Atual)"] = atual
+            tabela[f"Δ {metrica}"] = atual - anterior
+            tabela[f"Δ {metrica} (%)"] = np.round(_variacao(anterior, atual), 2)
+            if metrica in METRICAS:
+                mudou |= ~(np.isclose(anterior, atual, rtol=1e-9, atol=1e-9) | (np.isnan(anterior) & np.isnan(atual)))
+                variacoes.append(np.abs(tabela[f"Δ {metrica} (%)"].to_numpy()))
+
+        maior = np.fmax.reduce(variacoes)
+        tabela["Maior Variação (%)"] = np.where(tabela["Situação"] == "Alterada", maior, VARIACAO_NOVA_REMOVIDA)
+        tabela["Mudou"] = mudou | (tabela["Situação"] != "Alterada").to_numpy()
+        # Todas as operações das duas revisões (inclusive as iguais), base do impacto
+        self.tabela = self.revisoes.merge(tabela, on="PRODUTO")
+
+        # Relatório: só as operações que mudaram, da maior variação para a menor
+        self.alteracoes = (
+            self.tabela[self.tabela["Mudou"]]
+            .sort_values(["Maior Variação (%)", "Δ Horas/ton"], ascending=False, key=np.abs, na_position="last", kind="stable")
+            .drop(columns="Mudou").reset_index(drop=True)
+        )
+
+        # Uma linha por produto: operações alteradas e horas por tonelada nas duas revisões
+        por_produto = self.tabela.groupby("PRODUTO", sort=False)
+        situacoes = self.alteracoes.groupby(["PRODUTO", "Situação"]).size().unstack(fill_value=0)
+        self.resumo = self.revisoes.set_index("PRODUTO").assign(**{
+            "FIAÇÃO": por_produto["FIAÇÃO"].first(),
+            **{f"Operações {situacao}s": situacoes.get(situacao, 0) for situacao in ("Alterada", "Nova", "Removida")},
+            "Horas/ton (Anterior)": por_produto["Horas/ton (Anterior)"].sum(),
+            "Horas/ton (Atual)": por_produto["Horas/ton (Atual)"].sum(),
+        })
+        self.resumo = self.resumo.fillna({f"Operações {s}s": 0 for s in ("Alterada", "Nova", "Removida")})
+        self.resumo["Variação Horas/ton (%)"] = np.round(
+            _variacao(self.resumo["Horas/ton (Anterior)"].to_numpy(), self.resumo["Horas/ton (Atual)"].to_numpy()), 2
+        )
+        self.resumo = self.resumo.reset_index().sort_values(
+            "Variação Horas/ton (%)", ascending=False, key=np.abs, na_position="last", ignore_index=True
+        )
+
+    # Impacto na capacidade, por OPERAÇÃO, de trocar a revisão anterior pela
+    # atual em todos os produtos. "demanda" (PRODUTO e Meta (ton)) dá o peso de
+    # cada produto; sem ela, cada produto conta como 1 tonelada (horas por
+    # tonelada). Só entram as operações com algum produto alterado (e só os
+    # produtos das FIAÇÕES indicadas, se houver).
+    def impacto(self, demanda=None, fiacoes=None):
+        tabela = self.tabela if fiacoes is None else self.tabela[self.tabela["FIAÇÃO"].isin(fiacoes)]
+        if demanda is None:
+            meta = np.ones(len(tabela))
+        else:
+            metas = demanda.groupby("PRODUTO")["Meta (ton)"].sum()
+            meta = tabela["PRODUTO"].map(metas).fillna(0.0).to_numpy(dtype=float)
+        horas = pd.DataFrame({
+            "OPERAÇÃO": tabela["OPERAÇÃO"].to_numpy(),
+            "PRODUTO": tabela["PRODUTO"].to_numpy(),
+            "Mudou": tabela["Mudou"].to_numpy(),
+            "Horas (Anterior)": np.nan_to_num(tabela["Horas/ton (Anterior)"].to_numpy(dtype=float)) * meta,
+            "Horas (Atual)": np.nan_to_num(tabela["Horas/ton (Atual)"].to_numpy(dtype=float)) * meta,
+        })[meta > 0]
+        horas["Produtos Alterados"] = horas["PRODUTO"].where(horas["Mudou"])
+
+        impacto = horas.groupby("OPERAÇÃO").agg(**{
+            "Produtos": ("PRODUTO", "nunique"),
+            "Produtos Alterados": ("Produtos Alterados", "nunique"),
+            "Horas (Anterior)": ("Horas (Anterior)", "sum"),
+            "Horas (Atual)": ("Horas (Atual)", "sum"),
+        }).reset_index()
+        impacto["Δ Horas"] = impacto["Horas (Atual)"] - impacto["Horas (Anterior)"]
+        impacto["Variação (%)"] = np.round(_variacao(impacto["Horas (Anterior)"].to_numpy(), impacto["Horas (Atual)"].to_numpy()), 2)
+
+        impacto = impacto[impacto["Produtos Alterados"] > 0]
+        return impacto.round({"Horas (Anterior)": 2, "Horas (Atual)": 2, "Δ Horas": 2}).sort_values(
+            "Δ Horas", ascending=False, key=np.abs, ignore_index=True
+        )
+
+
+# Construtor para o monitor_planilha
+def diferenca_planilha(caminho):
+    return DiferencaRevisoes(carregar_colunas(caminho, COLUNAS_REVISOES))
@@ -0,0 +1,156 @@
+# Grafo de roteiros e índices invertidos ("onde é usado") da planta.
+#
+# Montado uma vez por versão da planilha (monitor_planilha):
+#   - grafo: cada produto/revisão tem uma rota por LINHA DE PRODUÇÃO (como em
+#     rendimento.separar_linhas), uma sequência de operações em ordem de
+#     N° OPERAÇÃO; as arestas (operação -> próxima operação da mesma rota)
+#     guardam quantos produtos/revisões passam por elas;
+#   - índices invertidos OPERAÇÃO -> linhas e N_ROTEIRO -> linhas: a tabela é
+#     ordenada pela chave e cada chave aponta para o seu trecho, então a
+#     consulta é um acesso a dicionário e um fatiamento;
+#   - roteiros compartilhados: N_ROTEIRO de cada produto/revisão e sequência
+#     de operações de cada rota, para achar quem usa o mesmo roteiro.
+import numpy as np
+import pandas as pd
+
+from nucleo.dados import carregar_colunas
+from nucleo.rendimento import CHAVE_ROTA, separar_linhas
+
+COLUNAS_ROTEIROS = [
+    "PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "N° OPERAÇÃO", "OPERAÇÃO", "N_ROTEIRO", "MAQ HR", "KG/MH"
+]
+CHAVE = ["PRODUTO", "REVISÃO"]
+COLUNAS_ONDE_USADO = ["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "N° OPERAÇÃO", "OPERAÇÃO", "N_ROTEIRO", "MAQ HR", "KG/MH"]
+
+
+# Tabela ordenada pela coluna e {valor: (início, fim)} do trecho de cada valor
+def _indice_invertido(df, coluna):
+    tabela = df[df[coluna].notna()].sort_values([coluna, *CHAVE, "N° OPERAÇÃO"], kind="stable", ignore_index=True)
+    valores = tabela[coluna].to_numpy()
+    if len(valores) == 0:
+        return tabela, {}
+    inicios = np.flatnonzero(np.r_[True, valores[1:] != valores[:-1]])
+    fins = np.r_[inicios[1:], len(valores)]
+    return tabela, {valores[i]: (i, f) for i, f in zip(inicios, fins)}
+
+
+class GrafoRoteiros:
+
+    def __init__(self, df):
+        df = df[COLUNAS_ROTEIROS].copy()
+        df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+        df["N_ROTEIRO"] = df["N_ROTEIRO"].where(df["N_ROTEIRO"].isna(), df["N_ROTEIRO"].astype(str).str.strip().str.upper())
+        df["N° OPERAÇÃO"] = pd.to_numeric(df["N° OPERAÇÃO"], errors="coerce")
+        for coluna in ("MAQ HR", "KG/MH"):
+            df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+        df = df.dropna(subset=[*CHAVE, "OPERAÇÃO"])
+        df = df.sort_values([*CHAVE, "N° OPERAÇÃO"], kind="stable", ignore_index=True)
+
+        # Arestas entre operações consecutivas da mesma rota (produto, revisão
+        # e linha); uma aresta comum a várias linhas conta o produto uma vez
+        rotas = separar_linhas(df)
+        mesma_rota = np.ones(max(len(rotas) - 1, 0), dtype=bool)
+        for coluna in CHAVE_ROTA:
+            valores = rotas[coluna].to_numpy()
+            mesma_rota &= valores[:-1] == valores[1:]
+        operacoes = rotas["OPERAÇÃO"].to_numpy()
+        ligacoes = pd.DataFrame({
+            "Origem": operacoes[:-1][mesma_rota],
+            "Destino": operacoes[1:][mesma_rota],
+            "PRODUTO": rotas["PRODUTO"].to_numpy()[:-1][mesma_rota],
+            "REVISÃO": rotas["REVISÃO"].to_numpy()[:-1][mesma_rota],
+        }).drop_duplicates()
+        self.arestas = (
+            ligacoes.groupby(["Origem", "Destino"]).size().rename("Roteiros")
+            .reset_index().sort_values("Roteiros", ascending=False, ignore_index=True)
+        )
+        self._sucessores, self._antecessores = {}, {}
+        for origem, destino, roteiros in self.arestas.itertuples(index=False, name=None):
+            self._sucessores.setdefault(origem, []).append((destino, roteiros))
+            self._antecessores.setdefault(destino, []).append((origem, roteiros))
+
+        # Índices invertidos
+        self._por_operacao, self._trechos_operacao = _indice_invertido(df, "OPERAÇÃO")
+        self._por_roteiro, self._trechos_roteiro = _indice_invertido(df, "N_ROTEIRO")
+
+        # Roteiros de cada produto/revisão e sequência de operações de cada rota
+        self._roteiros_de = {}
+        for produto, revisao, roteiro in df[[*CHAVE, "N_ROTEIRO"]].dropna().drop_duplicates().itertuples(index=False, name=None):
+            self._roteiros_de.setdefault((produto, revisao), set()).add(roteiro)
+        self._sequencias_de = {}
+        self._mesma_sequencia = {}
+        for rota, sequencia in rotas.groupby(CHAVE_ROTA, sort=False)["OPERAÇÃO"].agg(tuple).items():
+            self._sequencias_de.setdefault(rota[:2], []).append((rota[2], sequencia))
+            self._mesma_sequencia.setdefault(sequencia, []).append(rota)
+
+        self.etapas = df
+
+    def operacoes(self):
+        return sorted(self._trechos_operacao)
+
+    def roteiros(self):
+        return sorted(self._trechos_roteiro)
+
+    def sucessores(self, operacao):
+        return self._sucessores.get(operacao, [])
+
+    def antecessores(self, operacao):
+        return self._antecessores.get(operacao, [])
+
+    # Produtos/revisões que passam pela operação (uma linha por etapa)
+    def onde_usada_operacao(self, operacao):
+        inicio, fim = self._trechos_operacao.get(operacao, (0, 0))
+        return self._por_operacao.iloc[inicio:fim][COLUNAS_ONDE_USADO]
+
+    # Produtos/revisões que usam o N_ROTEIRO (uma linha por etapa)
+    def onde_usado_roteiro(self, roteiro):
+        inicio, fim = self._trechos_roteiro.get(roteiro, (0, 0))
+        return self._por_roteiro.iloc[inicio:fim][COLUNAS_ONDE_USADO]
+
+    # Várias chaves de uma vez ("OPERAÇÃO" ou "N_ROTEIRO"), para exportação
+    def onde_usado(self, coluna, chaves):
+        consulta = self.onde_usada_operacao if coluna == "OPERAÇÃO" else self.onde_usado_roteiro
+        partes = [consulta(chave) for chave in chaves]
+        if not partes:
+            return pd.DataFrame(columns=COLUNAS_ONDE_USADO)
+        return pd.concat(partes, ignore_index=True)
+
+    # Produtos/revisões que compartilham N_ROTEIRO com o produto, e quantos
+    def roteiros_compartilhados(self, produto, revisao):
+        roteiros = self._roteiros_de.get((produto, revisao), set())
+        compartilhados = self.onde_usado("N_ROTEIRO", sorted(roteiros))
+        compartilhados = compartilhados[
+            (compartilhados["PRODUTO"] != produto) | (compartilhados["REVISÃO"] != revisao)
+        ]
+        resumo = compartilhados.groupby(CHAVE, as_index=False).agg(**{
+            "Roteiros em Comum": ("N_ROTEIRO", "nunique"),
+            "Roteiros": ("N_ROTEIRO", lambda r: ", ".join(sorted(r.unique()))),
+        })
+        return resumo.sort_values("Roteiros em Comum", ascending=False, ignore_index=True)
+
+    # Outros produtos/revisões com uma rota de exatamente a mesma sequência de
+    # operações que uma das linhas do produto (LINHA: a do produto consultado)
+    def mesma_sequencia(self, produto, revisao):
+        iguais = [
+            (linha, *outra)
+            for linha, sequencia in self._sequencias_de.get((produto, revisao), [])
+            for outra in self._mesma_sequencia[sequencia]
+            if outra[:2] != (produto, revisao)
+        ]
+        return pd.DataFrame(iguais, columns=["LINHA", *CHAVE, "LINHA IGUAL"])
+
+
+# Carga que os produtos de uma consulta "onde é usado" impõem, por chave
+def resumo_carga(resultado, coluna):
+    resumo = resultado.groupby(coluna).agg(**{
+        "Etapas": ("PRODUTO", "size"),
+        "MAQ HR (Total)": ("MAQ HR", "sum"),
+        "KG/MH (Média)": ("KG/MH", "mean"),
+    })
+    resumo.insert(0, "Produtos/Revisões", resultado.drop_duplicates([coluna, *CHAVE]).groupby(coluna).size())
+    return resumo.round(3).reset_index()
+
+
+# Construtor para o monitor_planilha
+def grafo_planilha(caminho):
+    return GrafoRoteiros(carregar_colunas(caminho, COLUNAS_ROTEIROS))
@@ -0,0 +1,173 @@
+# Índice de produtos semelhantes pelo perfil de operações.
+#
+# Cada (PRODUTO, REVISÃO) vira um vetor com MAQ HR, KG/MH e % REND de cada
+# OPERAÇÃO (média entre as linhas de produção; zero onde o produto não passa
+# pela operação). Cada métrica é dividida pelo seu valor típico (média dos
+# valores não nulos) para que nenhuma domine a distância. A busca dos k mais
+# próximos (cosseno ou L1) é uma operação vetorizada sobre a matriz inteira.
+#
+# Na troca de versão da planilha, os vetores dos produtos cujas linhas não
+# mudaram (mesmo hash) são reaproveitados do índice anterior; só os produtos
+# alterados ou novos são recalculados.
+import os
+
+import numpy as np
+import pandas as pd
+
+from nucleo.dados import carregar_colunas
+
+METRICAS = ["MAQ HR", "KG/MH", "% REND"]
+CHAVE = ["PRODUTO", "REVISÃO"]
+COLUNAS_SIMILARIDADE = [*CHAVE, "OPERAÇÃO", *METRICAS]
+DISTANCIAS = ("cosseno", "L1")
+
+
+# Hash das linhas de cada (PRODUTO, REVISÃO), independente da ordem das linhas
+def _hash_produtos(df):
+    linhas = pd.util.hash_pandas_object(df[COLUNAS_SIMILARIDADE], index=False)
+    return linhas.groupby([df[c] for c in CHAVE], sort=False).sum()
+
+
+# Perfis (média por OPERAÇÃO) de um recorte da planta: linhas (PRODUTO, REVISÃO),
+# colunas (métrica, OPERAÇÃO)
+def _perfis(df):
+    if df.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_arrays([[], []]), index=pd.MultiIndex.from_arrays([[], []], names=CHAVE))
+    medias = df.groupby([*CHAVE, "OPERAÇÃO"], sort=False)[METRICAS].mean()
+    return medias.unstack("OPERAÇÃO", fill_value=0.0).fillna(0.0)
+
+
+class IndiceSimilaridade:
+
+    def __init__(self, df, anterior=None):
+        df = df[COLUNAS_SIMILARIDADE].copy()
+        df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+        for metrica in METRICAS:
+            df[metrica] = pd.to_numeric(df[metrica], errors="coerce")
+        df = df.dropna(subset=CHAVE)
+
+        self.hashes = _hash_produtos(df)
+
+        # Reaproveita os perfis dos produtos que não mudaram desde o índice anterior
+        mantidos = pd.Index([])
+        if anterior is not None:
+            comuns = self.hashes.index.intersection(anterior.hashes.index)
+            mantidos = comuns[self.hashes[comuns].to_numpy() == anterior.hashes[comuns].to_numpy()]
+        alterados = self.hashes.index.difference(mantidos)
+        chaves_df = pd.MultiIndex.from_frame(df[CHAVE])
+        novos = _perfis(df[chaves_df.isin(alterados)])
+        self.reaproveitados = len(mantidos)
+
+        partes = [novos] if anterior is None else [anterior.brutos.loc[mantidos], novos]
+        operacoes = sorted(set().union(*(p.columns.get_level_values(1) for p in partes)))
+        colunas = pd.MultiIndex.from_product([METRICAS, operacoes])
+        brutos = pd.concat([p.reindex(columns=colunas, fill_value=0.0) for p in partes])
+        self.brutos = brutos.reindex(self.hashes.index).fillna(0.0)
+
+        self.operacoes = operacoes
+        self.chaves = self.brutos.index.to_frame(index=False)
+        self._posicao = {chave: i for i, chave in enumerate(self.brutos.index)}
+
+        # Escala por métrica: média dos valores não nulos
+        valores = self.brutos.to_numpy(dtype=np.float64)
+        self._bloco = np.repeat(np.arange(len(METRICAS)), len(operacoes))
+        self.escala = np.ones(len(METRICAS))
+        for i in range(len(METRICAS)):
+            bloco = valores[:, self._bloco == i]
+            positivos = bloco[bloco != 0]
+            if positivos.size:
+                self.escala[i] = np.abs(positivos).mean()
+        self.matriz = np.ascontiguousarray(valores / self.escala[self._bloco], dtype=np.float32)
+        self._presenca = (self.matriz.reshape(len(self.matriz), len(METRICAS), -1) != 0).any(axis=1)
+        self._recortes = {}
+
+    # Matriz só com as colunas das métricas pedidas e as normas das linhas,
+    # montadas na primeira busca com essas métricas
+    def _recorte(self, metricas):
+        chave = tuple(sorted(METRICAS.index(m) for m in metricas))
+        if chave not in self._recortes:
+            colunas = np.isin(self._bloco, chave)
+            matriz = self.matriz if colunas.all() else np.ascontiguousarray(self.matriz[:, colunas])
+            self._recortes[chave] = (colunas, matriz, np.linalg.norm(matriz, axis=1))
+        return self._recortes[chave]
+
+    def __len__(self):
+        return len(self.matriz)
+
+    # Perfil (OPERAÇÃO x métricas) de um produto do índice
+    def perfil(self, produto, revisao):
+        linha = self.brutos.iloc[self._posicao[(produto, revisao)]]
+        perfil = linha.unstack(0)[METRICAS].rename_axis("OPERAÇÃO").reset_index()
+        return perfil[(perfil[METRICAS] != 0).any(axis=1)].reset_index(drop=True)
+
+    # Vetor (na escala do índice) de um perfil hipotético: DataFrame com
+    # OPERAÇÃO e uma ou mais colunas de METRICAS. Retorna também as operações
+    # do perfil que não existem na planta (ignoradas).
+    def vetor(self, perfil):
+        perfil = perfil.copy()
+        perfil["OPERAÇÃO"] = perfil["OPERAÇÃO"].astype(str).str.strip().str.upper()
+        desconhecidas = sorted(set(perfil["OPERAÇÃO"]) - set(self.operacoes))
+        metricas = [m for m in METRICAS if m in perfil.columns]
+        perfil[metricas] = perfil[metricas].apply(pd.to_numeric, errors="coerce")
+        medias = perfil.groupby("OPERAÇÃO")[metricas].mean().fillna(0.0)
+        bruto = medias.reindex(self.operacoes, fill_value=0.0).T.reindex(METRICAS, fill_value=0.0)
+        return bruto.to_numpy(dtype=np.float64).ravel() / self.escala[self._bloco], desconhecidas
+
+    # k produtos mais próximos do vetor, usando só as métricas indicadas
+    def buscar(self, vetor, k=10, distancia="cosseno", metricas=None, excluir=None):
+        if distancia not in DISTANCIAS:
+            raise ValueError(f"Distância desconhecida: {distancia} (use {', '.join(DISTANCIAS)})")
+        metricas = metricas or METRICAS
+        colunas, matriz, normas = self._recorte(metricas)
+        consulta = np.asarray(vetor, dtype=np.float32)[colunas]
+
+        if distancia == "cosseno":
+            normas = normas * np.linalg.norm(consulta)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pontos = np.where(normas > 0, matriz @ consulta / normas, 0.0)
+            ordem_maior_primeiro = True
+        else:
+            # Em blocos, para não criar uma cópia da matriz inteira
+            pontos = np.concatenate([
+                np.abs(matriz[i:i + 4096] - consulta).sum(axis=1) for i in range(0, len(matriz), 4096)
+            ]) if len(matriz) else np.empty(0, dtype=np.float32)
+            ordem_maior_primeiro = False
+
+        candidatos = np.arange(len(pontos))
+        if excluir is not None and excluir in self._posicao:
+            candidatos = candidatos[candidatos != self._posicao[excluir]]
+        k = min(k, len(candidatos))
+        if k == 0:
+            return pd.DataFrame(columns=[*CHAVE, "Similaridade" if ordem_maior_primeiro else "Distância (L1)", "Operações em Comum"])
+        chave_ordem = -pontos[candidatos] if ordem_maior_primeiro else pontos[candidatos]
+        posicoes = np.argpartition(chave_ordem, k - 1)[:k]
+        melhores = candidatos[posicoes[np.argsort(chave_ordem[posicoes], kind="stable")]]
+
+        presenca_consulta = (np.asarray(vetor).reshape(len(METRICAS), -1) != 0).any(axis=0)
+        resultado = self.chaves.iloc[melhores].reset_index(drop=True)
+        resultado["Similaridade" if ordem_maior_primeiro else "Distância (L1)"] = np.round(pontos[melhores], 4)
+        resultado["Operações em Comum"] = (self._presenca[melhores] & presenca_consulta).sum(axis=1)
+        return resultado
+
+    # Produtos mais parecidos com um produto do índice (sem ele mesmo)
+    def semelhantes(self, produto, revisao, k=10, distancia="cosseno", metricas=None):
+        vetor = self.matriz[self._posicao[(produto, revisao)]]
+        return self.buscar(vetor, k, distancia, metricas, excluir=(produto, revisao))
+
+    # Produtos mais parecidos com um perfil hipotético (ver vetor)
+    def semelhantes_perfil(self, perfil, k=10, distancia="cosseno", metricas=None):
+        vetor, desconhecidas = self.vetor(perfil)
+        metricas = metricas or [m for m in METRICAS if m in perfil.columns]
+        return self.buscar(vetor, k, distancia, metricas), desconhecidas
+
+
+_ultimos = {}
+
+
+# Construtor para o monitor_planilha: reaproveita o índice da versão anterior
+# da mesma planilha
+def indice_planilha(caminho):
+    chave = os.path.abspath(caminho)
+    indice = IndiceSimilaridade(carregar_colunas(caminho, COLUNAS_SIMILARIDADE), anterior=_ultimos.get(chave))
+    _ultimos[chave] = indice
+    return indice
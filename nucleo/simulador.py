@@ -0,0 +1,278 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+TURNOS = ("A", "B", "C")
+HORAS_TURNO = 8
+HORAS_ALMOCO = 1
+HORAS_PICO = 3
+
+# Combinações de turnos possíveis, da menor para a maior (varredura do
+# simulador e otimização do PCP)
+COMBINACOES_TURNOS = ("A", "B", "C", "AB", "AC", "BC", "ABC")
+
+
+# Converte os turnos de um cenário ("ABC" ou ["A", "C"]) em máscara booleana (3,)
+def mascara_turnos(turnos):
+    if isinstance(turnos, np.ndarray) and turnos.dtype == bool:
+        return turnos
+    return np.array([t in turnos for t in TURNOS])
+
+
+# Máscara (n, 3) para uma lista de cenários
+def mascara_turnos_lote(lista_turnos):
+    return np.array([[t in turnos for t in TURNOS] for turnos in lista_turnos], dtype=bool).reshape(-1, len(TURNOS))
+
+
+# Horas trabalhadas por máquina em um dia, descontando almoço e pico no turno B
+# (a mesma conta das horas disponíveis do PCP)
+def horas_por_dia(turnos, almoco, pico):
+    mascara = mascara_turnos(turnos)
+    qtd_turnos = mascara.sum(axis=-1)
+    horas = qtd_turnos * HORAS_TURNO
+    horas = horas - np.where(almoco, qtd_turnos * HORAS_ALMOCO, 0)
+    horas = horas - np.where(np.asarray(pico) & mascara[..., 1], HORAS_PICO, 0)
+    return horas
+
+
+# Produção acumulada em "dias", na mesma ordem de operações do laço original
+def _producao(horas_dia, dias, maquinas, kg_por_hora, eficiencia_fusos, eficiencia_maquina, fator_ajuste):
+    total_horas = (horas_dia * (dias * maquinas)).astype(np.float64)
+    return total_horas * kg_por_hora * eficiencia_fusos * eficiencia_maquina * fator_ajuste
+
+
+# Simula vários cenários de uma vez. Todos os argumentos são escalares ou
+# arrays (broadcast entre si); "turnos" é uma máscara (..., 3) ou os turnos
+# de um único cenário.
+# Retorna, por cenário, o primeiro dia (1..dias_max) em que a produção
+# acumulada atinge a meta — o mesmo resultado do laço dia a dia.
+def simular_lote(meta, fusos_total, kg_por_hora, fusos_parados, eficiencia_maquina,
+                 maquinas, almoco, pico, turnos, absenteismo, novatos, dias_max):
+    mascara = mascara_turnos(turnos)
+    horas_dia = horas_por_dia(mascara, almoco, pico)
+
+    (meta, fusos_total, kg_por_hora, fusos_parados, eficiencia_maquina, maquinas,
+     horas_dia, qtd_turnos, absenteismo, novatos, dias_max) = np.broadcast_arrays(
+        meta, fusos_total, kg_por_hora, fusos_parados, eficiencia_maquina, maquinas,
+        horas_dia, mascara.sum(axis=-1), absenteismo, novatos, dias_max
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eficiencia_fusos = (fusos_total - fusos_parados) / fusos_total
+        eficiencia_maquina = eficiencia_maquina / 100
+        fator_ajuste = (1 - absenteismo) * (1 - novatos)
+
+        parametros = (maquinas, kg_por_hora, eficiencia_fusos, eficiencia_maquina, fator_ajuste)
+        diaria = _producao(horas_dia, 1, *parametros)
+
+        # Divisão com teto e correção de ±1 dia por arredondamento de ponto flutuante
+        estimativa = np.where(diaria > 0, np.ceil(meta / diaria), np.where(meta <= 0, 1, np.inf))
+        dias = np.clip(np.nan_to_num(estimativa, nan=np.inf, posinf=np.inf), 1, dias_max + 1)
+        dias = dias.astype(np.int64)
+        for _ in range(2):
+            anterior = np.maximum(dias - 1, 1)
+            recuar = (dias > 1) & (_producao(horas_dia, anterior, *parametros) >= meta)
+            dias = np.where(recuar, anterior, dias)
+        for _ in range(2):
+            avancar = (dias <= dias_max) & ~(_producao(horas_dia, dias, *parametros) >= meta)
+            dias = np.where(avancar, dias + 1, dias)
+
+        producao = _producao(horas_dia, dias, *parametros)
+        atingido = (dias <= dias_max) & (qtd_turnos > 0) & (producao >= meta)
+
+    return {
+        "atingido": atingido,
+        "dias": np.where(atingido, dias, 0),
+        "producao": np.where(atingido, producao, np.nan),
+        "producao_diaria": diaria,
+        "eficiencia_fusos": eficiencia_fusos,
+        "eficiencia_maquina": eficiencia_maquina,
+    }
+
+
+# Um cenário do simulador (uma operação de um produto)
+@dataclass(frozen=True)
+class CenarioSimulacao:
+    meta: float
+    fusos_total: float
+    kg_por_hora: float
+    fusos_parados: float
+    eficiencia_maquina: float  # %
+    maquinas: int
+    almoco: bool
+    pico: bool
+    turnos: str  # ex.: "ABC"
+    absenteismo: float  # fração (0-1)
+    novatos: float  # fração (0-1)
+    dias_max: int
+
+
+@dataclass(frozen=True)
+class ResultadoSimulacao:
+    dias: int
+    producao: float
+    producao_diaria: float  # produção / dias
+    eficiencia_fusos: float  # fração
+    eficiencia_maquina: float  # fração
+
+
+# Simula um único cenário; None se não há turnos ou a meta não é atingida
+# dentro de dias_max
+def simular(cenario: CenarioSimulacao) -> Optional[ResultadoSimulacao]:
+    if not cenario.turnos:
+        return None
+    lote = simular_lote(
+        cenario.meta, cenario.fusos_total, cenario.kg_por_hora, cenario.fusos_parados,
+        cenario.eficiencia_maquina, cenario.maquinas, cenario.almoco, cenario.pico,
+        cenario.turnos, cenario.absenteismo, cenario.novatos, cenario.dias_max
+    )
+    if not lote["atingido"]:
+        return None
+    dias = int(lote["dias"])
+    producao = float(lote["producao"])
+    return ResultadoSimulacao(
+        dias=dias,
+        producao=producao,
+        producao_diaria=producao / dias,
+        eficiencia_fusos=float(lote["eficiencia_fusos"]),
+        eficiencia_maquina=float(lote["eficiencia_maquina"])
+    )
+
+
+# Avalia a grade cartesiana de fusos parados x eficiência x máquinas x turnos
+# x almoço x pico em uma única chamada a simular_lote
+def varrer_cenarios(meta, fusos_total, kg_por_hora, dias_max, fusos_parados, eficiencias,
+                    maquinas, turnos=COMBINACOES_TURNOS, almoco=(True,), pico=(False,),
+                    absenteismo=0.0, novatos=0.0):
+    eixos = [
+        np.asarray(fusos_parados), np.asarray(eficiencias), np.asarray(maquinas),
+        np.arange(len(turnos)), np.asarray(almoco, dtype=bool), np.asarray(pico, dtype=bool)
+    ]
+    grade = [eixo.ravel() for eixo in np.meshgrid(*eixos, indexing="ij")]
+    fusos_parados, eficiencias, maquinas, indice_turnos, almoco, pico = grade
+    mascara = mascara_turnos_lote(turnos)[indice_turnos]
+
+    lote = simular_lote(
+        meta, fusos_total, kg_por_hora, fusos_parados, eficiencias, maquinas,
+        almoco, pico, mascara, absenteismo, novatos, dias_max
+    )
+
+    # Colunas de texto como categorias: montar strings para cada linha é o mais caro
+    sim_nao = ["Não", "Sim"]
+    return pd.DataFrame({
+        "Fusos Parados": fusos_parados,
+        "Eficiência Máquina(%)": eficiencias,
+        "Máquinas": maquinas,
+        "Turnos": pd.Categorical.from_codes(indice_turnos, ["".join(t) for t in turnos]),
+        "Almoço": pd.Categorical.from_codes(almoco.astype(np.int8), sim_nao),
+        "Pico no Turno B": pd.Categorical.from_codes(pico.astype(np.int8), sim_nao),
+        "Máquinas x Turnos": maquinas * mascara.sum(axis=1),
+        "Dias Necessários": np.where(lote["atingido"], lote["dias"], np.nan),
+        "Produção Estimada (kg)": np.round(lote["producao"], 2),
+        "Atende": lote["atingido"]
+    })
+
+
+# Configurações que atendem a meta dentro de dias_max, da mais barata
+# (menos máquinas x turnos) para a mais cara
+def melhores_cenarios(varredura, quantidade=10):
+    viaveis = varredura[varredura["Atende"]]
+    return viaveis.sort_values(
+        by=["Máquinas x Turnos", "Máquinas", "Dias Necessários", "Eficiência Máquina(%)", "Fusos Parados"],
+        ascending=[True, True, True, True, False],
+        kind="stable"
+    ).head(quantidade)
+
+
+# ---------------- SIMULAÇÃO DE RISCO (MONTE CARLO) ----------------
+
+# Distribuições aceitas por monte_carlo (valores fixos também são aceitos)
+def normal(media, desvio):
+    return {"tipo": "normal", "media": media, "desvio": desvio}
+
+
+def triangular(minimo, moda, maximo):
+    return {"tipo": "triangular", "minimo": minimo, "moda": moda, "maximo": maximo}
+
+
+def uniforme(minimo, maximo):
+    return {"tipo": "uniforme", "minimo": minimo, "maximo": maximo}
+
+
+def _amostrar(rng, distribuicao, tamanho, minimo, maximo):
+    if not isinstance(distribuicao, dict):
+        return np.full(tamanho, float(distribuicao))
+    tipo = distribuicao["tipo"]
+    if tipo == "normal":
+        amostras = rng.normal(distribuicao["media"], distribuicao["desvio"], tamanho)
+    elif tipo == "triangular":
+        if distribuicao["minimo"] == distribuicao["maximo"]:
+            amostras = np.full(tamanho, float(distribuicao["minimo"]))
+        else:
+            amostras = rng.triangular(distribuicao["minimo"], distribuicao["moda"], distribuicao["maximo"], tamanho)
+    elif tipo == "uniforme":
+        amostras = rng.uniform(distribuicao["minimo"], distribuicao["maximo"], tamanho)
+    else:
+        raise ValueError(f"Distribuição desconhecida: {tipo}")
+    return np.clip(amostras, minimo, maximo)
+
+
+# Simula um bloco de trajetórias; retorna o dia em que cada uma atinge a meta
+# (0 se não atinge dentro do horizonte). Fica no nível do módulo para poder
+# ser enviado a um ProcessPoolExecutor.
+def _simular_bloco(semente, trajetorias, horizonte, meta, fusos_total, capacidade_hora,
+                   novatos, absenteismo, eficiencia_maquina, fusos_parados):
+    rng = np.random.default_rng(semente)
+    forma = (trajetorias, horizonte)
+
+    ausencia = _amostrar(rng, absenteismo, forma, 0.0, 1.0)
+    eficiencia = _amostrar(rng, eficiencia_maquina, forma, 0.0, 100.0)
+    parados = _amostrar(rng, fusos_parados, forma, 0.0, fusos_total)
+
+    diaria = capacidade_hora * ((fusos_total - parados) / fusos_total) * (eficiencia / 100)
+    diaria *= (1 - ausencia) * (1 - novatos)
+    acumulada = np.cumsum(diaria, axis=1)
+
+    atinge = acumulada >= meta
+    return np.where(atinge.any(axis=1), atinge.argmax(axis=1) + 1, 0)
+
+
+# Simulação estocástica: absenteísmo, eficiência e fusos parados variam dia a
+# dia conforme as distribuições informadas. Retorna a probabilidade de atingir
+# a meta em até dias_max e os percentis do dia de conclusão.
+def monte_carlo(meta, fusos_total, kg_por_hora, maquinas, almoco, pico, turnos, dias_max,
+                absenteismo, eficiencia_maquina, fusos_parados, novatos=0.0,
+                trajetorias=100_000, horizonte=None, semente=None, processos=1, bloco=25_000):
+    horizonte = int(horizonte or dias_max * 2)
+    horas_dia = float(horas_por_dia(turnos, almoco, pico))
+    capacidade_hora = horas_dia * maquinas * kg_por_hora
+
+    tamanhos = [min(bloco, trajetorias - inicio) for inicio in range(0, trajetorias, bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [
+        (s, n, horizonte, meta, fusos_total, capacidade_hora, novatos, absenteismo, eficiencia_maquina, fusos_parados)
+        for s, n in zip(sementes, tamanhos)
+    ]
+
+    if processos > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            partes = list(executor.map(_simular_bloco, *zip(*tarefas)))
+    else:
+        partes = [_simular_bloco(*tarefa) for tarefa in tarefas]
+    dias = np.concatenate(partes) if partes else np.empty(0, dtype=np.int64)
+
+    # Trajetórias que não concluem no horizonte contam como infinito nos
+    # percentis. Percentil = primeiro dia em que ao menos essa fração concluiu
+    # (sem interpolar, que daria nan entre um dia e o infinito)
+    conclusao = np.where(dias > 0, dias, np.inf).astype(np.float64)
+    p50, p90 = np.percentile(conclusao, [50, 90], method="inverted_cdf") if len(dias) else (np.nan, np.nan)
+    return {
+        "dias": dias,
+        "probabilidade": float(np.mean((dias > 0) & (dias <= dias_max))) if len(dias) else 0.0,
+        "p50": float(p50),
+        "p90": float(p90),
+        "horizonte": horizonte
+    }
@@ -0,0 +1,159 @@
+# Medição das etapas de cada execução (rerun) das páginas: tempo e variação
+# de memória (RSS) de cada etapa, gravados em um log JSONL só de acréscimo.
+#
+# Nas páginas (scripts lineares) as etapas são marcadas em sequência:
+#   medicao = iniciar_medicao("PCP")
+#   medicao.marcar("carregar_dados")   # fecha a etapa anterior e abre esta
+#   ...
+#   medicao.finalizar()                # fecha a última etapa e grava o log
+# Execuções interrompidas (st.stop, st.rerun) chamam finalizar() antes, senão
+# não aparecem no log.
+#
+# O log fica em logs/telemetria.jsonl (ou no caminho da variável de ambiente
+# PARAMOUNT_TELEMETRIA; "0" desliga a gravação). Para agregar:
+#   python -m nucleo.telemetria [arquivo.jsonl]
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+ARQUIVO_LOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "telemetria.jsonl")
+
+_trava_log = threading.Lock()
+
+
+def _caminho_log():
+    return os.environ.get("PARAMOUNT_TELEMETRIA", ARQUIVO_LOG)
+
+
+# Memória residente do processo em bytes (Linux, Windows; 0 se indisponível)
+def memoria_rss():
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Contadores(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        contadores = _Contadores()
+        contadores.cb = ctypes.sizeof(contadores)
+        processo = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb):
+            return contadores.WorkingSetSize
+    return 0
+
+
+class Medicao:
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.inicio = time.perf_counter()
+        self.etapas = []
+        self._aberta = None
+        self._finalizada = False
+
+    # Fecha a etapa em andamento (se houver) e abre "nome"
+    def marcar(self, nome):
+        self._fechar()
+        self._aberta = (nome, time.perf_counter(), memoria_rss())
+
+    def _fechar(self):
+        if self._aberta is None:
+            return
+        nome, inicio, memoria = self._aberta
+        self.etapas.append({
+            "etapa": nome,
+            "segundos": round(time.perf_counter() - inicio, 6),
+            "memoria_mb": round((memoria_rss() - memoria) / 2**20, 3),
+        })
+        self._aberta = None
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    # Etapas como DataFrame (para o painel da barra lateral)
+    def tabela(self):
+        import pandas as pd
+
+        tabela = pd.DataFrame(self.etapas, columns=["etapa", "segundos", "memoria_mb"])
+        return tabela.rename(columns={"etapa": "Etapa", "segundos": "Tempo (ms)", "memoria_mb": "Memória (MB)"}).assign(
+            **{"Tempo (ms)": lambda t: (t["Tempo (ms)"] * 1000).round(1)}
+        )
+
+    # Fecha a última etapa e acrescenta uma linha ao log (uma vez por execução)
+    def finalizar(self):
+        self._fechar()
+        if self._finalizada:
+            return
+        self._finalizada = True
+        caminho = _caminho_log()
+        if caminho == "0":
+            return
+        registro = {
+            "data": datetime.now().isoformat(timespec="milliseconds"),
+            "pagina": self.pagina,
+            "pid": os.getpid(),
+            "total_s": round(self.total, 6),
+            "memoria_rss_mb": round(memoria_rss() / 2**20, 1),
+            "etapas": self.etapas,
+        }
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        try:
+            os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+            with _trava_log, open(caminho, "a", encoding="utf-8") as arquivo:
+                arquivo.write(linha)
+        except OSError:
+            # A medição nunca deve derrubar a página
+            pass
+
+
+def iniciar_medicao(pagina):
+    return Medicao(pagina)
+
+
+# Agrega o log por página e etapa: execuções, média, p50, p95 e máximo (ms)
+def agregar(caminho=None):
+    import pandas as pd
+
+    linhas = []
+    with open(caminho or _caminho_log(), encoding="utf-8") as arquivo:
+        for texto in arquivo:
+            try:
+                registro = json.loads(texto)
+            except ValueError:
+                continue
+            for etapa in registro.get("etapas", []):
+                linhas.append((registro["pagina"], etapa["etapa"], etapa["segundos"] * 1000, etapa["memoria_mb"]))
+            linhas.append((registro["pagina"], "(total)", registro["total_s"] * 1000, 0.0))
+
+    dados = pd.DataFrame(linhas, columns=["Página", "Etapa", "ms", "Memória (MB)"])
+    resumo = dados.groupby(["Página", "Etapa"], sort=False).agg(**{
+        "Execuções": ("ms", "count"),
+        "Média (ms)": ("ms", "mean"),
+        "p50 (ms)": ("ms", "median"),
+        "p95 (ms)": ("ms", lambda ms: ms.quantile(0.95)),
+        "Máx (ms)": ("ms", "max"),
+        "Memória média (MB)": ("Memória (MB)", "mean"),
+    }).round(2).reset_index()
+    return resumo.sort_values(["Página", "Média (ms)"], ascending=[True, False])
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(agregar(sys.argv[1] if len(sys.argv) > 1 else None).to_string(index=False))
@@ -0,0 +1,143 @@
+# Viabilidade mensal do PCP para todas as FIAÇÕES de uma vez, sem a interface.
+#
+# Uso:
+#   python -m nucleo.viabilidade --demanda demanda.csv [--config capacidade.xlsx]
+#       [--planilha PLANTA.xlsx] [--dias-uteis 25] [--absenteismo 5] [--novatos 10]
+#       [--processos N] [--saida viabilidade_mensal.xlsx]
+#
+# Cada FIAÇÃO é calculada em um processo separado, como se fosse selecionada
+# na página PCP, e o resultado sai em uma única planilha consolidada.
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from nucleo.dados import CAMINHO_PLANILHA, carregar_colunas
+from nucleo.exportacao import gravar_excel
+from nucleo.pcp import (
+    COLUNAS_PLANTA, configuracao_padrao, horas_disponiveis, horas_disponiveis_exatas, horas_necessarias,
+    horas_necessarias_por_operacao, ler_configuracao, ler_demanda, mesclar_configuracao, operacoes_planta, preparar_planta, verificar_ocupacao
+)
+
+
+# Horas disponíveis das operações de uma FIAÇÃO: configuração padrão com os
+# ajustes do arquivo de configuração (se houver). Retorna a tabela e as horas
+# sem arredondar (horas_disponiveis_exatas) usadas na viabilidade.
+def disponiveis_fiacao(fiacao, planta, operacoes, ajustes, dias_uteis, absenteismo_geral, novatos_geral):
+    operacoes = operacoes[operacoes["OPERAÇÃO"].isin(planta["OPERAÇÃO"].unique())]
+    config = configuracao_padrao(operacoes)
+    if ajustes is not None:
+        config = mesclar_configuracao(config, ajustes, fiacao)
+    return (
+        horas_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral).sort_values(by="OPERAÇÃO"),
+        horas_disponiveis_exatas(config, dias_uteis, absenteismo_geral, novatos_geral)
+    )
+
+
+# Cálculo de uma FIAÇÃO (mesmos passos da página PCP). Fica no nível do
+# módulo para poder ser enviado a um ProcessPoolExecutor.
+def viabilidade_fiacao(fiacao, planta, operacoes, ajustes, demanda, dias_uteis, absenteismo_geral, novatos_geral):
+    resultado, exatas = disponiveis_fiacao(fiacao, planta, operacoes, ajustes, dias_uteis, absenteismo_geral, novatos_geral)
+    produtos, _ = horas_necessarias(planta, demanda)
+    checagem = verificar_ocupacao(horas_necessarias_por_operacao(produtos), resultado, exatas)
+    return {"disponiveis": resultado, "necessarias": produtos, "checagem": checagem}
+
+
+# Empilha as tabelas das FIAÇÕES com a coluna FIAÇÃO na frente
+def _consolidar(fiacoes, tabelas):
+    if not tabelas:
+        return pd.DataFrame()
+    consolidado = pd.concat(dict(zip(fiacoes, tabelas)), names=["FIAÇÃO", None])
+    return consolidado.reset_index(level=0).reset_index(drop=True)
+
+
+# Uma linha por FIAÇÃO: horas, operações inviáveis e maior ocupação
+def resumo_fiacoes(checagem):
+    resumo = checagem.groupby("FIAÇÃO").agg(**{
+        "Operações com Demanda": ("OPERAÇÃO", "count"),
+        "Operações Inviáveis": ("Status", lambda status: int((status != "✅ Viável").sum())),
+        "Horas Necessárias (Total)": ("Horas Necessárias (Total)", "sum"),
+        "Horas Disponíveis (Total)": ("Horas Disponíveis (Total)", "sum"),
+        "Ocupação Máxima (%)": ("Ocupação (%)", "max"),
+    }).reset_index()
+    resumo["Status"] = resumo["Operações Inviáveis"].map(lambda n: "✅ Viável" if n == 0 else "❌ Inválido")
+    return resumo
+
+
+def executar(caminho_planilha, demanda, ajustes=None, dias_uteis=25, absenteismo_geral=5, novatos_geral=10,
+             processos=None):
+    planta = preparar_planta(carregar_colunas(caminho_planilha, COLUNAS_PLANTA))
+    operacoes = operacoes_planta(planta)
+    fiacoes = sorted(planta["FIAÇÃO"].unique())
+    tarefas = [
+        (fiacao, planta[planta["FIAÇÃO"] == fiacao], operacoes, ajustes, demanda,
+         dias_uteis, absenteismo_geral, novatos_geral)
+        for fiacao in fiacoes
+    ]
+
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tarefas))) as executor:
+            partes = list(executor.map(viabilidade_fiacao, *zip(*tarefas)))
+    else:
+        partes = [viabilidade_fiacao(*tarefa) for tarefa in tarefas]
+
+    relatorio = {
+        nome: _consolidar(fiacoes, [parte[nome] for parte in partes])
+        for nome in ("disponiveis", "necessarias", "checagem")
+    }
+    relatorio["resumo"] = resumo_fiacoes(relatorio["checagem"])
+    # Linhas da demanda que não existem em nenhuma FIAÇÃO
+    relatorio["sem_planta"] = horas_necessarias(planta, demanda)[1]
+    return relatorio
+
+
+def gravar_relatorio(relatorio, saida):
+    gravar_excel(saida, {
+        "Resumo": relatorio["resumo"],
+        "Viabilidade_Final": relatorio["checagem"],
+        "Horas_Necessarias": relatorio["necessarias"],
+        "Horas_Disponiveis": relatorio["disponiveis"],
+        "Demanda_Sem_Planta": relatorio["sem_planta"],
+    })
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m nucleo.viabilidade",
+        description="Viabilidade mensal do PCP (horas disponíveis x necessárias) para todas as FIAÇÕES."
+    )
+    parser.add_argument("--planilha", default=CAMINHO_PLANILHA, help="Planta de produção (.xlsx)")
+    parser.add_argument("--demanda", required=True, help="Demanda (CSV/XLSX com PRODUTO, REVISÃO e META em toneladas)")
+    parser.add_argument("--config", help="Configuração de capacidade por OPERAÇÃO (CSV/XLSX); sem ela, valores padrão")
+    parser.add_argument("--dias-uteis", type=int, default=25)
+    parser.add_argument("--absenteismo", type=float, default=5, help="Absenteísmo (%%)")
+    parser.add_argument("--novatos", type=float, default=10, help="Novatos (%%)")
+    parser.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos da CPU)")
+    parser.add_argument("--saida", default="viabilidade_mensal.xlsx", help="Planilha consolidada de saída")
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    try:
+        demanda = ler_demanda(args.demanda)
+        ajustes = ler_configuracao(args.config) if args.config else None
+    except (OSError, ValueError) as erro:
+        parser.exit(2, f"Erro: {erro}\n")
+
+    relatorio = executar(
+        args.planilha, demanda, ajustes, args.dias_uteis, args.absenteismo, args.novatos, args.processos
+    )
+    gravar_relatorio(relatorio, args.saida)
+
+    print(relatorio["resumo"].to_string(index=False))
+    if not relatorio["sem_planta"].empty:
+        print(f"\n{len(relatorio['sem_planta'])} linha(s) da demanda sem PRODUTO/REVISÃO na planta.")
+    print(f"\nRelatório gravado em {args.saida} ({time.perf_counter() - inicio:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,20 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import os
-import io
+from nucleo.dados import carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.comparacao import comparar_maq_hr, comparar_maq_hr_varios
+from nucleo.exportacao import excel_sob_demanda
+from nucleo.pcp import ler_demanda
+from nucleo.revisoes import diferenca_planilha
+from nucleo.similaridade import METRICAS, indice_planilha
+from nucleo.telemetria import iniciar_medicao
 
 st.set_page_config(page_title="Diferença MQ/HR | Paramount Têxteis SI", layout="wide")
 
+# Tempo de cada etapa desta execução (painel na barra lateral e logs/telemetria.jsonl)
+medicao = iniciar_medicao("Diferença MQ-HR")
+
 with st.sidebar:
     st.subheader("ℹ️ Sobre")
     st.info("App desenvolvido para auxiliar na gestão da produção da unidade de Santa Isabel.")
@@ -25,129 +35,63 @@ with st.sidebar:
 
 st.title("Diferença MQ/HR | Produção - Paramount SI")
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    caminho = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
-    df = pd.read_excel(caminho)
-    df = df[["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "OPERAÇÃO", "KG/MH", "MAQ HR", "N° OPERAÇÃO"]].dropna()
-    return df
+CAMINHO_PLANILHA = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
 
-dados = carregar_dados()
+# Função para carregar os dados (catálogo indexado, compartilhado entre sessões e
+# recarregado em segundo plano quando a planilha muda)
+def carregar_dados(caminho):
+    df = carregar_colunas(caminho, ["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "OPERAÇÃO", "KG/MH", "MAQ HR", "N° OPERAÇÃO"]).dropna()
 
-# Padroniza as colunas
-dados["OPERAÇÃO"] = dados["OPERAÇÃO"].astype(str).str.strip().str.upper()
-dados["N° OPERAÇÃO"] = dados["N° OPERAÇÃO"].astype(str).str.strip()
+    # Padroniza as colunas
+    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+    df["N° OPERAÇÃO"] = df["N° OPERAÇÃO"].astype(str).str.strip()
+    return CatalogoPlanta(df)
 
-# Remove valores nulos da coluna "LINHA DE PRODUÇÃO"
-dados_sem_nulos = dados[dados["LINHA DE PRODUÇÃO"].notna()]
+medicao.marcar("carregar_dados")
+monitor = monitor_planilha(CAMINHO_PLANILHA)
+monitor.registrar("diferenca_mq_hr", carregar_dados)
+catalogo = monitor.obter("diferenca_mq_hr")
 
 # Seleção de Produtos
+medicao.marcar("seleção")
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Produto 1")
-    produto1 = st.selectbox("Item", sorted(dados["PRODUTO"].unique()), key="produto1")
-    rev1 = sorted(dados[dados["PRODUTO"] == produto1]['REVISÃO'].unique())
+    produto1 = st.selectbox("Item", catalogo.produtos(), key="produto1")
+    rev1 = catalogo.valores("REVISÃO", produto=produto1)
     revisao1 = st.selectbox("Revisão da Planta de Produção", rev1, key="revisao1")
-    linha1 = sorted(dados[dados["PRODUTO"] == produto1]['LINHA DE PRODUÇÃO'].unique())
+    linha1 = catalogo.valores("LINHA DE PRODUÇÃO", produto=produto1)
     linhaProd1 = st.multiselect("Linha de Produção", linha1, key="linhaProd1")
 
 with col2:
     st.subheader("Produto 2")
-    produto2 = st.selectbox("Item", sorted(dados["PRODUTO"].unique()), key="produto2")
-    rev2 = sorted(dados[dados["PRODUTO"] == produto2]['REVISÃO'].unique())
+    produto2 = st.selectbox("Item", catalogo.produtos(), key="produto2")
+    rev2 = catalogo.valores("REVISÃO", produto=produto2)
     revisao2 = st.selectbox("⚙️ Revisão da Planta de Produção", rev2, key="revisao2")
-    linha2 = sorted(dados[dados["PRODUTO"] == produto2]['LINHA DE PRODUÇÃO'].unique())
+    linha2 = catalogo.valores("LINHA DE PRODUÇÃO", produto=produto2)
     linhaProd2 = st.multiselect("Linha de Produção", linha2, key="linhaProd2")
 
 # Filtragem de dados
-filtro1 = dados_sem_nulos[
-    (dados_sem_nulos["PRODUTO"] == produto1) &
-    (dados_sem_nulos["REVISÃO"] == revisao1) &
-    (dados_sem_nulos["LINHA DE PRODUÇÃO"].isin(linhaProd1))
-][["OPERAÇÃO", "N° OPERAÇÃO", "KG/MH", "MAQ HR"]]
-
-filtro2 = dados_sem_nulos[
-    (dados_sem_nulos["PRODUTO"] == produto2) &
-    (dados_sem_nulos["REVISÃO"] == revisao2) &
-    (dados_sem_nulos["LINHA DE PRODUÇÃO"].isin(linhaProd2))
-][["OPERAÇÃO", "KG/MH", "MAQ HR"]]
-
-# Renomear colunas
-nome1 = f"{produto1}"
-nome2 = f"{produto2}"
-
-if not filtro1.empty:
-    tabela1 = filtro1.rename(columns={
-        "MAQ HR": f"MAQ HR - {nome1}",
-        "KG/MH": f"KG/HR - {nome1}"
-    })
-else:
-    tabela1 = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", f"MAQ HR - {nome1}", f"KG/HR - {nome1}"])
-
-if not filtro2.empty:
-    tabela2 = filtro2.rename(columns={
-        "MAQ HR": f"MAQ HR - {nome2}",
-        "KG/MH": f"KG/HR - {nome2}"
-    })
-else:
-    tabela2 = pd.DataFrame(columns=["OPERAÇÃO", f"MAQ HR - {nome2}", f"KG/HR - {nome2}"])
-
-# Agrupamento de Produto 1 (mantendo menor N° OPERAÇÃO)
-if not tabela1.empty:
-    tabela1_grouped = tabela1.groupby(['OPERAÇÃO'], as_index=False).agg({
-        "N° OPERAÇÃO": "min",
-        f"MAQ HR - {nome1}": "sum",
-        f"KG/HR - {nome1}": "sum"
-    })
-else:
-    tabela1_grouped = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", f"MAQ HR - {nome1}", f"KG/HR - {nome1}"])
-
-# Agrupamento de Produto 2
-tabela2_grouped = tabela2.groupby(['OPERAÇÃO'], as_index=False).sum(numeric_only=True)
-
-# Merge das tabelas agrupadas
-comparativo = pd.merge(
-    tabela1_grouped,
-    tabela2_grouped,
-    on=["OPERAÇÃO"],
-    how="outer"
+medicao.marcar("filtragem")
+filtro1 = catalogo.selecionar(
+    ["OPERAÇÃO", "N° OPERAÇÃO", "KG/MH", "MAQ HR"],
+    produto=produto1, revisao=revisao1, linhas=linhaProd1
 )
 
-# Preencher valores ausentes com zero
-for col in [f"MAQ HR - {nome1}", f"MAQ HR - {nome2}", f"KG/HR - {nome1}", f"KG/HR - {nome2}"]:
-    if col not in comparativo.columns:
-        comparativo[col] = 0
-    else:
-        comparativo[col] = comparativo[col].fillna(0)
-
-# Converter "N° OPERAÇÃO" para numérico (ordenação correta)
-comparativo["N° OPERAÇÃO"] = pd.to_numeric(comparativo["N° OPERAÇÃO"], errors='coerce')
-
-# Calcular diferença percentual de MAQ HR
-comparativo["Diferença (%) MAQ HR"] = (
-    (comparativo[f"MAQ HR - {nome1}"] - comparativo[f"MAQ HR - {nome2}"]) /
-    comparativo[f"MAQ HR - {nome1}"].replace(0, pd.NA)
-) * 100
-import pandas as pd
-
-comparativo["Diferença (%) MAQ HR"] = pd.to_numeric(comparativo["Diferença (%) MAQ HR"], errors="coerce").round(2)
-
+filtro2 = catalogo.selecionar(
+    ["OPERAÇÃO", "KG/MH", "MAQ HR"],
+    produto=produto2, revisao=revisao2, linhas=linhaProd2
+)
 
-# Ordenar
-comparativo = comparativo.sort_values(by=["N° OPERAÇÃO", "OPERAÇÃO"], ascending=True, na_position='last')
+# Comparativo por OPERAÇÃO (cálculo em nucleo.comparacao)
+nome1 = f"{produto1}"
+nome2 = f"{produto2}"
 
-# Exibir tabela comparativa
-colunas_exibir = [
-    "N° OPERAÇÃO",
-    "OPERAÇÃO",
-    f"KG/HR - {nome1}",
-    f"KG/HR - {nome2}",
-    f"MAQ HR - {nome1}",
-    f"MAQ HR - {nome2}",
-    "Diferença (%) MAQ HR"
-]
+medicao.marcar("comparativo")
+resultado = comparar_maq_hr(filtro1, filtro2, nome1, nome2)
+comparativo = resultado.tabela
+colunas_exibir = resultado.colunas
 
 if comparativo.empty:
     st.warning("⚠️ Dados insuficientes para gerar o comparativo. Verifique se selecionou corretamente Produto, Revisão e Linha de Produção.")
@@ -157,14 +101,9 @@ else:
     st.dataframe(comparativo[colunas_exibir], hide_index=True)
 
     # Diferença total ponderada
-    soma_maq1 = comparativo[f"MAQ HR - {nome1}"].sum()
-    soma_maq2 = comparativo[f"MAQ HR - {nome2}"].sum()
-    if soma_maq1 != 0:
-        diff_ponderada = ((soma_maq1 - soma_maq2) / soma_maq1) * 100
-        diff_ponderada = round(diff_ponderada, 2)
-    else:
-        diff_ponderada = 0
-    
+    soma_maq1 = resultado.total1
+    soma_maq2 = resultado.total2
+    diff_ponderada = resultado.diferenca_total
 
     coluna1, coluna2, coluna3 = st.columns(3)
 
@@ -190,6 +129,7 @@ else:
     )
 
     # Gráfico de Diferença Percentual
+    medicao.marcar("gráficos")
     grafico_diferenca = alt.Chart(comparativo).mark_bar().encode(
         x=alt.X('OPERAÇÃO:N', sort=None, title='Operação'),
         y=alt.Y('Diferença (%) MAQ HR:Q', title='Diferença (%)'),
@@ -237,15 +177,253 @@ else:
     st.altair_chart(grafico_comparativo, use_container_width=True)
 
     # Exportar Excel
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        comparativo[colunas_exibir].to_excel(writer, index=False, sheet_name='Comparativo')
-
-    output.seek(0)
-
+    medicao.marcar("excel")
+    # (gerado só no clique, em cache pelo conteúdo; ver nucleo.exportacao)
     st.download_button(
         label="📥 Baixar Comparativo em Excel",
-        data=output,
+        data=excel_sob_demanda({"Comparativo": comparativo[colunas_exibir]}),
         file_name=f"comparativo_{produto1}_vs_{produto2}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+# ---------------- COMPARAÇÃO DE VÁRIOS PRODUTOS ----------------
+medicao.marcar("entradas vários produtos")
+st.markdown("---")
+st.header("📊 Comparação de Vários Produtos")
+st.write("Compara qualquer quantidade de seleções (Produto, Revisão e Linha de Produção) contra um produto base, com o mesmo cálculo do comparativo acima.")
+
+if st.checkbox("Ativar comparação de vários produtos"):
+    selecoes_base = pd.DataFrame({
+        "PRODUTO": [produto1, produto2],
+        "REVISÃO": [revisao1, revisao2],
+        "LINHA DE PRODUÇÃO": [None, None]
+    })
+    selecoes_editadas = st.data_editor(
+        selecoes_base,
+        key="selecoes_varios",
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={
+            "PRODUTO": st.column_config.SelectboxColumn("Produto", options=catalogo.produtos()),
+            "REVISÃO": st.column_config.SelectboxColumn(
+                "Revisão", options=catalogo.valores("REVISÃO"), help="Em branco: última revisão do produto"
+            ),
+            "LINHA DE PRODUÇÃO": st.column_config.SelectboxColumn(
+                "Linha", options=catalogo.valores("LINHA DE PRODUÇÃO"), help="Em branco: todas as linhas"
+            ),
+        }
+    )
+    produtos_adicionais = st.multiselect(
+        "Produtos adicionais (última revisão, todas as linhas)", catalogo.produtos(), key="produtos_varios"
+    )
+
+    # Monta as seleções (sem repetir a mesma combinação)
+    selecoes, nomes_selecoes, sem_dados = [], [], []
+    linhas_selecao = list(selecoes_editadas.itertuples(index=False, name=None))
+    linhas_selecao += [(produto, None, None) for produto in produtos_adicionais]
+    for produto, revisao, linha in linhas_selecao:
+        if pd.isna(produto):
+            continue
+        revisoes = catalogo.valores("REVISÃO", produto=produto)
+        revisao = next((r for r in revisoes if r == revisao), revisoes[-1] if revisoes else None)
+        linha = None if pd.isna(linha) else linha
+        nome = f"{produto} / Rev {revisao}" + (f" / {linha}" if linha else "")
+        if nome in nomes_selecoes:
+            continue
+        filtros = {"produto": produto, "revisao": revisao, "linhas": [linha] if linha else None}
+        if catalogo.selecionar(["OPERAÇÃO"], **filtros).empty:
+            sem_dados.append(nome)
+            continue
+        selecoes.append(filtros)
+        nomes_selecoes.append(nome)
+
+    if sem_dados:
+        st.warning(f"⚠️ Seleções sem dados na planta (ignoradas): {', '.join(sem_dados)}")
+
+    if len(selecoes) < 2:
+        st.info("Selecione ao menos dois produtos com dados para comparar.")
+    else:
+        nome_base = st.selectbox("Produto base da comparação", nomes_selecoes)
+
+        # Um único groupby/pivot para todas as seleções (cálculo em nucleo.comparacao)
+        medicao.marcar("comparativo vários produtos")
+        varios = comparar_maq_hr_varios(
+            catalogo.selecionar_varios(selecoes, ["OPERAÇÃO", "N° OPERAÇÃO", "KG/MH", "MAQ HR"]),
+            nomes_selecoes,
+            base=nomes_selecoes.index(nome_base)
+        )
+
+        st.subheader("Totais por Produto")
+        st.dataframe(varios.totais, hide_index=True)
+
+        st.subheader("Comparativo por OPERAÇÃO")
+        st.write(f"(Ordem de N° de Operação está de acordo com {nome_base})")
+        st.dataframe(varios.tabela[varios.colunas], hide_index=True)
+
+        # Mapa de calor: diferença (%) de MAQ HR de cada produto contra a base
+        medicao.marcar("gráfico vários produtos")
+        dados_mapa = (
+            varios.diferencas.drop(columns=nome_base)
+            .rename_axis(index="OPERAÇÃO", columns="Produto")
+            .stack()
+            .rename("Diferença (%)")
+            .reset_index()
+        )
+        grafico_varios = alt.Chart(dados_mapa).mark_rect().encode(
+            x=alt.X("Produto:N", sort=nomes_selecoes, title="Produto"),
+            y=alt.Y("OPERAÇÃO:N", sort=list(varios.diferencas.index), title="Operação"),
+            color=alt.Color(
+                "Diferença (%):Q",
+                scale=alt.Scale(scheme="redyellowgreen", domainMid=0),
+                legend=alt.Legend(title="Diferença (%)")
+            ),
+            tooltip=["OPERAÇÃO", "Produto", "Diferença (%)"]
+        ).properties(height=max(250, 22 * len(varios.diferencas)))
+
+        st.subheader(f"Diferença Percentual de MAQ HR contra {nome_base}")
+        st.altair_chart(grafico_varios, use_container_width=True)
+
+        medicao.marcar("excel vários produtos")
+        st.download_button(
+            label="📥 Baixar Comparativo de Vários Produtos em Excel",
+            data=excel_sob_demanda({"Comparativo": varios.tabela[varios.colunas], "Totais": varios.totais}),
+            file_name="comparativo_varios_produtos.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+# ---------------- PRODUTOS SEMELHANTES ----------------
+medicao.marcar("entradas semelhantes")
+st.markdown("---")
+st.header("🔍 Produtos Semelhantes")
+st.write("Encontra os produtos com perfil de operações (MAQ HR, KG/MH e % REND por operação) mais parecido com um produto existente ou com um perfil hipotético de um item novo.")
+
+if st.checkbox("Ativar busca de produtos semelhantes"):
+    # Índice pré-calculado, reconstruído (só nos produtos alterados) quando a planilha muda
+    monitor.registrar("similaridade", indice_planilha)
+    indice = monitor.obter("similaridade")
+
+    origem_busca = st.radio("Buscar a partir de", ["Produto existente", "Perfil hipotético"], horizontal=True)
+    cols1, cols2, cols3 = st.columns(3)
+    with cols1:
+        distancia = st.selectbox("Distância", ["cosseno", "L1"])
+    with cols2:
+        metricas_busca = st.multiselect("Métricas", METRICAS, default=METRICAS)
+    with cols3:
+        qtd_semelhantes = st.number_input("Quantidade de produtos", min_value=1, max_value=max(len(indice) - 1, 1), value=min(10, max(len(indice) - 1, 1)))
+
+    if not metricas_busca:
+        st.warning("⚠️ Selecione ao menos uma métrica.")
+    elif origem_busca == "Produto existente":
+        produto_busca = st.selectbox("Produto", catalogo.produtos(), index=catalogo.produtos().index(produto1), key="produto_busca")
+        revisao_busca = st.selectbox("Revisão", catalogo.valores("REVISÃO", produto=produto_busca), key="revisao_busca")
+        medicao.marcar("busca semelhantes")
+        semelhantes = indice.semelhantes(produto_busca, revisao_busca, int(qtd_semelhantes), distancia, metricas_busca)
+        st.dataframe(semelhantes, hide_index=True)
+    else:
+        st.write(f"Perfil inicial: {produto1} / Rev {revisao1}. Edite, inclua ou remova operações para descrever o item novo.")
+        perfil = st.data_editor(
+            indice.perfil(produto1, revisao1),
+            key=f"perfil_hipotetico_{produto1}_{revisao1}",
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={
+                "OPERAÇÃO": st.column_config.SelectboxColumn("OPERAÇÃO", options=indice.operacoes, required=True),
+            }
+        )
+        medicao.marcar("busca semelhantes")
+        semelhantes, desconhecidas = indice.semelhantes_perfil(
+            perfil.dropna(subset=["OPERAÇÃO"]), int(qtd_semelhantes), distancia, metricas_busca
+        )
+        if desconhecidas:
+            st.warning(f"⚠️ Operações fora da planta (ignoradas): {', '.join(desconhecidas)}")
+        st.dataframe(semelhantes, hide_index=True)
+
+# ---------------- REVISÕES: ÚLTIMA x ANTERIOR ----------------
+medicao.marcar("entradas revisões")
+st.markdown("---")
+st.header("🧾 Revisões: Última x Anterior (todos os produtos)")
+st.write("Compara a última revisão de cada produto com a anterior, para a planta inteira de uma vez: operações com KG/MH, MAQ HR ou % REND alterados, operações novas ou removidas e o impacto nas horas necessárias por operação.")
+
+if st.checkbox("Ativar diferença de revisões"):
+    # Diferença pré-calculada, reconstruída quando a planilha muda
+    monitor.registrar("revisoes", diferenca_planilha)
+    revisoes = monitor.obter("revisoes")
+
+    if revisoes.revisoes.empty:
+        st.info("Nenhum produto tem mais de uma revisão na planta.")
+    else:
+        colr1, colr2, colr3 = st.columns(3)
+        with colr1:
+            fiacoes_revisao = st.multiselect("FIAÇÃO", sorted(revisoes.resumo["FIAÇÃO"].dropna().unique()), key="fiacoes_revisao")
+        with colr2:
+            situacoes_revisao = st.multiselect("Situação", ["Alterada", "Nova", "Removida"], default=["Alterada", "Nova", "Removida"], key="situacoes_revisao")
+        with colr3:
+            variacao_minima = st.number_input("Variação mínima (%)", min_value=0.0, value=0.0, step=1.0, key="variacao_minima_revisao")
+
+        medicao.marcar("filtro revisões")
+        resumo_revisoes = revisoes.resumo
+        alteracoes = revisoes.alteracoes
+        if fiacoes_revisao:
+            resumo_revisoes = resumo_revisoes[resumo_revisoes["FIAÇÃO"].isin(fiacoes_revisao)]
+            alteracoes = alteracoes[alteracoes["FIAÇÃO"].isin(fiacoes_revisao)]
+        alteracoes = alteracoes[alteracoes["Situação"].isin(situacoes_revisao) & (alteracoes["Maior Variação (%)"] >= variacao_minima)]
+
+        colm1, colm2, colm3 = st.columns(3)
+        with colm1:
+            st.metric("Produtos com revisão anterior", len(resumo_revisoes))
+        with colm2:
+            st.metric("Produtos com alteração", alteracoes["PRODUTO"].nunique())
+        with colm3:
+            st.metric("Operações alteradas/novas/removidas", len(alteracoes))
+
+        st.subheader("Resumo por Produto")
+        st.write("(Ordenado pela variação das horas por tonelada entre as revisões)")
+        st.dataframe(resumo_revisoes, hide_index=True)
+
+        st.subheader("Alterações por Operação")
+        st.write("(Ordenadas pela maior variação entre KG/MH, MAQ HR e % REND; operações novas ou removidas contam como 100%)")
+        st.dataframe(alteracoes, hide_index=True)
+
+        # Impacto nas horas necessárias: por tonelada de cada produto ou com a demanda informada
+        medicao.marcar("impacto revisões")
+        st.subheader("Impacto na Capacidade")
+        arquivo_demanda = st.file_uploader(
+            "Demanda (opcional): arquivo com PRODUTO, REVISÃO e META (toneladas). Sem arquivo, cada produto conta como 1 tonelada.",
+            type=["csv", "xlsx"], key="demanda_revisoes"
+        )
+        demanda_revisoes = None
+        if arquivo_demanda is not None:
+            try:
+                demanda_revisoes = ler_demanda(arquivo_demanda)
+            except ValueError as erro:
+                st.error(f"❌ {erro}")
+        impacto = revisoes.impacto(demanda_revisoes, fiacoes=fiacoes_revisao or None)
+        st.dataframe(impacto, hide_index=True)
+
+        if not impacto.empty:
+            grafico_impacto = alt.Chart(impacto.head(30)).mark_bar().encode(
+                x=alt.X("OPERAÇÃO:N", sort=None, title="Operação"),
+                y=alt.Y("Δ Horas:Q", title="Δ Horas (atual - anterior)"),
+                color=alt.condition(
+                    alt.datum["Δ Horas"] > 0,
+                    alt.value("#dc3545"),  # vermelho: mais horas
+                    alt.value("#28a745")   # verde: menos horas
+                ),
+                tooltip=["OPERAÇÃO", "Produtos Alterados", "Horas (Anterior)", "Horas (Atual)", "Δ Horas", "Variação (%)"]
+            ).properties(height=400).configure_axis(labelAngle=-45)
+            st.caption("Gráfico com as 30 operações de maior impacto; a tabela e a exportação trazem todas.")
+            st.altair_chart(grafico_impacto, use_container_width=True)
+
+        medicao.marcar("excel revisões")
+        st.download_button(
+            label="📥 Baixar Diferença de Revisões em Excel",
+            data=excel_sob_demanda({"Resumo": resumo_revisoes, "Alteracoes": alteracoes, "Impacto_Capacidade": impacto}),
+            file_name="diferenca_revisoes.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+medicao.finalizar()
+with st.sidebar:
+    if st.checkbox("⏱️ Tempos desta execução", key="telemetria"):
+        st.dataframe(medicao.tabela(), hide_index=True)
+        st.caption(f"Total: {medicao.total * 1000:.0f} ms")
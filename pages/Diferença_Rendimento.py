@@ -2,10 +2,18 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import os
-import io
+from nucleo.dados import carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.comparacao import comparar_rendimento
+from nucleo.exportacao import excel_sob_demanda
+from nucleo.rendimento import tabela_planilha
+from nucleo.telemetria import iniciar_medicao
 
 st.set_page_config(page_title="Diferença Rendimento | Paramount Têxteis SI", layout="wide")
 
+# Tempo de cada etapa desta execução (painel na barra lateral e logs/telemetria.jsonl)
+medicao = iniciar_medicao("Diferença Rendimento")
+
 with st.sidebar: 
     st.subheader("ℹ️ Sobre")
     st.info("App desenvolvido para auxiliar na gestão da produção da unidade de Santa Isabel.")
@@ -27,121 +35,63 @@ with st.sidebar:
 # Configuração da página
 st.title("Diferença Rendimento | Produção - Paramount SI")
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    caminho = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
-    df = pd.read_excel(caminho)
-    df = df[["PRODUTO", "REVISÃO", "OPERAÇÃO","LINHA DE PRODUÇÃO", "% REND", "N° OPERAÇÃO"]].dropna()
-    return df
+CAMINHO_PLANILHA = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
 
-dados = carregar_dados()
+# Função para carregar os dados (catálogo indexado, compartilhado entre sessões e
+# recarregado em segundo plano quando a planilha muda)
+def carregar_dados(caminho):
+    df = carregar_colunas(caminho, ["PRODUTO", "REVISÃO", "OPERAÇÃO","LINHA DE PRODUÇÃO", "% REND", "N° OPERAÇÃO"]).dropna()
 
-# Padroniza as colunas
-dados["OPERAÇÃO"] = dados["OPERAÇÃO"].astype(str).str.strip().str.upper()
-dados["N° OPERAÇÃO"] = dados["N° OPERAÇÃO"].astype(str).str.strip()
+    # Padroniza as colunas
+    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+    df["N° OPERAÇÃO"] = df["N° OPERAÇÃO"].astype(str).str.strip()
+    return CatalogoPlanta(df)
 
-# Remove valores nulos da coluna "LINHA DE PRODUÇÃO"
-dados_sem_nulos = dados[dados["LINHA DE PRODUÇÃO"].notna()]
+medicao.marcar("carregar_dados")
+monitor = monitor_planilha(CAMINHO_PLANILHA)
+monitor.registrar("diferenca_rendimento", carregar_dados)
+catalogo = monitor.obter("diferenca_rendimento")
 
 # Seleção de Produtos
+medicao.marcar("seleção")
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Produto 1")
-    produto1 = st.selectbox("Item", sorted(dados["PRODUTO"].unique()), key="produto1")
-    rev1 = sorted(dados[dados["PRODUTO"] == produto1]['REVISÃO'].unique())
+    produto1 = st.selectbox("Item", catalogo.produtos(), key="produto1")
+    rev1 = catalogo.valores("REVISÃO", produto=produto1)
     revisao1 = st.selectbox("Revisão da Planta de Produção", rev1, key="revisao1")
-    linha1 = sorted(dados[dados["PRODUTO"] == produto1]['LINHA DE PRODUÇÃO'].unique())
+    linha1 = catalogo.valores("LINHA DE PRODUÇÃO", produto=produto1)
     linhaProd1 = st.multiselect("Linha de Produção", linha1, key="linhaProd1")
 
 with col2:
     st.subheader("Produto 2")
-    produto2 = st.selectbox("Item", sorted(dados["PRODUTO"].unique()), key="produto2")
-    rev2 = sorted(dados[dados["PRODUTO"] == produto2]['REVISÃO'].unique())
+    produto2 = st.selectbox("Item", catalogo.produtos(), key="produto2")
+    rev2 = catalogo.valores("REVISÃO", produto=produto2)
     revisao2 = st.selectbox("Revisão da Planta de Produção", rev2, key="revisao2")
-    linha2 = sorted(dados[dados["PRODUTO"] == produto2]['LINHA DE PRODUÇÃO'].unique())
+    linha2 = catalogo.valores("LINHA DE PRODUÇÃO", produto=produto2)
     linhaProd2 = st.multiselect("Linha de Produção", linha2, key="linhaProd2")
 
 # Filtragem de dados
-filtro1 = dados_sem_nulos[
-    (dados_sem_nulos["PRODUTO"] == produto1) &
-    (dados_sem_nulos["REVISÃO"] == revisao1) &
-    (dados_sem_nulos["LINHA DE PRODUÇÃO"].isin(linhaProd1))
-][["OPERAÇÃO", "N° OPERAÇÃO", "% REND"]]
-
-filtro2 = dados_sem_nulos[
-    (dados_sem_nulos["PRODUTO"] == produto2) &
-    (dados_sem_nulos["REVISÃO"] == revisao2) &
-    (dados_sem_nulos["LINHA DE PRODUÇÃO"].isin(linhaProd2))
-][["OPERAÇÃO", "% REND"]]
-
-# Renomear colunas
-nome1 = f"{produto1}"
-nome2 = f"{produto2}"
-
-if not filtro1.empty:
-    tabela1 = filtro1.rename(columns={
-        "% REND": f"% REND - {nome1}"
-    })
-else:
-    tabela1 = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", f"% REND - {nome1}"])
-
-if not filtro2.empty:
-    tabela2 = filtro2.rename(columns={
-        "% REND": f"% REND - {nome2}"
-    })
-else:
-    tabela2 = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", f"% REND - {nome1}"])
-
-# Agrupamento de Produto 1 (mantendo menor N° OPERAÇÃO)
-if not tabela1.empty:
-    tabela1_grouped = tabela1.groupby(['OPERAÇÃO'], as_index=False).agg({
-        "N° OPERAÇÃO": "min",
-        f"% REND - {nome1}": "sum"
-    })
-else:
-    tabela1_grouped = pd.DataFrame(columns=["OPERAÇÃO", "N° OPERAÇÃO", f"% REND - {nome1}"])
-
-# Agrupamento de Produto 2
-tabela2_grouped = tabela2.groupby(['OPERAÇÃO'], as_index=False).sum(numeric_only=True)
+medicao.marcar("filtragem")
+filtro1 = catalogo.selecionar(
+    ["OPERAÇÃO", "N° OPERAÇÃO", "% REND"],
+    produto=produto1, revisao=revisao1, linhas=linhaProd1
+)
 
-# Merge das tabelas agrupadas
-comparativo = pd.merge(
-    tabela1_grouped,
-    tabela2_grouped,
-    on=["OPERAÇÃO"],
-    how="outer"
+filtro2 = catalogo.selecionar(
+    ["OPERAÇÃO", "% REND"],
+    produto=produto2, revisao=revisao2, linhas=linhaProd2
 )
 
-# Preencher valores ausentes com zero
-for col in [f"% REND - {nome1}", f"% REND - {nome2}"]:
-    if col not in comparativo.columns:
-        comparativo[col] = 0
-    else:
-        comparativo[col] = comparativo[col].fillna(0)
-
-# Converter "N° OPERAÇÃO" para numérico (ordenação correta)
-comparativo["N° OPERAÇÃO"] = pd.to_numeric(comparativo["N° OPERAÇÃO"], errors='coerce')
-
-# Calcular diferença percentual de MAQ HR
-comparativo["Diferença (%) Rendimento"] = (
-    (comparativo[f"% REND - {nome1}"] - comparativo[f"% REND - {nome2}"]) /
-    comparativo[f"% REND - {nome1}"].replace(0, pd.NA)
-) * 100
-comparativo["Diferença (%) Rendimento"] = comparativo["Diferença (%) Rendimento"].round(2)
-
-# Ordenar
-comparativo = comparativo.sort_values(by=["N° OPERAÇÃO", "OPERAÇÃO"], ascending=True, na_position='last')
-
-# Exibir tabela comparativa
-colunas_exibir = [
-    "N° OPERAÇÃO",
-    "OPERAÇÃO",
-    f"% REND - {nome1}",
-    f"% REND - {nome2}",
-    "Diferença (%) Rendimento"
-]
+# Comparativo por OPERAÇÃO (cálculo em nucleo.comparacao)
+nome1 = f"{produto1}"
+nome2 = f"{produto2}"
+
+medicao.marcar("comparativo")
+resultado = comparar_rendimento(filtro1, filtro2, nome1, nome2)
+comparativo = resultado.tabela
+colunas_exibir = resultado.colunas
 
 if comparativo.empty:
     st.warning("⚠️ Dados insuficientes para gerar o comparativo. Verifique se selecionou corretamente Produto, Revisão e Linha de Produção.")
@@ -151,27 +101,78 @@ else:
     st.dataframe(comparativo[colunas_exibir], hide_index=True)
 
     # Diferença total ponderada
-    soma_maq1 = comparativo[f"% REND - {nome1}"].sum()
-    soma_maq2 = comparativo[f"% REND - {nome2}"].sum()
-    if soma_maq1 != 0:
-        diff_ponderada = ((soma_maq1 - soma_maq2) / soma_maq1) * 100
-        diff_ponderada = round(diff_ponderada, 2)
-    else:
-        diff_ponderada = 0
+    diff_ponderada = resultado.diferenca_total
 
     st.subheader("📌 Diferença Percentual Total (Ponderada)")
     st.metric(label="Diferença Total (%)", value=f"{diff_ponderada}%")
   
     # Exportar Excel
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        comparativo[colunas_exibir].to_excel(writer, index=False, sheet_name='Comparativo')
-
-    output.seek(0)
-
+    medicao.marcar("excel")
+    # (gerado só no clique, em cache pelo conteúdo; ver nucleo.exportacao)
     st.download_button(
         label="📥 Baixar Comparativo em Excel",
-        data=output,
+        data=excel_sob_demanda({"Comparativo": comparativo[colunas_exibir]}),
         file_name=f"comparativo_{produto1}_vs_{produto2}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+# ---------------- RENDIMENTO ACUMULADO NO ROTEIRO ----------------
+medicao.marcar("rendimento acumulado")
+st.markdown("---")
+st.header("📈 Rendimento Acumulado no Roteiro")
+st.write("Rendimento acumulado operação a operação (ordem do N° OPERAÇÃO) e quantos kg precisam entrar em cada operação para sair 1 kg de produto acabado. A primeira operação mostra a matéria-prima necessária por kg final.")
+
+# Tabela de todas as rotas (PRODUTO, REVISÃO, LINHA), calculada uma vez por versão da planilha
+monitor.registrar("rendimento_acumulado", tabela_planilha)
+rendimentos = monitor.obter("rendimento_acumulado")
+
+colunas_rota = ["N° OPERAÇÃO", "OPERAÇÃO", "% REND", "Rendimento Acumulado (%)", "Kg Entrada / Kg Final"]
+colr1, colr2 = st.columns(2)
+for coluna, produto, revisao, indice_produto in ((colr1, produto1, revisao1, 1), (colr2, produto2, revisao2, 2)):
+    with coluna:
+        st.subheader(f"Produto {indice_produto} - {produto}")
+        linha_rota = st.selectbox("Linha de Produção", rendimentos.linhas(produto, revisao), key=f"linha_rendimento{indice_produto}")
+        rota = rendimentos.rota(produto, revisao, linha_rota)
+        if rota.empty:
+            st.warning("⚠️ Roteiro sem operações para esta seleção.")
+            continue
+        st.metric("Matéria-prima por kg final (kg)", f"{rota['Kg Entrada / Kg Final'].iloc[0]:.3f}")
+        st.metric("Rendimento total (%)", f"{rota['Rendimento Acumulado (%)'].iloc[-1]:.2f}%")
+        if not rota["REND Informado"].all():
+            st.caption(f"{(~rota['REND Informado']).sum()} operação(ões) sem % REND consideradas com 100%.")
+        st.dataframe(rota[colunas_rota], hide_index=True)
+
+# What-if: novos % REND por operação, recalculados em todas as rotas que passam por elas
+if st.checkbox("Simular alteração de rendimento"):
+    st.write("Informe o novo % REND das operações; o impacto é calculado para todos os produtos, revisões e linhas que passam por elas.")
+    alteracoes = st.data_editor(
+        pd.DataFrame({"OPERAÇÃO": pd.Series(dtype="object"), "Novo % REND": pd.Series(dtype="float")}),
+        key="alteracoes_rendimento",
+        num_rows="dynamic",
+        hide_index=True,
+        column_config={
+            "OPERAÇÃO": st.column_config.SelectboxColumn("OPERAÇÃO", options=sorted(rendimentos.tabela["OPERAÇÃO"].unique())),
+            "Novo % REND": st.column_config.NumberColumn("Novo % REND", min_value=0.0, max_value=100.0),
+        }
+    )
+    alteracoes = alteracoes.dropna()
+    if alteracoes.empty:
+        st.info("Inclua ao menos uma operação com o novo % REND.")
+    else:
+        medicao.marcar("what-if rendimento")
+        impacto = rendimentos.simular(dict(zip(alteracoes["OPERAÇÃO"], alteracoes["Novo % REND"])))
+        impacto = impacto.sort_values("Variação (%)")
+        st.metric("Rotas afetadas", len(impacto))
+        st.dataframe(impacto, hide_index=True)
+        st.download_button(
+            label="📥 Baixar Impacto em Excel",
+            data=excel_sob_demanda({"Impacto_Rendimento": impacto}),
+            file_name="impacto_rendimento.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+medicao.finalizar()
+with st.sidebar:
+    if st.checkbox("⏱️ Tempos desta execução", key="telemetria"):
+        st.dataframe(medicao.tabela(), hide_index=True)
+        st.caption(f"Total: {medicao.total * 1000:.0f} ms")
@@ -1,7 +1,19 @@
 import streamlit as st
 import pandas as pd
+import altair as alt
+import numpy as np
 import os
-import io
+from nucleo.dados import carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.cenarios import ArmazemCenarios
+from nucleo.pcp import (
+    COLUNAS_DEMANDA, COLUNAS_PLANTA, COMBINACOES_TURNOS, configuracao_padrao, ler_demanda, mesclar_configuracao,
+    operacoes_planta, otimizar_capacidade, preparar_planta
+)
+from nucleo.recalculo import RecalculoPCP
+from nucleo.programacao import conclusao_pedidos, fator_calendario, montar_tarefas, programar
+from nucleo.exportacao import excel_sob_demanda
+from nucleo.telemetria import iniciar_medicao
 
 def check_password():
     def password_entered():
@@ -25,6 +37,10 @@ if not check_password():
     st.stop()
 
 st.set_page_config(page_title="Horas Disponíveis por Máquina", layout="wide")
+
+# Tempo de cada etapa desta execução (painel na barra lateral e logs/telemetria.jsonl)
+medicao = iniciar_medicao("PCP")
+
 st.title("⚙️ Cálculo de Horas Disponíveis por OPERAÇÃO")
 
 with st.sidebar: 
@@ -50,34 +66,35 @@ CAMINHO_PLANILHA = os.path.join(
     "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx"
 )
 
-@st.cache_data
-def carregar_dados():
-    df = pd.read_excel(CAMINHO_PLANILHA)
-    df = df[["N° OPERAÇÃO", "OPERAÇÃO", "N° FUSOS", "KG/MH", "PRODUTO", "FIAÇÃO", "LINHA DE PRODUÇÃO", "REVISÃO"]].dropna()
-    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
-    df["N° OPERAÇÃO"] = df["N° OPERAÇÃO"].astype(int)
-    df["FIAÇÃO"] = df["FIAÇÃO"].astype(str).str.strip().str.upper()
-    df["LINHA DE PRODUÇÃO"] = df["LINHA DE PRODUÇÃO"].astype(str).str.strip().str.upper()
-    
-    df_agrupado = (
-        df.groupby("OPERAÇÃO")
-        .agg({
-            "N° FUSOS": "first",
-            "KG/MH": "first"
-        })
-        .reset_index()
-        .sort_values(by="OPERAÇÃO")
-    )
-    return df, df_agrupado
+# Catálogo indexado, compartilhado entre sessões (somente leitura) e
+# recarregado em segundo plano quando a planilha muda
+def carregar_dados(caminho):
+    df = preparar_planta(carregar_colunas(caminho, COLUNAS_PLANTA))
+    return CatalogoPlanta(df), operacoes_planta(df)
 
-df_raw, df = carregar_dados()
+medicao.marcar("carregar_dados")
+monitor = monitor_planilha(CAMINHO_PLANILHA)
+monitor.registrar("pcp", carregar_dados)
+catalogo, operacoes = monitor.obter("pcp")
 
+# Cenários salvos (SQLite local, ver nucleo/cenarios.py)
+armazem = ArmazemCenarios()
+
+medicao.marcar("filtragem")
 st.markdown("---")
-fiações_disponíveis = df_raw["FIAÇÃO"].dropna().unique()
-fiação_selecionada = st.selectbox("Filtrar por FIAÇÃO", sorted(fiações_disponíveis))
+fiações_disponíveis = catalogo.valores("FIAÇÃO")
+fiação_selecionada = st.selectbox("Filtrar por FIAÇÃO", fiações_disponíveis, key="fiacao")
+
+df_raw = catalogo.selecionar(fiacao=fiação_selecionada)
+df = operacoes[operacoes["OPERAÇÃO"].isin(df_raw["OPERAÇÃO"].unique())]
 
-df_raw = df_raw[df_raw["FIAÇÃO"] == fiação_selecionada]
-df = df[df["OPERAÇÃO"].isin(df_raw["OPERAÇÃO"].unique())]
+# Etapas do PCP com os resultados guardados entre execuções (ver
+# nucleo/recalculo.py): um por sessão, refeito ao trocar a FIAÇÃO ou quando a
+# planilha é recarregada
+chave_recalculo = (fiação_selecionada, monitor.versao)
+if st.session_state.get("recalculo_pcp", (None, None))[0] != chave_recalculo:
+    st.session_state["recalculo_pcp"] = (chave_recalculo, RecalculoPCP(df_raw))
+recalculo = st.session_state["recalculo_pcp"][1]
 
 #st.markdown("---")
 #linhas_producao_disponiveis = df_raw["LINHA DE PRODUÇÃO"].dropna().unique()
@@ -88,217 +105,489 @@ df = df[df["OPERAÇÃO"].isin(df_raw["OPERAÇÃO"].unique())]
 #df = df[df["OPERAÇÃO"].isin(df_raw["OPERAÇÃO"].unique())]
 
 # ---------------- CONFIGURAÇÕES GERAIS ----------------
-dias_uteis = st.number_input("Dias Úteis", min_value=1, max_value=31, value=25)
-absenteismo_geral = st.number_input("Absenteísmo (%)", 0, 100, 5)
-novatos_geral = st.number_input("Novatos (%)", 0, 100, 10)
+medicao.marcar("configuração")
+dias_uteis = st.number_input("Dias Úteis", min_value=1, max_value=31, value=25, key="dias_uteis")
+absenteismo_geral = st.number_input("Absenteísmo (%)", 0, 100, 5, key="absenteismo_geral")
+novatos_geral = st.number_input("Novatos (%)", 0, 100, 10, key="novatos_geral")
 
+# ---------------- NOVA FUNCIONALIDADE: META POR PRODUTO ----------------
+medicao.marcar("demanda")
 st.markdown("---")
-st.subheader("⚙️ Configurações Individuais por OPERAÇÃO")
-
-resultados = []
-
-for idx, row in df.iterrows():
-    operacao = row["OPERAÇÃO"]
-    total_fusos = row["N° FUSOS"]
-
-    turnos_padrao = ["A", "B", "C"]
-    maq_padrao = 1
-    fusos_padrao = 0.0
-    eficiencia_padrao = 85
-    almoco_padrao = "Sim"
-    pico_padrao = "Não"
-
-    turnos = st.session_state.get(f"turnos_{idx}", turnos_padrao)
-    maquinas = st.session_state.get(f"maq_{idx}", maq_padrao)
-    fusos_parados = st.session_state.get(f"fuso_{idx}", fusos_padrao)
-    eficiencia = st.session_state.get(f"efi_{idx}", eficiencia_padrao)
-    almoco = st.session_state.get(f"almoco_{idx}", almoco_padrao)
-    pico = st.session_state.get(f"pico_{idx}", pico_padrao)
-
-    editado = (
-        turnos != turnos_padrao or
-        maquinas != maq_padrao or
-        fusos_parados != fusos_padrao or
-        eficiencia != eficiencia_padrao or
-        almoco != almoco_padrao or
-        pico != pico_padrao
-    )
+st.header("Horas Necessárias por Produto")
 
-    with st.expander(f"{'✔️' if editado else '⚙️'} OPERAÇÃO: {operacao}", expanded=False):
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            turnos = st.multiselect(f"Turnos - {operacao}", ["A", "B", "C"], default=turnos, key=f"turnos_{idx}")
-            total_turno_horas = len(turnos) * 8
-            maquinas = st.number_input(f"Máquinas - {operacao}", min_value=1, value=maquinas, key=f"maq_{idx}")
-        with col2:
-            almoco = st.radio(f"Almoço - {operacao}", ["Sim", "Não"], index=["Sim", "Não"].index(almoco), key=f"almoco_{idx}")
-            pico = st.radio(f"Pico - {operacao}", ["Sim", "Não"], index=["Sim", "Não"].index(pico), key=f"pico_{idx}")
-        with col3:
-            eficiencia = st.number_input(f"Eficiência % - {operacao}", 1, 100, value=eficiencia, key=f"efi_{idx}")
-            fusos_parados = st.number_input(
-                f"Fusos Parados - {operacao} - Total Fusos {total_fusos}",
-                min_value=0.0,
-                max_value=float(total_fusos),
-                value=fusos_parados,
-                key=f"fuso_{idx}"
-            )
+# Produtos e revisões vêm dos índices do catálogo (sem filtrar df_raw a cada produto)
+produtos_fiacao = catalogo.produtos(fiacao=fiação_selecionada)
+
+origem_demanda = st.radio(
+    "Origem da demanda", ["Manual", "Importar arquivo (CSV/XLSX)", "Cenário salvo"], horizontal=True, key="origem_demanda"
+)
+
+if origem_demanda == "Manual":
+    num_produtos = st.number_input("Quantidade de Produtos a Simular", min_value=1, max_value=30, value=1, step=1)
+
+    produtos_selecionados = []
+    for i in range(int(num_produtos)):
+        with st.expander(f"🛠️ Produto {i+1}"):
+            produto = st.selectbox(f"Selecione o Produto - Produto {i+1}", produtos_fiacao, key=f"produto_{i}")
 
-        almoco_h = len(turnos) * 1.0 if almoco == "Sim" else 0.0
-        pico_h = 3.0 if pico == "Sim" and "B" in turnos else 0.0
+            revisoes_disponiveis = catalogo.valores("REVISÃO", fiacao=fiação_selecionada, produto=produto)
+            revisao = st.selectbox(f"Selecione a Revisão - Produto {i+1}", revisoes_disponiveis, key=f"revisao_{i}")
 
-        fator_fusos = (total_fusos - fusos_parados) / total_fusos if total_fusos else 1.0
-        horas_liquidas = (total_turno_horas - almoco_h - pico_h) * fator_fusos
+            meta_ton = st.number_input(f"Meta de Produção (toneladas) para Produto {i+1}", min_value=0.0, step=1.0, key=f"meta_{i}")
 
-        fator_final = (1 - absenteismo_geral / 100) * (1 - novatos_geral / 200) * (eficiencia / 100)
-        horas_disp = dias_uteis * horas_liquidas * fator_final * maquinas
+            produtos_selecionados.append({
+                "PRODUTO": produto,
+                "REVISÃO": revisao,
+                "Meta (ton)": meta_ton
+            })
 
-        resultados.append({
-            "OPERAÇÃO": operacao,
-            "Turnos": ", ".join(turnos),
-            "Almoço": almoco,
-            "Pico": pico,
-            "Eficiência %": eficiencia,
-            "Fusos Parados": fusos_parados,
-            "Qntd Máquinas": maquinas,
-            "Absenteismo %": absenteismo_geral,
-            "Novatos %": novatos_geral,
-            "Horas líquidas/dia": round(horas_liquidas, 2),
-            "Horas Disponíveis (Total)": round(horas_disp, 2)
-        })
+    demanda = pd.DataFrame(produtos_selecionados, columns=COLUNAS_DEMANDA)
+elif origem_demanda == "Cenário salvo":
+    # Demanda restaurada de um cenário (seção "Cenários Salvos", no fim da página)
+    demanda = st.session_state.get("demanda_cenario", pd.DataFrame(columns=COLUNAS_DEMANDA))
+    if demanda.empty:
+        st.info("Carregue um cenário em \"💾 Cenários Salvos\", no fim da página.")
+    else:
+        st.caption(f"Demanda do cenário \"{st.session_state.get('nome_cenario_carregado', '')}\" ({len(demanda)} linha(s)).")
+        st.dataframe(demanda, hide_index=True)
+else:
+    st.write("O arquivo deve ter as colunas **PRODUTO**, **REVISÃO** e **META** (toneladas), uma linha por produto/revisão.")
+    arquivo_demanda = st.file_uploader("Arquivo de demanda", type=["csv", "xlsx"])
+    demanda = pd.DataFrame(columns=COLUNAS_DEMANDA)
+    if arquivo_demanda is not None:
+        try:
+            demanda = ler_demanda(arquivo_demanda)
+        except ValueError as erro:
+            st.error(f"❌ {erro}")
+
+# Calcular horas necessárias (só as linhas da demanda que mudaram desde a última execução)
+medicao.marcar("horas necessárias (incremental)")
+df_produtos, demanda_sem_planta = recalculo.horas_necessarias(demanda)
+
+if not demanda_sem_planta.empty:
+    st.warning(f"⚠️ {len(demanda_sem_planta)} linha(s) da demanda sem PRODUTO/REVISÃO na FIAÇÃO {fiação_selecionada}:")
+    st.dataframe(demanda_sem_planta, hide_index=True)
+
+if not df_produtos.empty:
+    st.subheader("📈 Horas Necessárias por Produto e Operação")
+    st.dataframe(df_produtos, hide_index=True)
 
-df_resultado = pd.DataFrame(resultados)
-df_resultado = df_resultado.sort_values(by="OPERAÇÃO")
+    # Os arquivos Excel da página só são gerados no clique (em cache pelo conteúdo)
+    medicao.marcar("excel necessárias")
+    st.download_button(
+        "📥 Baixar Resultado em Excel (Horas Necessárias)",
+        data=excel_sob_demanda({"Horas_Necessarias": df_produtos}),
+        file_name="horas_necessarias_por_operacao.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-st.subheader("Horas Disponiveis por Máquina")
-st.dataframe(df_resultado, hide_index=True)
+# Agrupar horas necessárias por operação
+medicao.marcar("necessárias por operação")
+df_necessarias_agrupadas = recalculo.horas_necessarias_por_operacao()
+
+
+# ---------------- FRAGMENTOS ----------------
+# Daqui para baixo a página é dividida em fragmentos (st.fragment), que
+# reexecutam sozinhos quando um widget deles muda. As dependências seguem o
+# aninhamento: tudo recebe da página (FIAÇÃO, parâmetros gerais e demanda)
+# como argumento; o fragmento de capacidade passa a configuração aos
+# fragmentos de otimização e programação, que ficam dentro dele.
+#   - editar a configuração: reexecuta capacidade (horas disponíveis e
+#     ocupação) e os fragmentos dentro dele (otimização e programação), sem
+#     refazer a demanda nem as horas necessárias;
+#   - mexer na otimização, na programação ou nos cenários salvos: reexecuta
+#     só aquele fragmento;
+#   - FIAÇÃO, parâmetros gerais ou demanda: a página inteira.
+# Dentro de cada execução, o recalculo só refaz as etapas cujas entradas
+# mudaram (ex.: trocar um parâmetro geral não refaz as horas necessárias, e
+# rerun sem mudança nenhuma reaproveita disponíveis e ocupação).
+# Cada fragmento tem a sua medição ("PCP · <fragmento>" no log de telemetria).
+
+# Tempo do fragmento, quando o painel de tempos da barra lateral está ativo
+def mostrar_tempo_fragmento(medicao_fragmento):
+    medicao_fragmento.finalizar()
+    if st.session_state.get("telemetria"):
+        st.caption(f"⏱️ {medicao_fragmento.pagina}: {medicao_fragmento.total * 1000:.0f} ms")
+
+
+@st.fragment
+def capacidade(fiacao, dias_uteis, absenteismo_geral, novatos_geral, df, df_raw, demanda, df_necessarias_agrupadas, recalculo):
+    medicao_fragmento = iniciar_medicao("PCP · Capacidade")
+    medicao_fragmento.marcar("configuração")
+    st.markdown("---")
+    st.subheader("⚙️ Configurações Individuais por OPERAÇÃO")
+    st.write("Edite diretamente na tabela os turnos, máquinas, almoço, pico, eficiência e fusos parados de cada operação.")
+
+    # Uma única tabela editável (em vez de um expander com seis widgets por operação);
+    # as edições ficam guardadas por FIAÇÃO no session_state do data_editor.
+    # A tabela base pode ser trocada (ex.: sugestão da otimização) via chave_base.
+    chave_config = f"config_operacoes_{fiacao}"
+    chave_base = f"config_base_{fiacao}"
+    config = st.data_editor(
+        st.session_state.get(chave_base, configuracao_padrao(df)),
+        key=chave_config,
+        hide_index=True,
+        disabled=["OPERAÇÃO", "N° FUSOS"],
+        column_config={
+            "N° FUSOS": st.column_config.NumberColumn("Total Fusos"),
+            "Turno A": st.column_config.CheckboxColumn("Turno A"),
+            "Turno B": st.column_config.CheckboxColumn("Turno B"),
+            "Turno C": st.column_config.CheckboxColumn("Turno C"),
+            "Qntd Máquinas": st.column_config.NumberColumn("Máquinas", min_value=1, step=1, required=True),
+            "Almoço": st.column_config.SelectboxColumn("Almoço", options=["Sim", "Não"], required=True),
+            "Pico": st.column_config.SelectboxColumn("Pico", options=["Sim", "Não"], required=True),
+            "Eficiência %": st.column_config.NumberColumn("Eficiência %", min_value=1, max_value=100, step=1, required=True),
+            "Fusos Parados": st.column_config.NumberColumn("Fusos Parados", min_value=0.0, required=True),
+        }
+    )
 
-output = io.BytesIO()
-with pd.ExcelWriter(output, engine="openpyxl") as writer:
-    df_resultado.to_excel(writer, index=False, sheet_name="Horas_Disponiveis")
+    # Horas disponíveis de todas as operações em uma única expressão vetorizada,
+    # refeita só quando a configuração ou os parâmetros gerais mudam
+    medicao_fragmento.marcar("horas disponíveis")
+    df_resultado = recalculo.horas_disponiveis(config, dias_uteis, absenteismo_geral, novatos_geral)
 
-output.seek(0)
-st.download_button("📥 Baixar Resultado em Excel", data=output,
-                   file_name="horas_disponiveis_por_operacao.xlsx",
-                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    st.subheader("Horas Disponiveis por Máquina")
+    st.dataframe(df_resultado, hide_index=True)
 
-# ---------------- NOVA FUNCIONALIDADE: META POR PRODUTO ----------------
-st.markdown("---")
-st.header("Horas Necessárias por Produto")
+    medicao_fragmento.marcar("excel disponíveis")
+    st.download_button("📥 Baixar Resultado em Excel", data=excel_sob_demanda({"Horas_Disponiveis": df_resultado}),
+                       file_name="horas_disponiveis_por_operacao.xlsx",
+                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
-# Agrupar produtos e revisões disponíveis
-produtos_revisoes = df_raw[["PRODUTO", "REVISÃO"]].drop_duplicates()
+    # ---------------- COMPARAÇÃO FINAL: SOMA TOTAL DE HORAS NECESSÁRIAS x HORAS DISPONÍVEIS ----------------
+    medicao_fragmento.marcar("ocupação")
+    st.markdown("---")
+    st.header("Verificação Final por Ocupação")
 
-num_produtos = st.number_input("Quantidade de Produtos a Simular", min_value=1, max_value=30, value=1, step=1)
+    # Horas necessárias x disponíveis, diferença, ocupação e status
+    df_checagem = recalculo.verificar_ocupacao(config, dias_uteis, absenteismo_geral, novatos_geral)
 
-produtos_selecionados = []
-for i in range(int(num_produtos)):
-    with st.expander(f"🛠️ Produto {i+1}"):
-        produto = st.selectbox(f"Selecione o Produto - Produto {i+1}", sorted(produtos_revisoes["PRODUTO"].unique()), key=f"produto_{i}")
+    st.dataframe(df_checagem, hide_index=True)
 
-        revisoes_disponiveis = produtos_revisoes[produtos_revisoes["PRODUTO"] == produto]["REVISÃO"].unique()
-        revisao = st.selectbox(f"Selecione a Revisão - Produto {i+1}", sorted(revisoes_disponiveis), key=f"revisao_{i}")
+    # Exportar resultado final
+    medicao_fragmento.marcar("excel ocupação")
+    st.download_button(
+        "📥 Baixar Verificação Final (Agrupada)",
+        data=excel_sob_demanda({"Viabilidade_Final": df_checagem}),
+        file_name="verificacao_final_viabilidade.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-        meta_ton = st.number_input(f"Meta de Produção (toneladas) para Produto {i+1}", min_value=0.0, step=1.0, key=f"meta_{i}")
+    medicao_fragmento.marcar("otimização")
+    otimizacao(config, chave_config, chave_base, dias_uteis, absenteismo_geral, novatos_geral, df_necessarias_agrupadas)
 
-        produtos_selecionados.append({
-            "Produto": produto,
-            "Revisao": revisao,
-            "Meta_ton": meta_ton
-        })
+    medicao_fragmento.marcar("programação")
+    programacao(config, fiacao, absenteismo_geral, novatos_geral, df_raw, demanda)
 
-# Calcular horas necessárias
-resultados_produtos = []
+    medicao_fragmento.marcar("cenários")
+    cenarios(config, fiacao, dias_uteis, absenteismo_geral, novatos_geral, demanda, df_resultado, df_checagem)
 
-for produto_info in produtos_selecionados:
-    produto = produto_info["Produto"]
-    meta = produto_info["Meta_ton"]
+    mostrar_tempo_fragmento(medicao_fragmento)
 
-    df_filtrado = df_raw[(df_raw["PRODUTO"] == produto) & (df_raw["REVISÃO"] == revisao)]
 
-    for _, row in df_filtrado.iterrows():
-        operacao = row["OPERAÇÃO"]
-        kg_mh = row["KG/MH"]
+# ---------------- OTIMIZAÇÃO DE CAPACIDADE ----------------
+@st.fragment
+def otimizacao(config, chave_config, chave_base, dias_uteis, absenteismo_geral, novatos_geral, df_necessarias_agrupadas):
+    medicao_fragmento = iniciar_medicao("PCP · Otimização")
+    medicao_fragmento.marcar("otimização")
+    st.markdown("---")
+    st.header("🧮 Otimização de Capacidade")
+    st.write("Calcula a menor quantidade de máquinas x turnos que torna viável cada operação com demanda, mantendo almoço, pico, eficiência e fusos parados da configuração acima.")
+
+    colo1, colo2 = st.columns(2)
+    with colo1:
+        combinacoes_permitidas = st.multiselect("Combinações de turnos permitidas", COMBINACOES_TURNOS, default=COMBINACOES_TURNOS)
+    with colo2:
+        limitar_maquinas = st.number_input("Máx. máquinas por operação (0 = sem limite)", min_value=0, value=0, step=1)
+
+    if df_necessarias_agrupadas.empty:
+        st.info("Informe a demanda em \"Horas Necessárias por Produto\" para otimizar.")
+    elif not combinacoes_permitidas:
+        st.warning("⚠️ Selecione ao menos uma combinação de turnos.")
+    else:
+        config_otimizada, resumo_otimizacao = otimizar_capacidade(
+            config, df_necessarias_agrupadas, dias_uteis, absenteismo_geral, novatos_geral,
+            combinacoes=combinacoes_permitidas,
+            maquinas_max=limitar_maquinas or None
+        )
+        st.dataframe(resumo_otimizacao, hide_index=True)
+
+        sem_solucao = (resumo_otimizacao["Status"] != "✅ Viável").sum()
+        if sem_solucao:
+            st.warning(f"⚠️ {sem_solucao} operação(ões) sem solução com as combinações e o limite de máquinas informados.")
+
+        # A configuração fica no fragmento de capacidade (acima deste), então
+        # aplicar a sugestão reexecuta a página
+        if st.button("✅ Aplicar sugestão na tabela de configuração"):
+            st.session_state[chave_base] = config_otimizada
+            st.session_state.pop(chave_config, None)
+            medicao_fragmento.finalizar()
+            st.rerun()
+
+    mostrar_tempo_fragmento(medicao_fragmento)
+
+
+# ---------------- PROGRAMAÇÃO COM CAPACIDADE FINITA ----------------
+@st.fragment
+def programacao(config, fiacao, absenteismo_geral, novatos_geral, df_raw, demanda):
+    medicao_fragmento = iniciar_medicao("PCP · Programação")
+    medicao_fragmento.marcar("pedidos")
+    st.markdown("---")
+    st.header("📅 Programação da Produção (Capacidade Finita)")
+    st.write(
+        "Sequencia os pedidos da demanda pelo roteiro de cada produto (ordem do N° OPERAÇÃO), "
+        "respeitando a quantidade de máquinas de cada operação. A duração de cada operação usa as horas "
+        "produtivas por dia da configuração acima."
+    )
+
+    pedidos_base = demanda[demanda["Meta (ton)"] > 0].reset_index(drop=True)
+
+    if pedidos_base.empty:
+        st.info("Informe a demanda em \"Horas Necessárias por Produto\" para programar.")
+        mostrar_tempo_fragmento(medicao_fragmento)
+        return
+
+    linhas_fiacao = sorted({
+        parte.strip() for linha in df_raw["LINHA DE PRODUÇÃO"].unique() for parte in str(linha).split("&")
+    })
+    pedidos = st.data_editor(
+        pedidos_base.assign(**{
+            "Pedido": range(1, len(pedidos_base) + 1),
+            "LINHA DE PRODUÇÃO": None,
+            "Prioridade": 0,
+            "Liberação (dia)": 0.0
+        })[["Pedido", "PRODUTO", "REVISÃO", "Meta (ton)", "LINHA DE PRODUÇÃO", "Prioridade", "Liberação (dia)"]],
+        key=f"pedidos_programacao_{fiacao}",
+        hide_index=True,
+        disabled=["Pedido", "PRODUTO", "REVISÃO", "Meta (ton)"],
+        column_config={
+            "LINHA DE PRODUÇÃO": st.column_config.SelectboxColumn(
+                "Linha", options=linhas_fiacao, help="Em branco: primeira linha do roteiro do produto"
+            ),
+            "Prioridade": st.column_config.NumberColumn("Prioridade", step=1, help="Menor valor é programado primeiro"),
+            "Liberação (dia)": st.column_config.NumberColumn("Liberação (dia)", min_value=0.0),
+        }
+    )
+    data_inicio = st.date_input("Início da programação")
+
+    medicao_fragmento.marcar("programação")
+    tarefas = montar_tarefas(df_raw, pedidos)
+    programa = programar(
+        tarefas,
+        maquinas=dict(zip(config["OPERAÇÃO"], config["Qntd Máquinas"].fillna(1).astype(int))),
+        fator_tempo=fator_calendario(config, absenteismo_geral, novatos_geral),
+        liberacao=dict(zip(pedidos["Pedido"], pedidos["Liberação (dia)"].fillna(0) * 24)),
+        prioridade=dict(zip(pedidos["Pedido"], pedidos["Prioridade"].fillna(0)))
+    )
 
-        if kg_mh > 0:
-            horas_necessarias = (meta * 1000) / kg_mh
-        else:
-            horas_necessarias = 0.0
-
-        resultados_produtos.append({
-            "Produto": produto,
-            "OPERAÇÃO": operacao,
-            "KG/MH": kg_mh,
-            "Meta (ton)": meta,
-            "Horas Necessárias": round(horas_necessarias, 2)
-        })
-
-if resultados_produtos:
-    df_produtos = pd.DataFrame(resultados_produtos)
-    st.subheader("📈 Horas Necessárias por Produto e Operação")
-    st.dataframe(df_produtos, hide_index=True)
+    sem_horas = sorted(programa.loc[~np.isfinite(programa["Fim (h)"]), "OPERAÇÃO"].unique())
+    if sem_horas:
+        st.warning(f"⚠️ Operações sem horas produtivas (nenhum turno ou eficiência zero): {', '.join(sem_horas)}")
+    programa = programa[np.isfinite(programa["Fim (h)"])]
 
-    output_produtos = io.BytesIO()
-    with pd.ExcelWriter(output_produtos, engine="openpyxl") as writer:
-        df_produtos.to_excel(writer, index=False, sheet_name="Horas_Necessarias")
-    output_produtos.seek(0)
+    origem = pd.Timestamp(data_inicio)
+    programa = programa.assign(
+        Início=origem + pd.to_timedelta(programa["Início (h)"], unit="h"),
+        Fim=origem + pd.to_timedelta(programa["Fim (h)"], unit="h")
+    )
+    conclusao = conclusao_pedidos(programa)
+    conclusao["Conclusão"] = origem + pd.to_timedelta(conclusao["Conclusão (h)"], unit="h")
+
+    colp1, colp2 = st.columns(2)
+    colp1.metric("Operações programadas", len(programa))
+    if not conclusao.empty:
+        colp2.metric("Conclusão do último pedido", conclusao["Conclusão"].max().strftime("%d/%m/%Y %H:%M"))
+
+    # Gráfico de Gantt por operação (limitado para o navegador continuar leve)
+    medicao_fragmento.marcar("gráfico gantt")
+    limite_gantt = 300
+    pedidos_gantt = conclusao["Pedido"].head(limite_gantt)
+    if len(conclusao) > limite_gantt:
+        st.caption(f"Gantt exibindo os primeiros {limite_gantt} pedidos; a exportação traz todos.")
+    gantt = alt.Chart(programa[programa["Pedido"].isin(pedidos_gantt)]).mark_bar().encode(
+        x=alt.X("Início:T", title="Data"),
+        x2="Fim:T",
+        y=alt.Y("OPERAÇÃO:N", title="Operação"),
+        color=alt.Color("Pedido:N", legend=None),
+        tooltip=["Pedido", "PRODUTO", "REVISÃO", "OPERAÇÃO", "Máquina",
+                 alt.Tooltip("Início:T", format="%d/%m %H:%M"), alt.Tooltip("Fim:T", format="%d/%m %H:%M")]
+    ).properties(height=max(250, 22 * programa["OPERAÇÃO"].nunique()))
+    st.altair_chart(gantt, use_container_width=True)
+
+    st.subheader("Conclusão por Pedido")
+    st.dataframe(conclusao, hide_index=True)
+
+    medicao_fragmento.marcar("excel programação")
     st.download_button(
-        "📥 Baixar Resultado em Excel (Horas Necessárias)",
-        data=output_produtos,
-        file_name="horas_necessarias_por_operacao.xlsx",
+        "📥 Baixar Programação em Excel",
+        data=excel_sob_demanda({"Programacao": programa, "Conclusao_Pedidos": conclusao}),
+        file_name="programacao_capacidade_finita.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
-# ---------------- COMPARAÇÃO FINAL: SOMA TOTAL DE HORAS NECESSÁRIAS x HORAS DISPONÍVEIS ----------------
-st.markdown("---")
-st.header("Verificação Final por Ocupação")
+    mostrar_tempo_fragmento(medicao_fragmento)
+
+
+# ---------------- CENÁRIOS SALVOS ----------------
+TABELAS_CENARIO = {
+    "configuracao": "Configuração por Operação",
+    "demanda": "Demanda",
+    "disponiveis": "Horas Disponíveis",
+    "checagem": "Verificação por Ocupação",
+}
+
+# Restaura um cenário salvo (FIAÇÃO, parâmetros gerais, configuração e demanda).
+# Roda como callback do botão, antes da próxima execução, para poder alterar
+# os valores dos widgets da página.
+def restaurar_cenario(id_cenario):
+    cenario = armazem.carregar(id_cenario)
+    if cenario.fiacao not in catalogo.valores("FIAÇÃO"):
+        st.session_state["aviso_cenario"] = f"A FIAÇÃO {cenario.fiacao} do cenário \"{cenario.nome}\" não existe mais na planta."
+        return
+
+    st.session_state["fiacao"] = cenario.fiacao
+    for chave in ("dias_uteis", "absenteismo_geral", "novatos_geral"):
+        st.session_state[chave] = cenario.parametros[chave]
+
+    # A configuração salva é aplicada sobre a padrão das operações atuais da
+    # FIAÇÃO (operações novas na planta ficam com o padrão)
+    operacoes_fiacao = operacoes[operacoes["OPERAÇÃO"].isin(catalogo.selecionar(["OPERAÇÃO"], fiacao=cenario.fiacao)["OPERAÇÃO"].unique())]
+    ajustes = cenario.tabelas["configuracao"].drop(columns="N° FUSOS").assign(FIAÇÃO=None)
+    st.session_state[f"config_base_{cenario.fiacao}"] = mesclar_configuracao(configuracao_padrao(operacoes_fiacao), ajustes)
+    st.session_state.pop(f"config_operacoes_{cenario.fiacao}", None)
+
+    st.session_state["demanda_cenario"] = cenario.tabelas["demanda"]
+    st.session_state["nome_cenario_carregado"] = cenario.nome
+    st.session_state["origem_demanda"] = "Cenário salvo"
+
+
+def rotulo_cenario(salvos):
+    rotulos = {
+        linha.id: f"{linha.id} - {linha.nome} ({linha.fiacao}, {linha.data}{', ' + linha.autor if linha.autor else ''})"
+        for linha in salvos.itertuples()
+    }
+    return rotulos.get
+
+
+@st.fragment
+def cenarios(config, fiacao, dias_uteis, absenteismo_geral, novatos_geral, demanda, df_resultado, df_checagem):
+    medicao_fragmento = iniciar_medicao("PCP · Cenários")
+    medicao_fragmento.marcar("salvar")
+    st.markdown("---")
+    st.header("💾 Cenários Salvos")
+    st.write(
+        "Guarda a FIAÇÃO, os parâmetros gerais, a configuração por operação e a demanda (com as horas disponíveis "
+        "e a ocupação calculadas) em um banco local, para restaurar depois ou comparar dois cenários."
+    )
 
-# Agrupar horas necessárias por operação
-df_necessarias_agrupadas = df_produtos.groupby("OPERAÇÃO")["Horas Necessárias"].sum().reset_index()
-df_necessarias_agrupadas = df_necessarias_agrupadas.rename(columns={"Horas Necessárias": "Horas Necessárias (Total)"})
+    if not st.checkbox("Ativar cenários salvos"):
+        mostrar_tempo_fragmento(medicao_fragmento)
+        return
 
-# Merge com as horas disponíveis
-df_checagem = pd.merge(df_necessarias_agrupadas, df_resultado, on="OPERAÇÃO", how="left")
+    if "aviso_cenario" in st.session_state:
+        st.warning(f"⚠️ {st.session_state.pop('aviso_cenario')}")
 
-# Cálculo da diferença e status
-df_checagem["Diferença (Disp - Nec)"] = df_checagem["Horas Disponíveis (Total)"] - df_checagem["Horas Necessárias (Total)"]
-df_checagem["Status"] = df_checagem["Diferença (Disp - Nec)"].apply(
-    lambda x: "✅ Viável" if x >= 0 else "❌ Inválido"
-)
-df_checagem["Ocupação (%)"] = ((df_checagem["Horas Necessárias (Total)"] / df_checagem["Horas Disponíveis (Total)"]) * 100).round(2)
-
-
-# Exibição ordenada
-colunas_exibir = [
-    "OPERAÇÃO",
-    "Turnos",
-    "Almoço",
-    "Pico",
-    "Eficiência %", 
-    "Fusos Parados",
-    "Qntd Máquinas",
-    "Absenteismo %",
-    "Novatos %",
-    "Horas Disponíveis (Total)",
-    "Horas Necessárias (Total)",
-    "Diferença (Disp - Nec)",
-    "Ocupação (%)",
-    "Status"
-]
-
-
-df_checagem = df_checagem[colunas_exibir].sort_values(by="OPERAÇÃO")
-
-st.dataframe(df_checagem, hide_index=True)
-
-# Exportar resultado final
-output_checagem = io.BytesIO()
-with pd.ExcelWriter(output_checagem, engine="openpyxl") as writer:
-    df_checagem.to_excel(writer, index=False, sheet_name="Viabilidade_Final")
-output_checagem.seek(0)
-st.download_button(
-    "📥 Baixar Verificação Final (Agrupada)",
-    data=output_checagem,
-    file_name="verificacao_final_viabilidade.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-)
+    cols1, cols2, cols3 = st.columns(3)
+    with cols1:
+        nome_cenario = st.text_input("Nome do cenário", key="nome_cenario")
+    with cols2:
+        autor_cenario = st.text_input("Autor", key="autor_cenario")
+    with cols3:
+        data_cenario = st.date_input("Data de referência", key="data_cenario")
 
+    if st.button("💾 Salvar cenário atual"):
+        if not nome_cenario.strip():
+            st.warning("⚠️ Informe um nome para o cenário.")
+        else:
+            id_cenario = armazem.salvar(
+                "pcp", nome_cenario.strip(),
+                {"dias_uteis": dias_uteis, "absenteismo_geral": absenteismo_geral, "novatos_geral": novatos_geral},
+                {"configuracao": config, "demanda": demanda, "disponiveis": df_resultado, "checagem": df_checagem},
+                autor=autor_cenario.strip(), fiacao=fiacao, data=data_cenario, versao_planta=monitor.versao
+            )
+            st.success(f"✅ Cenário {id_cenario} salvo.")
+
+    medicao_fragmento.marcar("listar")
+    st.subheader("Cenários")
+    colf1, colf2, colf3 = st.columns(3)
+    with colf1:
+        filtro_fiacao = st.selectbox("FIAÇÃO", ["Todas", *catalogo.valores("FIAÇÃO")], key="filtro_fiacao_cenarios")
+    with colf2:
+        filtro_autor = st.text_input("Autor", key="filtro_autor_cenarios")
+    with colf3:
+        periodo = st.date_input("Período", value=(), key="periodo_cenarios")
+
+    salvos = armazem.listar(
+        "pcp",
+        fiacao=None if filtro_fiacao == "Todas" else filtro_fiacao,
+        autor=filtro_autor.strip() or None,
+        desde=periodo[0] if len(periodo) > 0 else None,
+        ate=periodo[1] if len(periodo) > 1 else None
+    )
+    if salvos.empty:
+        st.info("Nenhum cenário salvo com esses filtros.")
+        mostrar_tempo_fragmento(medicao_fragmento)
+        return
+
+    st.dataframe(salvos.drop(columns="tipo"), hide_index=True)
+    rotulo = rotulo_cenario(salvos)
+
+    colc1, colc2, colc3 = st.columns([3, 1, 1])
+    with colc1:
+        id_selecionado = st.selectbox("Cenário", salvos["id"], format_func=rotulo, key="cenario_selecionado")
+    with colc2:
+        # Os widgets da página mudam, então carregar reexecuta a página inteira
+        if st.button("📂 Carregar", on_click=restaurar_cenario, args=(int(id_selecionado),)):
+            medicao_fragmento.finalizar()
+            st.rerun()
+    with colc3:
+        if st.button("🗑️ Excluir"):
+            armazem.excluir(int(id_selecionado))
+            medicao_fragmento.finalizar()
+            st.rerun(scope="fragment")
+
+    # Só as tabelas que mudaram entre os dois cenários são lidas e comparadas
+    medicao_fragmento.marcar("comparar")
+    st.subheader("Comparar Cenários")
+    colA, colB = st.columns(2)
+    with colA:
+        id_a = st.selectbox("Cenário A", salvos["id"], index=min(1, len(salvos) - 1), format_func=rotulo, key="cenario_a")
+    with colB:
+        id_b = st.selectbox("Cenário B", salvos["id"], format_func=rotulo, key="cenario_b")
+
+    if id_a == id_b:
+        st.info("Selecione dois cenários diferentes para comparar.")
+    else:
+        diferenca = armazem.comparar(int(id_a), int(id_b))
+        if diferenca.parametros.empty:
+            st.caption("Parâmetros iguais nos dois cenários.")
+        else:
+            st.dataframe(diferenca.parametros, hide_index=True)
+        if diferenca.iguais:
+            st.caption("Sem alteração: " + ", ".join(TABELAS_CENARIO.get(nome, nome) for nome in diferenca.iguais))
+        for nome, tabela in diferenca.tabelas.items():
+            st.markdown(f"**{TABELAS_CENARIO.get(nome, nome)}** ({len(tabela)} linha(s) alterada(s))")
+            st.dataframe(tabela, hide_index=True)
+
+        medicao_fragmento.marcar("excel comparação")
+        st.download_button(
+            "📥 Baixar Comparação em Excel",
+            data=excel_sob_demanda({
+                "Parametros": diferenca.parametros,
+                **{TABELAS_CENARIO.get(nome, nome)[:31]: tabela for nome, tabela in diferenca.tabelas.items()}
+            }),
+            file_name=f"comparacao_cenarios_{id_a}_{id_b}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+    mostrar_tempo_fragmento(medicao_fragmento)
+
+
+medicao.marcar("capacidade (fragmentos)")
+capacidade(fiação_selecionada, dias_uteis, absenteismo_geral, novatos_geral, df, df_raw, demanda, df_necessarias_agrupadas, recalculo)
+
+medicao.finalizar()
+with st.sidebar:
+    if st.checkbox("⏱️ Tempos desta execução", key="telemetria"):
+        st.dataframe(medicao.tabela(), hide_index=True)
+        st.caption(f"Total: {medicao.total * 1000:.0f} ms")
@@ -2,10 +2,17 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import os
-import io
+from nucleo.dados import carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.roteiros import grafo_planilha, resumo_carga
+from nucleo.exportacao import excel_sob_demanda
+from nucleo.telemetria import iniciar_medicao
 
 st.set_page_config(page_title="Roteiro | Paramount Têxteis SI", layout="wide")
 
+# Tempo de cada etapa desta execução (painel na barra lateral e logs/telemetria.jsonl)
+medicao = iniciar_medicao("Roteiro de Produção")
+
 with st.sidebar: 
     st.subheader("ℹ️ Sobre")
     st.info("App desenvolvido para auxiliar na gestão da produção da unidade de Santa Isabel.")
@@ -27,33 +34,34 @@ with st.sidebar:
 # Configuração da página
 st.title("Roteriro de Produção - Paramount SI")
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    caminho = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
-    df = pd.read_excel(caminho)
-    df = df[["PRODUTO", "REVISÃO", "OPERAÇÃO", "N_ROTEIRO", "N° OPERAÇÃO"]].dropna()
-    return df
+CAMINHO_PLANILHA = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
 
-dados = carregar_dados()
+# Função para carregar os dados (catálogo indexado, compartilhado entre sessões e
+# recarregado em segundo plano quando a planilha muda)
+def carregar_dados(caminho):
+    df = carregar_colunas(caminho, ["PRODUTO", "REVISÃO", "OPERAÇÃO", "N_ROTEIRO", "N° OPERAÇÃO"]).dropna()
 
-# Padroniza as colunas
-dados["OPERAÇÃO"] = dados["OPERAÇÃO"].astype(str).str.strip().str.upper()
-dados["N° OPERAÇÃO"] = dados["N° OPERAÇÃO"].astype(str).str.strip()
-dados["N_ROTEIRO"] = dados["N_ROTEIRO"].astype(str).str.strip().str.upper()
+    # Padroniza as colunas
+    df["OPERAÇÃO"] = df["OPERAÇÃO"].astype(str).str.strip().str.upper()
+    df["N° OPERAÇÃO"] = df["N° OPERAÇÃO"].astype(str).str.strip()
+    df["N_ROTEIRO"] = df["N_ROTEIRO"].astype(str).str.strip().str.upper()
+    return CatalogoPlanta(df)
 
+medicao.marcar("carregar_dados")
+monitor = monitor_planilha(CAMINHO_PLANILHA)
+monitor.registrar("roteiro_producao", carregar_dados)
+catalogo = monitor.obter("roteiro_producao")
 
-produto1 = st.selectbox("Item", sorted(dados["PRODUTO"].unique()), key="produto1")
-rev1 = sorted(dados[dados["PRODUTO"] == produto1]['REVISÃO'].unique())
+medicao.marcar("seleção")
+produto1 = st.selectbox("Item", catalogo.produtos(), key="produto1")
+rev1 = catalogo.valores("REVISÃO", produto=produto1)
 revisao1 = st.selectbox("Revisão da Planta de Produção", rev1, key="revisao1")
 
 
 
 # Filtragem de dados
-filtro1 = dados[
-    (dados["PRODUTO"] == produto1) &
-    (dados["REVISÃO"] == revisao1) 
-][["OPERAÇÃO", "N° OPERAÇÃO", "N_ROTEIRO"]]
+medicao.marcar("filtragem")
+filtro1 = catalogo.selecionar(["OPERAÇÃO", "N° OPERAÇÃO", "N_ROTEIRO"], produto=produto1, revisao=revisao1)
 
 
 
@@ -82,15 +90,81 @@ else:
 
     
     # Exportar Excel
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        tabela1[colunas_exibir].to_excel(writer, index=False, sheet_name='Comparativo')
-
-    output.seek(0)
-
+    medicao.marcar("excel")
+    # (gerado só no clique, em cache pelo conteúdo; ver nucleo.exportacao)
     st.download_button(
         label="📥 Baixar Comparativo em Excel",
-        data=output,
+        data=excel_sob_demanda({"Comparativo": tabela1[colunas_exibir]}),
         file_name=f"roteiro_{produto1}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+# ---------------- ONDE É USADO ----------------
+medicao.marcar("onde_usado")
+st.markdown("---")
+st.header("🔗 Onde é Usado")
+st.write("Produtos e revisões que passam por uma operação ou usam um N_ROTEIRO, com a carga (MAQ HR) que impõem. Os índices são montados uma vez por versão da planilha.")
+
+if st.checkbox("Ativar consulta onde é usado"):
+    monitor.registrar("grafo_roteiros", grafo_planilha)
+    grafo = monitor.obter("grafo_roteiros")
+
+    tipo_consulta = st.radio("Consultar por", ["Operação", "N_ROTEIRO", "Roteiros compartilhados"], horizontal=True, key="tipo_onde_usado")
+
+    if tipo_consulta == "Roteiros compartilhados":
+        st.subheader(f"Roteiros em comum com {produto1} (revisão {revisao1})")
+        compartilhados = grafo.roteiros_compartilhados(produto1, revisao1)
+        if compartilhados.empty:
+            st.info("Nenhum outro produto usa os roteiros deste produto.")
+        else:
+            st.dataframe(compartilhados, hide_index=True)
+
+        st.subheader("Mesma sequência de operações")
+        iguais = grafo.mesma_sequencia(produto1, revisao1)
+        if iguais.empty:
+            st.info("Nenhum outro produto tem uma rota com a mesma sequência de operações de uma das linhas deste produto.")
+        else:
+            st.dataframe(iguais, hide_index=True)
+
+        st.download_button(
+            label="📥 Baixar Roteiros Compartilhados em Excel",
+            data=excel_sob_demanda({"Roteiros em Comum": compartilhados, "Mesma Sequência": iguais}),
+            file_name=f"roteiros_compartilhados_{produto1}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    else:
+        coluna_consulta = "OPERAÇÃO" if tipo_consulta == "Operação" else "N_ROTEIRO"
+        opcoes = grafo.operacoes() if coluna_consulta == "OPERAÇÃO" else grafo.roteiros()
+        chaves = st.multiselect(f"{coluna_consulta} (uma ou várias)", opcoes, key="chaves_onde_usado")
+
+        if chaves:
+            resultado = grafo.onde_usado(coluna_consulta, chaves)
+            carga = resumo_carga(resultado, coluna_consulta)
+
+            st.subheader("Carga por chave")
+            st.dataframe(carga, hide_index=True)
+
+            st.subheader(f"Produtos/Revisões ({len(resultado)} etapas)")
+            st.dataframe(resultado, hide_index=True)
+
+            if coluna_consulta == "OPERAÇÃO" and len(chaves) == 1:
+                col_ant, col_suc = st.columns(2)
+                with col_ant:
+                    st.markdown("**Operações anteriores**")
+                    st.dataframe(pd.DataFrame(grafo.antecessores(chaves[0]), columns=["OPERAÇÃO", "Roteiros"]), hide_index=True)
+                with col_suc:
+                    st.markdown("**Próximas operações**")
+                    st.dataframe(pd.DataFrame(grafo.sucessores(chaves[0]), columns=["OPERAÇÃO", "Roteiros"]), hide_index=True)
+
+            st.download_button(
+                label="📥 Baixar Onde é Usado em Excel",
+                data=excel_sob_demanda({"Carga": carga, "Onde é Usado": resultado}),
+                file_name="onde_usado.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+medicao.finalizar()
+with st.sidebar:
+    if st.checkbox("⏱️ Tempos desta execução", key="telemetria"):
+        st.dataframe(medicao.tabela(), hide_index=True)
+        st.caption(f"Total: {medicao.total * 1000:.0f} ms")
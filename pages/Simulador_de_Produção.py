@@ -1,12 +1,25 @@
 # Importando bibliotecas necessárias
 import streamlit as st
 import pandas as pd
+import numpy as np
+import altair as alt
 from datetime import datetime
-import io
 import os
+from nucleo.dados import carregar_colunas, monitor_planilha
+from nucleo.catalogo import CatalogoPlanta
+from nucleo.cenarios import ArmazemCenarios
+from nucleo.exportacao import excel_sob_demanda
+from nucleo.telemetria import iniciar_medicao
+from nucleo.simulador import (
+    COMBINACOES_TURNOS, CenarioSimulacao, melhores_cenarios, monte_carlo, normal, simular as simular_cenario,
+    triangular, varrer_cenarios
+)
 
 st.set_page_config(page_title="Produção - Paramount Têxteis SI", layout="wide")
 
+# Tempo de cada etapa desta execução (painel na barra lateral e logs/telemetria.jsonl)
+medicao = iniciar_medicao("Simulador de Produção")
+
 # 🎨 Sidebar personalizada
 with st.sidebar: 
     st.subheader("ℹ️ Sobre")
@@ -28,15 +41,21 @@ with st.sidebar:
 
 st.title("Produção - Paramount SI")
 
-# Carrega os dados da planilha Excel
-@st.cache_data
-def carregar_dados():
-    caminho = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
-    df = pd.read_excel(caminho)
-    df = df[["PRODUTO", "OPERAÇÃO", "N° FUSOS", "KG/MH"]].dropna()
-    return df
+CAMINHO_PLANILHA = os.path.join(os.path.dirname(__file__), "PLANTA_DE_PRODUÇÃO(FIOS_INDUSTRIAIS).xlsx")
+
+# Carrega os dados da planilha Excel (catálogo indexado, compartilhado entre sessões e
+# recarregado em segundo plano quando a planilha muda)
+def carregar_dados(caminho):
+    df = carregar_colunas(caminho, ["PRODUTO", "OPERAÇÃO", "N° FUSOS", "KG/MH"]).dropna()
+    return CatalogoPlanta(df)
+
+medicao.marcar("carregar_dados")
+monitor = monitor_planilha(CAMINHO_PLANILHA)
+monitor.registrar("simulador_producao", carregar_dados)
+catalogo = monitor.obter("simulador_producao")
 
-dados = carregar_dados()
+# Cenários salvos (SQLite local, ver nucleo/cenarios.py)
+armazem = ArmazemCenarios()
 
 # Função para tratar vírgula e ponto
 def parse_float(valor):
@@ -45,26 +64,27 @@ def parse_float(valor):
     return float(valor)
 
 # Seleção de quantidade de produtos
-qtd_produtos = st.selectbox("Quantidade de produtos para comparar", [1, 2, 3])
+medicao.marcar("entradas")
+qtd_produtos = st.selectbox("Quantidade de produtos para comparar", [1, 2, 3], key="qtd_produtos")
 
 # Dias úteis
-diasMax = st.number_input("Max Dias Úteis", min_value=1, max_value=31, step=1)
+diasMax = st.number_input("Max Dias Úteis", min_value=1, max_value=31, step=1, key="dias_max")
 
 # Inputs adicionais globais
 st.subheader("Ajustes Globais")
 col1, col2 = st.columns(2)
 with col1:
-    absenteismo = st.number_input("Índice de Absenteísmo (%)", min_value=0.0, max_value=100.0, value=0.0, step=1.0) / 100
+    absenteismo = st.number_input("Índice de Absenteísmo (%)", min_value=0.0, max_value=100.0, value=0.0, step=1.0, key="absenteismo") / 100
 with col2:
-    novatos = st.number_input("Percentual de Novatos (%)", min_value=0.0, max_value=100.0, value=0.0, step=1.0) / 200  # divide por 2
+    novatos = st.number_input("Percentual de Novatos (%)", min_value=0.0, max_value=100.0, value=0.0, step=1.0, key="novatos") / 200  # divide por 2
 
 # Função para inputs de produtos
 def input_produto(idx):
     st.subheader(f"Produto {idx}")
-    produto = st.selectbox(f"Item", sorted(dados["PRODUTO"].unique()), key=f"produto{idx}")
+    produto = st.selectbox(f"Item", catalogo.produtos(), key=f"produto{idx}")
     meta = st.number_input(f"Meta (kg)", min_value=1, step=1000, key=f"meta{idx}")
-    operacoes = dados[dados["PRODUTO"] == produto]["OPERAÇÃO"].unique()
-    operacao = st.selectbox(f"Operação", sorted(operacoes), key=f"operacao{idx}")
+    operacoes = catalogo.valores("OPERAÇÃO", produto=produto)
+    operacao = st.selectbox(f"Operação", operacoes, key=f"operacao{idx}")
     maquinas = st.number_input(f"Quantidade de máquinas", min_value=1, step=1, key=f"maquinas{idx}")
     almoco = st.radio(f"Pausa para almoço?", ["Sim", "Não"], key=f"almoco{idx}") == "Sim"
     pico = st.radio(f"Pico no turno B?", ["Sim", "Não"], key=f"pico{idx}") == "Sim"
@@ -81,65 +101,54 @@ for i in range(qtd_produtos):
 
 # Buscar dados da operação
 def get_operacao(produto, operacao):
-    filtro = dados[(dados["PRODUTO"] == produto) & (dados["OPERAÇÃO"] == operacao)]
+    filtro = catalogo.selecionar(["N° FUSOS", "KG/MH"], produto=produto, operacao=operacao)
     if filtro.empty:
         return None
     linha = filtro.iloc[0]
     return int(linha["N° FUSOS"]), parse_float(linha["KG/MH"])
 
-# Simulação
+# Simulação (cálculo fechado em nucleo.simulador, mesmo resultado do laço dia a dia)
 def simular(meta, produto, operacao, fusos_total, kg_por_hora, fusos_parados,
             eficiencia_maquina, maquinas, almoco, pico, turnos_entrada,
             absenteismo, novatos):
-    
-    fusos_ativos = fusos_total - fusos_parados
-    eficiencia_fusos = fusos_ativos / fusos_total
-    eficiencia_maquina = eficiencia_maquina / 100
 
-    fator_ajuste = (1 - absenteismo) * (1 - novatos)
-
-    if not turnos_entrada:
+    resultado = simular_cenario(CenarioSimulacao(
+        meta=meta, fusos_total=fusos_total, kg_por_hora=kg_por_hora, fusos_parados=fusos_parados,
+        eficiencia_maquina=eficiencia_maquina, maquinas=maquinas, almoco=almoco, pico=pico,
+        turnos="".join(turnos_entrada), absenteismo=absenteismo, novatos=novatos, dias_max=diasMax
+    ))
+    if resultado is None:
         return None
 
-    for dias in range(1, diasMax + 1):
-        total_horas = 0
-        for t in turnos_entrada:
-            h = 8
-            if almoco:
-                h -= 1
-            if t == "B" and pico:
-                h -= 3
-            total_horas += h
-
-        total_horas *= dias * maquinas
-        producao = total_horas * kg_por_hora * eficiencia_fusos * eficiencia_maquina * fator_ajuste
-
-        if producao >= meta:
-            return {
-                "dados": pd.DataFrame([{
-                    "Produto": produto,
-                    "Operação": operacao,
-                    "Meta (kg)": meta,
-                    "Fusos Parados": fusos_parados,
-                    "Máquinas": maquinas,
-                    "Eficiência Máquina(%)": eficiencia_maquina * 100,
-                    "Almoço": "Sim" if almoco else "Não",
-                    "Pico no Turno B": "Sim" if pico else "Não",
-                    "Eficiência Fusos(%)": round(eficiencia_fusos * 100, 2),
-                    "Turnos Necessários": "".join(turnos_entrada),
-                    "Dias Necessários": dias,
-                    "Produção Estimada (kg)": round(producao, 2),
-                    "Produção Diária Estimada (kg/dia)": round(producao / dias, 2)
-                }]),
-                "metricas": {
-                    "Eficiência Fusos (%)": eficiencia_fusos * 100,
-                    "Eficiência Máquina (%)": eficiencia_maquina * 100,
-                    "Turnos": "".join(turnos_entrada),
-                    "Dias": dias,
-                    "Produção (kg)": producao
-                }
-            }
-    return None
+    eficiencia_fusos = resultado.eficiencia_fusos
+    eficiencia_maquina = resultado.eficiencia_maquina
+    dias = resultado.dias
+    producao = resultado.producao
+
+    return {
+        "dados": pd.DataFrame([{
+            "Produto": produto,
+            "Operação": operacao,
+            "Meta (kg)": meta,
+            "Fusos Parados": fusos_parados,
+            "Máquinas": maquinas,
+            "Eficiência Máquina(%)": eficiencia_maquina * 100,
+            "Almoço": "Sim" if almoco else "Não",
+            "Pico no Turno B": "Sim" if pico else "Não",
+            "Eficiência Fusos(%)": round(eficiencia_fusos * 100, 2),
+            "Turnos Necessários": "".join(turnos_entrada),
+            "Dias Necessários": dias,
+            "Produção Estimada (kg)": round(producao, 2),
+            "Produção Diária Estimada (kg/dia)": round(producao / dias, 2)
+        }]),
+        "metricas": {
+            "Eficiência Fusos (%)": eficiencia_fusos * 100,
+            "Eficiência Máquina (%)": eficiencia_maquina * 100,
+            "Turnos": "".join(turnos_entrada),
+            "Dias": dias,
+            "Produção (kg)": producao
+        }
+    }
 
 # Inputs de fusos e eficiência
 colfusos = st.columns(qtd_produtos)
@@ -153,6 +162,7 @@ for i, entrada in enumerate(inputs):
 
     if dados_op is None:
         st.error(f"⚠️ Dados insuficientes para {produto} - {operacao}. Verifique na base.")
+        medicao.finalizar()
         st.stop()
 
     fusos_total, kg_por_hora = dados_op
@@ -170,6 +180,7 @@ for i, entrada in enumerate(inputs):
 
 # Botão calcular
 if st.button("🔍 Calcular Simulações"):
+    medicao.marcar("simulação")
     resultados = []
     producao_dias = []
 
@@ -262,7 +273,7 @@ if st.button("🔍 Calcular Simulações"):
         )
 
     # Exporta para Excel
-    output = io.BytesIO()
+    medicao.marcar("excel")
     frames = []
 
     for resultado in resultados:
@@ -273,12 +284,333 @@ if st.button("🔍 Calcular Simulações"):
 
     resultado_final = pd.concat(frames, ignore_index=True)
 
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        resultado_final.to_excel(writer, index=False, sheet_name="Simulação Total")
-
+    # O arquivo só é gerado no clique; "ignore" evita a nova execução que
+    # esconderia os resultados deste botão
     st.download_button(
         label="📥 Exportar resultados em Excel",
-        data=output.getvalue(),
+        data=excel_sob_demanda({"Simulação Total": resultado_final}),
+        on_click="ignore",
         file_name=f"simulacao_producao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
+
+# ---------------- VARREDURA DE CENÁRIOS ----------------
+medicao.marcar("entradas varredura")
+st.markdown("---")
+st.header("🔎 Varredura de Cenários")
+st.write("Avalia todas as combinações de fusos parados, eficiência, máquinas e turnos de uma vez para encontrar configurações que atendem o Max Dias Úteis.")
+
+if st.checkbox("Ativar varredura de cenários"):
+    idx_varredura = st.selectbox(
+        "Produto para a varredura", range(qtd_produtos),
+        format_func=lambda i: f"Produto {i + 1} - {inputs[i][0]} / {inputs[i][2]}"
+    )
+    produto, meta, operacao, maquinas, almoco, pico, turnos = inputs[idx_varredura]
+    fusos_total, kg_por_hora = dados_operacao[idx_varredura]
+
+    colv1, colv2, colv3 = st.columns(3)
+    with colv1:
+        faixa_maquinas = st.slider("Quantidade de máquinas", 1, 50, (1, max(10, maquinas)))
+        faixa_eficiencia = st.slider("Eficiência Máquina (%)", 1, 100, (70, 100))
+        passo_eficiencia = st.number_input("Passo da eficiência (%)", min_value=1, max_value=50, value=5)
+    with colv2:
+        faixa_fusos = st.slider(f"Fusos parados (máx: {fusos_total})", 0, max(fusos_total, 1), (0, 0))
+        passo_fusos = st.number_input("Passo dos fusos parados", min_value=1, max_value=max(fusos_total, 1), value=max(1, fusos_total // 20))
+    with colv3:
+        turnos_varredura = st.multiselect("Combinações de turnos", COMBINACOES_TURNOS, default=COMBINACOES_TURNOS)
+        almoco_varredura = st.multiselect("Pausa para almoço", ["Sim", "Não"], default=["Sim" if almoco else "Não"])
+        pico_varredura = st.multiselect("Pico no turno B", ["Sim", "Não"], default=["Sim" if pico else "Não"])
+
+    if not (turnos_varredura and almoco_varredura and pico_varredura):
+        st.warning("⚠️ Selecione ao menos uma opção de turnos, almoço e pico.")
+    else:
+        medicao.marcar("varredura")
+        varredura = varrer_cenarios(
+            meta, fusos_total, kg_por_hora, diasMax,
+            fusos_parados=np.arange(faixa_fusos[0], faixa_fusos[1] + 1, passo_fusos),
+            eficiencias=np.arange(faixa_eficiencia[0], faixa_eficiencia[1] + 1, passo_eficiencia),
+            maquinas=np.arange(faixa_maquinas[0], faixa_maquinas[1] + 1),
+            turnos=turnos_varredura,
+            almoco=[a == "Sim" for a in almoco_varredura],
+            pico=[p == "Sim" for p in pico_varredura],
+            absenteismo=absenteismo,
+            novatos=novatos
+        )
+        st.caption(f"{len(varredura):,} combinações avaliadas".replace(",", "."))
+
+        # Mapa de calor: menor número de dias para cada par de eixos
+        eixos = ["Máquinas", "Turnos", "Eficiência Máquina(%)", "Fusos Parados"]
+        colx, coly = st.columns(2)
+        with colx:
+            eixo_x = st.selectbox("Eixo X", eixos, index=0)
+        with coly:
+            eixo_y = st.selectbox("Eixo Y", [e for e in eixos if e != eixo_x], index=0)
+
+        medicao.marcar("gráfico varredura")
+        mapa = (
+            varredura.groupby([eixo_x, eixo_y], observed=True)["Dias Necessários"]
+            .min()
+            .reset_index()
+        )
+        grafico_mapa = alt.Chart(mapa).mark_rect().encode(
+            x=alt.X(field=eixo_x, type="ordinal", title=eixo_x),
+            y=alt.Y(field=eixo_y, type="ordinal", title=eixo_y),
+            color=alt.Color(
+                field="Dias Necessários", type="quantitative",
+                scale=alt.Scale(scheme="redyellowgreen", reverse=True),
+                legend=alt.Legend(title="Dias")
+            ),
+            tooltip=[
+                alt.Tooltip(field=eixo_x, type="ordinal"),
+                alt.Tooltip(field=eixo_y, type="ordinal"),
+                alt.Tooltip(field="Dias Necessários", type="quantitative")
+            ]
+        ).properties(height=400)
+
+        st.subheader("Mapa de Dias Necessários (menor valor entre as demais variáveis)")
+        st.write("(Células vazias não atingem a meta dentro do Max Dias Úteis)")
+        st.altair_chart(grafico_mapa, use_container_width=True)
+
+        st.subheader("✅ Configurações mais econômicas que atendem a meta")
+        melhores = melhores_cenarios(varredura, quantidade=20)
+        if melhores.empty:
+            st.warning(f"⚠️ Nenhuma combinação atinge {meta} kg em até {diasMax} dias.")
+        else:
+            st.dataframe(melhores.drop(columns=["Atende"]), hide_index=True)
+
+# ---------------- SIMULAÇÃO DE RISCO (MONTE CARLO) ----------------
+medicao.marcar("entradas risco")
+st.markdown("---")
+st.header("🎲 Simulação de Risco (Monte Carlo)")
+st.write("Absenteísmo, eficiência e fusos parados variam dia a dia. Cada trajetória sorteia esses valores e a simulação estima a chance de atingir a meta dentro do Max Dias Úteis.")
+
+if st.checkbox("Ativar simulação de risco"):
+    idx_risco = st.selectbox(
+        "Produto para a simulação de risco", range(qtd_produtos),
+        format_func=lambda i: f"Produto {i + 1} - {inputs[i][0]} / {inputs[i][2]}"
+    )
+    produto, meta, operacao, maquinas, almoco, pico, turnos = inputs[idx_risco]
+    fusos_total, kg_por_hora = dados_operacao[idx_risco]
+
+    colr1, colr2, colr3 = st.columns(3)
+    with colr1:
+        st.markdown("**Absenteísmo (%)** - normal")
+        abs_media = st.number_input("Média", 0.0, 100.0, absenteismo * 100, step=1.0, key="abs_media")
+        abs_desvio = st.number_input("Desvio padrão", 0.0, 50.0, 2.0, step=0.5, key="abs_desvio")
+    with colr2:
+        st.markdown("**Eficiência Máquina (%)** - triangular")
+        efi_min, efi_max = st.slider("Mínimo / Máximo", 0, 100, (max(eficiencia_maquina_list[idx_risco] - 15, 0), eficiencia_maquina_list[idx_risco]), key="efi_faixa")
+        efi_moda = st.number_input("Mais provável", float(efi_min), float(efi_max), float(efi_max), key="efi_moda")
+    with colr3:
+        st.markdown(f"**Fusos parados** (máx: {fusos_total}) - normal")
+        fusos_media = st.number_input("Média", 0.0, float(fusos_total), float(fusos_parados_list[idx_risco]), key="fusos_media")
+        fusos_desvio = st.number_input("Desvio padrão", 0.0, float(fusos_total), 0.0, key="fusos_desvio")
+
+    colr4, colr5 = st.columns(2)
+    with colr4:
+        trajetorias = st.select_slider("Trajetórias", [10_000, 50_000, 100_000, 200_000, 500_000], value=100_000)
+    with colr5:
+        processos = st.number_input("Processos paralelos", min_value=1, max_value=os.cpu_count() or 1, value=1)
+
+    if not turnos:
+        st.warning("⚠️ Selecione ao menos um turno para o produto.")
+    else:
+        medicao.marcar("monte carlo")
+        risco = monte_carlo(
+            meta, fusos_total, kg_por_hora, maquinas, almoco, pico, turnos, diasMax,
+            absenteismo=normal(abs_media / 100, abs_desvio / 100),
+            eficiencia_maquina=triangular(efi_min, efi_moda, efi_max),
+            fusos_parados=normal(fusos_media, fusos_desvio),
+            novatos=novatos,
+            trajetorias=trajetorias,
+            semente=0,
+            processos=processos
+        )
+
+        def formatar_dias(valor):
+            return f"> {risco['horizonte']} dias" if np.isinf(valor) else f"{valor:.0f} dias"
+
+        colm1, colm2, colm3 = st.columns(3)
+        with colm1:
+            st.metric(f"Probabilidade de concluir em até {diasMax} dias", f"{risco['probabilidade'] * 100:.1f}%")
+        with colm2:
+            st.metric("P50 (conclusão)", formatar_dias(risco["p50"]))
+        with colm3:
+            st.metric("P90 (conclusão)", formatar_dias(risco["p90"]))
+
+        medicao.marcar("gráfico risco")
+        distribuicao_dias = (
+            pd.Series(risco["dias"][risco["dias"] > 0], name="Dias")
+            .value_counts(normalize=True)
+            .mul(100)
+            .rename("Trajetórias (%)")
+            .reset_index()
+        )
+        grafico_risco = alt.Chart(distribuicao_dias).mark_bar().encode(
+            x=alt.X("Dias:O", title="Dia de conclusão"),
+            y=alt.Y("Trajetórias (%):Q", title="Trajetórias (%)"),
+            color=alt.condition(
+                alt.datum["Dias"] <= diasMax,
+                alt.value("#28a745"),  # verde
+                alt.value("#dc3545")   # vermelho
+            ),
+            tooltip=["Dias", "Trajetórias (%)"]
+        ).properties(height=350)
+
+        st.subheader("Distribuição do Dia de Conclusão")
+        st.altair_chart(grafico_risco, use_container_width=True)
+
+# ---------------- CENÁRIOS SALVOS ----------------
+medicao.marcar("cenários")
+st.markdown("---")
+st.header("💾 Cenários Salvos")
+st.write("Guarda as entradas do simulador (ajustes globais e produtos) com o resultado da simulação em um banco local, para restaurar depois ou comparar dois cenários.")
+
+TABELAS_CENARIO = {"entradas": "Entradas", "simulacao": "Simulação"}
+
+# Restaura as entradas de um cenário salvo. Roda como callback do botão, antes
+# da próxima execução, para poder alterar os valores dos widgets.
+def restaurar_cenario(id_cenario):
+    cenario = armazem.carregar(id_cenario)
+    entradas = cenario.tabelas["entradas"].to_dict("records")
+    sem_planta = sorted({e["Produto"] for e in entradas} - set(catalogo.produtos()))
+    if sem_planta:
+        st.session_state["aviso_cenario"] = f"Produto(s) do cenário \"{cenario.nome}\" que não existem mais na planta: {', '.join(sem_planta)}"
+        return
+
+    for chave in ("qtd_produtos", "dias_max"):
+        st.session_state[chave] = int(cenario.parametros[chave])
+    for chave in ("absenteismo", "novatos"):
+        st.session_state[chave] = float(cenario.parametros[chave])
+    for entrada in entradas:
+        idx = int(entrada["Posição"])
+        st.session_state[f"produto{idx}"] = entrada["Produto"]
+        st.session_state[f"meta{idx}"] = int(entrada["Meta (kg)"])
+        st.session_state[f"operacao{idx}"] = entrada["Operação"]
+        st.session_state[f"maquinas{idx}"] = int(entrada["Máquinas"])
+        st.session_state[f"almoco{idx}"] = entrada["Almoço"]
+        st.session_state[f"pico{idx}"] = entrada["Pico"]
+        st.session_state[f"turnos{idx}"] = list(entrada["Turnos"])
+        st.session_state[f"fuso{idx - 1}"] = int(entrada["Fusos Parados"])
+        st.session_state[f"ef{idx - 1}"] = int(entrada["Eficiência Máquina(%)"])
+
+def rotulo_cenario(salvos):
+    rotulos = {
+        linha.id: f"{linha.id} - {linha.nome} ({linha.data}{', ' + linha.autor if linha.autor else ''})"
+        for linha in salvos.itertuples()
+    }
+    return rotulos.get
+
+if st.checkbox("Ativar cenários salvos"):
+    if "aviso_cenario" in st.session_state:
+        st.warning(f"⚠️ {st.session_state.pop('aviso_cenario')}")
+
+    cols1, cols2, cols3 = st.columns(3)
+    with cols1:
+        nome_cenario = st.text_input("Nome do cenário", key="nome_cenario")
+    with cols2:
+        autor_cenario = st.text_input("Autor", key="autor_cenario")
+    with cols3:
+        data_cenario = st.date_input("Data de referência", key="data_cenario")
+
+    if st.button("💾 Salvar cenário atual"):
+        if not nome_cenario.strip():
+            st.warning("⚠️ Informe um nome para o cenário.")
+        else:
+            entradas = pd.DataFrame([
+                {
+                    "Posição": i + 1, "Produto": produto, "Operação": operacao, "Meta (kg)": meta,
+                    "Máquinas": maquinas, "Almoço": "Sim" if almoco else "Não", "Pico": "Sim" if pico else "Não",
+                    "Turnos": "".join(turnos), "Fusos Parados": fusos_parados_list[i],
+                    "Eficiência Máquina(%)": eficiencia_maquina_list[i]
+                }
+                for i, (produto, meta, operacao, maquinas, almoco, pico, turnos) in enumerate(inputs)
+            ])
+            simulacao = []
+            for i, (produto, meta, operacao, maquinas, almoco, pico, turnos) in enumerate(inputs):
+                resultado = simular(
+                    meta, produto, operacao, *dados_operacao[i], fusos_parados_list[i],
+                    eficiencia_maquina_list[i], maquinas, almoco, pico, turnos, absenteismo, novatos
+                )
+                if resultado:
+                    simulacao.append(resultado["dados"].assign(Posição=i + 1))
+            id_cenario = armazem.salvar(
+                "simulador", nome_cenario.strip(),
+                {
+                    "qtd_produtos": qtd_produtos, "dias_max": diasMax,
+                    "absenteismo": st.session_state["absenteismo"], "novatos": st.session_state["novatos"]
+                },
+                {"entradas": entradas, "simulacao": pd.concat(simulacao, ignore_index=True) if simulacao else pd.DataFrame()},
+                autor=autor_cenario.strip(), data=data_cenario, versao_planta=monitor.versao
+            )
+            st.success(f"✅ Cenário {id_cenario} salvo.")
+
+    medicao.marcar("listar cenários")
+    st.subheader("Cenários")
+    colf1, colf2 = st.columns(2)
+    with colf1:
+        filtro_autor = st.text_input("Autor", key="filtro_autor_cenarios")
+    with colf2:
+        periodo = st.date_input("Período", value=(), key="periodo_cenarios")
+
+    salvos = armazem.listar(
+        "simulador",
+        autor=filtro_autor.strip() or None,
+        desde=periodo[0] if len(periodo) > 0 else None,
+        ate=periodo[1] if len(periodo) > 1 else None
+    )
+    if salvos.empty:
+        st.info("Nenhum cenário salvo com esses filtros.")
+    else:
+        st.dataframe(salvos.drop(columns=["tipo", "fiacao"]), hide_index=True)
+        rotulo = rotulo_cenario(salvos)
+
+        colc1, colc2, colc3 = st.columns([3, 1, 1])
+        with colc1:
+            id_selecionado = st.selectbox("Cenário", salvos["id"], format_func=rotulo, key="cenario_selecionado")
+        with colc2:
+            st.button("📂 Carregar", on_click=restaurar_cenario, args=(int(id_selecionado),))
+        with colc3:
+            if st.button("🗑️ Excluir"):
+                armazem.excluir(int(id_selecionado))
+                medicao.finalizar()
+                st.rerun()
+
+        # Só as tabelas que mudaram entre os dois cenários são lidas e comparadas
+        medicao.marcar("comparar cenários")
+        st.subheader("Comparar Cenários")
+        colA, colB = st.columns(2)
+        with colA:
+            id_a = st.selectbox("Cenário A", salvos["id"], index=min(1, len(salvos) - 1), format_func=rotulo, key="cenario_a")
+        with colB:
+            id_b = st.selectbox("Cenário B", salvos["id"], format_func=rotulo, key="cenario_b")
+
+        if id_a == id_b:
+            st.info("Selecione dois cenários diferentes para comparar.")
+        else:
+            diferenca = armazem.comparar(int(id_a), int(id_b))
+            if diferenca.parametros.empty:
+                st.caption("Parâmetros iguais nos dois cenários.")
+            else:
+                st.dataframe(diferenca.parametros, hide_index=True)
+            if diferenca.iguais:
+                st.caption("Sem alteração: " + ", ".join(TABELAS_CENARIO.get(nome, nome) for nome in diferenca.iguais))
+            for nome, tabela in diferenca.tabelas.items():
+                st.markdown(f"**{TABELAS_CENARIO.get(nome, nome)}** ({len(tabela)} linha(s) alterada(s))")
+                st.dataframe(tabela, hide_index=True)
+
+            st.download_button(
+                "📥 Baixar Comparação em Excel",
+                data=excel_sob_demanda({
+                    "Parametros": diferenca.parametros,
+                    **{TABELAS_CENARIO.get(nome, nome): tabela for nome, tabela in diferenca.tabelas.items()}
+                }),
+                file_name=f"comparacao_cenarios_{id_a}_{id_b}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+medicao.finalizar()
+with st.sidebar:
+    if st.checkbox("⏱️ Tempos desta execução", key="telemetria"):
+        st.dataframe(medicao.tabela(), hide_index=True)
+        st.caption(f"Total: {medicao.total * 1000:.0f} ms")
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from nucleo.api import ServidorAPI, simular
+
+OPERACOES = {("P1", "FILATÓRIO"): (100, 12.5)}
+CENARIO = {"produto": "P1", "operacao": "FILATÓRIO", "meta": 1000, "dias_max": 25}
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    return ServidorAPI()
+
+
+def test_simular_erros_ficam_no_cenario():
+    respostas = simular([
+        CENARIO,
+        dict(CENARIO, meta="muito"),
+        "não é objeto",
+        dict(CENARIO, produto="P2"),
+        dict(CENARIO, dias_max=None),
+        CENARIO,
+    ], OPERACOES)
+
+    assert [("erro" in r) for r in respostas] == [False, True, True, True, True, False]
+    assert respostas[0] == respostas[5]
+    assert respostas[0]["atingido"]
+
+
+# "false" em texto não vira verdadeiro; dias e máquinas começam em 1
+@pytest.mark.parametrize("campo, valor", [
+    ("almoco", "false"), ("almoco", 0), ("pico", "true"), ("pico", None),
+    ("dias_max", 0), ("dias_max", -3), ("maquinas", 0), ("maquinas", -1),
+])
+def test_simular_campo_fora_do_dominio(campo, valor):
+    resposta, = simular([dict(CENARIO, **{campo: valor})], OPERACOES)
+    assert campo in resposta["erro"]
+
+
+def test_simular_booleanos():
+    sem_almoco, com_almoco = simular([dict(CENARIO, almoco=False), dict(CENARIO, almoco=True)], OPERACOES)
+    assert sem_almoco["producao_diaria_kg"] > com_almoco["producao_diaria_kg"]
+    assert simular([CENARIO], OPERACOES) == [com_almoco]
+
+
+def test_rota_com_query_string(servidor):
+    status, _ = asyncio.run(servidor.responder("GET", "/simular?x=1", b""))
+    assert status == HTTPStatus.METHOD_NOT_ALLOWED
+    status, _ = asyncio.run(servidor.responder("GET", "/saude?x=1", b""))
+    assert status == HTTPStatus.OK
+
+
+def test_cenario_unico_invalido(servidor):
+    produto, operacao = next(iter(servidor.monitor.obter("api_operacoes")))
+    cenario = dict(CENARIO, produto=produto, operacao=operacao)
+    status, _ = asyncio.run(servidor.responder("POST", "/simular", json.dumps(cenario).encode()))
+    assert status == HTTPStatus.OK
+    status, resposta = asyncio.run(servidor.responder("POST", "/simular", json.dumps(dict(cenario, meta="x")).encode()))
+    assert status == HTTPStatus.BAD_REQUEST
+    assert "meta" in resposta["erro"]
+    status, _ = asyncio.run(servidor.responder("POST", "/simular", json.dumps(dict(cenario, produto="?")).encode()))
+    assert status == HTTPStatus.NOT_FOUND
+
+
+async def _enviar_bruto(servidor, requisicao):
+    tcp = await asyncio.start_server(servidor.conexao, "127.0.0.1", 0)
+    async with tcp:
+        porta = tcp.sockets[0].getsockname()[1]
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        escritor.write(requisicao)
+        await escritor.drain()
+        resposta = await asyncio.wait_for(leitor.read(), timeout=5)
+        escritor.close()
+    return resposta
+
+
+@pytest.mark.parametrize("tamanho", ["abc", "-5", "1e3", "²"])
+def test_content_length_invalido(servidor, tamanho):
+    requisicao = f"POST /simular HTTP/1.1\r\nContent-Length: {tamanho}\r\n\r\n{{}}".encode("latin-1")
+    resposta = asyncio.run(_enviar_bruto(servidor, requisicao))
+    assert resposta.startswith(b"HTTP/1.1 400 ")
+    assert "Content-Length" in json.loads(resposta.split(b"\r\n\r\n", 1)[1])["erro"]
+
+
+def test_content_length_valido(servidor):
+    corpo = json.dumps({"cenarios": [CENARIO]}).encode()
+    requisicao = b"POST /simular HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(corpo), corpo)
+    resposta = asyncio.run(_enviar_bruto(servidor, requisicao))
+    assert resposta.startswith(b"HTTP/1.1 200 ")
+    assert "erro" in json.loads(resposta.split(b"\r\n\r\n", 1)[1])["resultados"][0]
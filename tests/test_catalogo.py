@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from nucleo.catalogo import CatalogoPlanta
+
+
+def _planta(linhas, semente=0):
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        "FIAÇÃO": rng.choice(["FL", "FC", "FP"], linhas),
+        "PRODUTO": rng.choice([f"P{i}" for i in range(8)], linhas),
+        "REVISÃO": rng.integers(1, 4, linhas),
+        "LINHA DE PRODUÇÃO": rng.choice(["L1", "L2", "L3"], linhas),
+        "OPERAÇÃO": rng.choice(["CARDA", "PASSADOR", "FILATÓRIO"], linhas),
+        "KG/MH": rng.uniform(1, 50, linhas),
+    })
+
+
+# Mesmo resultado de um filtro booleano sobre a planilha original
+def _esperado(df, fiacao=None, produto=None, revisao=None, linhas=None, operacao=None):
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in (("FIAÇÃO", fiacao), ("PRODUTO", produto), ("REVISÃO", revisao), ("OPERAÇÃO", operacao)):
+        if valor is not None:
+            mascara &= (df[coluna] == valor).to_numpy()
+    if linhas is not None:
+        mascara &= df["LINHA DE PRODUÇÃO"].isin(linhas).to_numpy()
+    return df[mascara]
+
+
+def test_grupos_intercalados_na_ordem_da_planilha():
+    df = pd.DataFrame({
+        "FIAÇÃO": ["A", "B", "A", "B"], "PRODUTO": ["p", "p", "q", "p"], "REVISÃO": [1] * 4,
+        "LINHA DE PRODUÇÃO": ["L1", "L2", "L1", "L2"],
+    })
+    catalogo = CatalogoPlanta(df)
+    assert catalogo.selecionar().index.tolist() == [0, 1, 2, 3]
+    assert catalogo.selecionar(produto="p").index.tolist() == [0, 1, 3]
+    assert catalogo.selecionar(linhas=["L1", "L2"]).index.tolist() == [0, 1, 2, 3]
+    assert catalogo.selecionar(fiacao="A").index.tolist() == [0, 2]
+
+
+def test_selecionar_igual_ao_filtro_booleano():
+    df = _planta(2_000)
+    catalogo = CatalogoPlanta(df)
+    filtros = [
+        {},
+        {"fiacao": "FL"},
+        {"produto": "P3"},
+        {"produto": "P3", "revisao": 2},
+        {"fiacao": "FC", "operacao": "CARDA"},
+        {"linhas": ["L1", "L3"]},
+        {"fiacao": "FP", "linhas": ["L2"]},
+        {"produto": "inexistente"},
+    ]
+    for filtro in filtros:
+        pd.testing.assert_frame_equal(catalogo.selecionar(**filtro), _esperado(df, **filtro))
+
+
+def test_trecho_continuo_sem_copia():
+    df = pd.DataFrame({
+        "FIAÇÃO": ["FL"] * 3 + ["FC"] * 3,
+        "PRODUTO": ["a", "b", "c", "a", "b", "c"],
+        "KG/MH": np.arange(6, dtype=float),
+    })
+    catalogo = CatalogoPlanta(df)
+    for fiacao, indices in (("FL", [0, 1, 2]), ("FC", [3, 4, 5])):
+        selecao = catalogo.selecionar(fiacao=fiacao)
+        assert selecao.index.tolist() == indices
+        assert np.shares_memory(selecao["KG/MH"].to_numpy(), catalogo.dados["KG/MH"].to_numpy())
+
+
+def test_todas_as_combinacoes_de_fiacao_e_produto():
+    df = _planta(500, semente=1)
+    catalogo = CatalogoPlanta(df)
+    for fiacao, produto in itertools.product(["FL", "FC", "FP", None], ["P0", "P5", None]):
+        pd.testing.assert_frame_equal(
+            catalogo.selecionar(fiacao=fiacao, produto=produto), _esperado(df, fiacao=fiacao, produto=produto)
+        )
@@ -0,0 +1,97 @@
+import sqlite3
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import nucleo.cenarios
+from nucleo.cenarios import ArmazemCenarios, diferenca_tabelas
+
+DEMANDA = pd.DataFrame({"PRODUTO": ["P1", "P2"], "REVISÃO": [0, 1], "Meta (ton)": [10.0, 2.5]})
+CONFIGURACAO = pd.DataFrame({
+    "OPERAÇÃO": ["CARDA", "FILATÓRIO"], "Qntd Máquinas": [1, 2], "Turno A": [True, True],
+    "Eficiência %": [100.0, np.nan],
+})
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    return ArmazemCenarios(str(tmp_path / "cenarios.sqlite"))
+
+
+def _blocos_gravados(armazem):
+    with sqlite3.connect(armazem.caminho) as conexao:
+        return conexao.execute("SELECT COUNT(*) FROM blocos").fetchone()[0]
+
+
+# Parâmetros, metadados e tabelas voltam como foram salvos (tipos inclusive)
+def test_salvar_e_carregar(armazem):
+    parametros = {"dias_uteis": 25, "absenteismo": 5.0, "turnos": ["A", "B"]}
+    cenario = armazem.salvar("pcp", "Base", parametros, {"demanda": DEMANDA, "configuracao": CONFIGURACAO},
+                             autor="Ana", fiacao="FL", data=date(2026, 3, 1), versao_planta="v1")
+
+    carregado = armazem.carregar(cenario)
+    assert (carregado.tipo, carregado.nome, carregado.autor, carregado.fiacao) == ("pcp", "Base", "Ana", "FL")
+    assert (carregado.data, carregado.versao_planta) == ("2026-03-01", "v1")
+    assert carregado.parametros == parametros
+    assert list(carregado.tabelas) == ["demanda", "configuracao"]
+    pd.testing.assert_frame_equal(carregado.tabelas["demanda"], DEMANDA)
+    pd.testing.assert_frame_equal(carregado.tabelas["configuracao"], CONFIGURACAO)
+
+    assert armazem.listar(tipo="pcp", autor="ana")["id"].tolist() == [cenario]
+    assert armazem.listar(tipo="simulador").empty
+    with pytest.raises(KeyError):
+        armazem.carregar(cenario + 1)
+    with pytest.raises(ValueError):
+        armazem.salvar("outro", "X", {}, {})
+
+
+def test_variavel_de_ambiente(tmp_path, monkeypatch):
+    caminho = tmp_path / "outro" / "cenarios.sqlite"
+    monkeypatch.setenv("PARAMOUNT_CENARIOS", str(caminho))
+    ArmazemCenarios().salvar("simulador", "S", {}, {})
+    assert caminho.exists()
+
+
+# Tabela repetida é gravada uma vez e não é lida na comparação
+def test_comparar_pula_tabelas_iguais(armazem, monkeypatch):
+    outra = CONFIGURACAO.assign(**{"Qntd Máquinas": [1, 3]})
+    a = armazem.salvar("pcp", "A", {"dias_uteis": 25}, {"demanda": DEMANDA, "configuracao": CONFIGURACAO})
+    b = armazem.salvar("pcp", "B", {"dias_uteis": 22}, {"demanda": DEMANDA.copy(), "configuracao": outra})
+    assert _blocos_gravados(armazem) == 3
+
+    lidos = []
+    desserializar = nucleo.cenarios._desserializar
+    monkeypatch.setattr(nucleo.cenarios, "_desserializar", lambda c: lidos.append(c) or desserializar(c))
+    diferenca = armazem.comparar(a, b)
+
+    assert diferenca.iguais == ["demanda"]
+    assert list(diferenca.tabelas) == ["configuracao"]
+    assert len(lidos) == 2
+    alterada = diferenca.tabelas["configuracao"]
+    assert alterada[["OPERAÇÃO", "Situação", "Δ Qntd Máquinas"]].values.tolist() == [["FILATÓRIO", "Alterada", 1]]
+    assert diferenca.parametros.values.tolist() == [["dias_uteis", "25", "22"]]
+
+    # Excluir A apaga só o bloco que ninguém mais usa
+    armazem.excluir(a)
+    assert _blocos_gravados(armazem) == 2
+    pd.testing.assert_frame_equal(armazem.carregar(b).tabelas["demanda"], DEMANDA)
+
+
+# Chaves repetidas casam pela ordem de ocorrência
+def test_diferenca_com_chaves_repetidas():
+    antes = pd.DataFrame({"PRODUTO": ["P1", "P1", "P2"], "REVISÃO": [0, 0, 0], "Meta (ton)": [10.0, 5.0, 1.0]})
+    depois = pd.DataFrame({
+        "PRODUTO": ["P1", "P1", "P2", "P1"], "REVISÃO": [0, 0, 0, 0], "Meta (ton)": [10.0, 7.0, 1.0, 3.0]
+    })
+
+    diferenca = diferenca_tabelas(antes, depois, ["PRODUTO", "REVISÃO"])
+    assert diferenca[["PRODUTO", "Ocorrência", "Situação"]].values.tolist() == [["P1", 2, "Alterada"], ["P1", 3, "Só em B"]]
+    assert diferenca["Meta (ton) (A)"].tolist()[0] == 5.0
+    assert diferenca["Meta (ton) (B)"].tolist() == [7.0, 3.0]
+    assert diferenca["Δ Meta (ton)"].tolist()[0] == 2.0
+
+    # Sem repetição não há coluna de ocorrência
+    assert "Ocorrência" not in diferenca_tabelas(antes.iloc[1:], depois.iloc[1:3], ["PRODUTO", "REVISÃO"]).columns
+    assert diferenca_tabelas(antes, antes.copy(), ["PRODUTO", "REVISÃO"]).empty
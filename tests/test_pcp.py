@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from nucleo.pcp import (
+    configuracao_padrao, horas_disponiveis, horas_disponiveis_exatas, otimizar_capacidade, verificar_ocupacao
+)
+
+PARAMETROS = dict(dias_uteis=25, absenteismo_geral=5, novatos_geral=10)
+
+
+def _config(quantidade, semente=0):
+    rng = np.random.default_rng(semente)
+    operacoes = pd.DataFrame({
+        "OPERAÇÃO": [f"OP {i:03d}" for i in range(quantidade)],
+        "N° FUSOS": rng.integers(10, 500, quantidade),
+        "KG/MH": rng.uniform(1, 50, quantidade),
+    })
+    config = configuracao_padrao(operacoes)
+    config["Fusos Parados"] = np.round(rng.uniform(0, 5, quantidade), 3)
+    config["Eficiência %"] = rng.integers(60, 100, quantidade)
+    return config
+
+
+def _ocupacao(config, necessarias):
+    return verificar_ocupacao(
+        necessarias, horas_disponiveis(config, **PARAMETROS), horas_disponiveis_exatas(config, **PARAMETROS)
+    ).set_index("OPERAÇÃO")["Status"]
+
+
+# Horas necessárias iguais às disponíveis arredondadas para cima: a tabela
+# mostra disponível = necessário, mas faltam horas
+def test_status_usa_horas_sem_arredondar():
+    config = _config(300)
+    exatas = horas_disponiveis_exatas(config, **PARAMETROS)
+    no_limite = exatas[np.round(exatas, 2) > exatas]
+    assert len(no_limite)
+    necessarias = pd.DataFrame({
+        "OPERAÇÃO": no_limite.index, "Horas Necessárias (Total)": np.round(no_limite.to_numpy(), 2)
+    })
+
+    tabela = horas_disponiveis(config, **PARAMETROS)
+    assert (verificar_ocupacao(necessarias, tabela)["Status"] == "✅ Viável").all()
+    assert (_ocupacao(config, necessarias) == "❌ Inválido").all()
+
+    # A otimização concorda: a configuração atual não basta
+    _, resumo = otimizar_capacidade(config, necessarias, **PARAMETROS)
+    atual = config.set_index("OPERAÇÃO").loc[resumo["OPERAÇÃO"]]
+    sugerido = resumo.set_index("OPERAÇÃO")
+    assert ((sugerido["Máquinas (sugerido)"] > atual["Qntd Máquinas"])
+            | (sugerido["Turnos (sugerido)"] != "A, B, C")).all()
+
+
+# Aplicada a sugestão, toda operação viável na otimização é viável na verificação
+def test_sugestao_viavel_na_verificacao():
+    config = _config(300, semente=1)
+    rng = np.random.default_rng(2)
+    exatas = horas_disponiveis_exatas(config, **PARAMETROS)
+    necessarias = pd.DataFrame({
+        "OPERAÇÃO": exatas.index,
+        "Horas Necessárias (Total)": np.round(exatas.to_numpy() * rng.uniform(0.2, 6, len(exatas)), 2),
+    })
+    # Um terço exatamente no limite de 1 a 4 máquinas
+    no_limite = exatas.to_numpy()[::3]
+    necessarias.loc[::3, "Horas Necessárias (Total)"] = np.round(no_limite * rng.integers(1, 5, len(no_limite)), 2)
+
+    otimizada, resumo = otimizar_capacidade(config, necessarias, **PARAMETROS)
+    assert (resumo["Status"] == "✅ Viável").all()
+    assert (_ocupacao(otimizada, necessarias) == "✅ Viável").all()
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nucleo.benchmark import planta_sintetica
+from nucleo.pcp import (
+    COLUNAS_PLANTA, configuracao_padrao, horas_disponiveis, horas_disponiveis_exatas, horas_necessarias,
+    horas_necessarias_por_operacao, operacoes_planta, preparar_planta, verificar_ocupacao
+)
+from nucleo.recalculo import RecalculoPCP
+
+
+@pytest.fixture(scope="module")
+def planta():
+    planta = preparar_planta(planta_sintetica(20_000, semente=1)[COLUNAS_PLANTA])
+    return planta[planta["FIAÇÃO"] == "FL"]
+
+
+def _conferir(recalculo, planta, demanda):
+    produtos, sem_planta = recalculo.horas_necessarias(demanda)
+    esperado, esperado_sem_planta = horas_necessarias(planta, demanda)
+    pd.testing.assert_frame_equal(produtos, esperado)
+    pd.testing.assert_frame_equal(sem_planta, esperado_sem_planta)
+    # Totais em centésimos inteiros x soma em ponto flutuante do groupby
+    pd.testing.assert_frame_equal(
+        recalculo.horas_necessarias_por_operacao(), horas_necessarias_por_operacao(esperado),
+        check_exact=False, rtol=0, atol=1e-6
+    )
+
+
+# Sequência sorteada de edições da demanda: linha nova, meta alterada,
+# produto/revisão trocado, última linha removida e produto fora da planta
+def test_igual_ao_calculo_completo(planta):
+    rng = np.random.default_rng(0)
+    pares = planta[["PRODUTO", "REVISÃO"]].drop_duplicates().to_numpy()
+    recalculo = RecalculoPCP(planta)
+    demanda = pd.DataFrame({"PRODUTO": [pares[0][0]], "REVISÃO": [pares[0][1]], "Meta (ton)": [1.0]})
+
+    for _ in range(300):
+        demanda = demanda.copy()
+        edicao = rng.integers(5)
+        if edicao == 0 or demanda.empty:
+            produto, revisao = pares[rng.integers(len(pares))]
+            nova = pd.DataFrame({"PRODUTO": [produto], "REVISÃO": [revisao], "Meta (ton)": [float(rng.integers(0, 50))]})
+            demanda = pd.concat([demanda, nova], ignore_index=True)
+        elif edicao == 1:
+            demanda.loc[rng.integers(len(demanda)), "Meta (ton)"] = float(rng.integers(0, 50)) * 1.37
+        elif edicao == 2:
+            linha = rng.integers(len(demanda))
+            demanda.loc[linha, ["PRODUTO", "REVISÃO"]] = pares[rng.integers(len(pares))]
+        elif edicao == 3:
+            demanda = demanda.iloc[:-1]
+        else:
+            demanda.loc[rng.integers(len(demanda)), "PRODUTO"] = "NÃO EXISTE"
+        _conferir(recalculo, planta, demanda)
+
+
+def test_ocupacao_e_cache(planta):
+    config = configuracao_padrao(operacoes_planta(planta))
+    demanda = planta[["PRODUTO", "REVISÃO"]].drop_duplicates().head(50).assign(**{"Meta (ton)": 10.0})
+    recalculo = RecalculoPCP(planta)
+    recalculo.horas_necessarias(demanda)
+
+    # Sem chamar horas_disponiveis antes
+    checagem = recalculo.verificar_ocupacao(config, 25, 5, 10)
+    disponiveis = horas_disponiveis(config, 25, 5, 10).sort_values(by="OPERAÇÃO")
+    exatas = horas_disponiveis_exatas(config, 25, 5, 10)
+    produtos, _ = horas_necessarias(planta, demanda)
+    pd.testing.assert_frame_equal(
+        checagem, verificar_ocupacao(horas_necessarias_por_operacao(produtos), disponiveis, exatas),
+        check_exact=False, rtol=0, atol=1e-6
+    )
+
+    # Entradas iguais: o mesmo objeto; outra configuração: recalcula
+    assert recalculo.verificar_ocupacao(config, 25, 5, 10) is checagem
+    assert recalculo.horas_disponiveis(config.copy(), 25, 5, 10) is recalculo.horas_disponiveis(config, 25, 5, 10)
+    outra = config.assign(**{"Qntd Máquinas": 2})
+    assert recalculo.verificar_ocupacao(outra, 25, 5, 10) is not checagem
+
+    # Nova demanda: a ocupação da mesma configuração é refeita
+    demanda = demanda.assign(**{"Meta (ton)": 20.0})
+    recalculo.horas_necessarias(demanda)
+    produtos, _ = horas_necessarias(planta, demanda)
+    pd.testing.assert_frame_equal(
+        recalculo.verificar_ocupacao(config, 25, 5, 10),
+        verificar_ocupacao(horas_necessarias_por_operacao(produtos), disponiveis, exatas),
+        check_exact=False, rtol=0, atol=1e-6
+    )
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from nucleo.roteiros import COLUNAS_ROTEIROS, GrafoRoteiros
+
+
+def _planta(linhas):
+    df = pd.DataFrame(linhas, columns=["PRODUTO", "REVISÃO", "LINHA DE PRODUÇÃO", "N° OPERAÇÃO", "OPERAÇÃO"])
+    return df.assign(**{"N_ROTEIRO": None, "MAQ HR": 1.0, "KG/MH": 10.0})[COLUNAS_ROTEIROS]
+
+
+# Produto com duas linhas alternativas: FROTTEUR A -> FILATÓRIO A e
+# FROTTEUR B -> FILATÓRIO B, nunca FROTTEUR A -> FILATÓRIO B
+def test_sem_aresta_entre_linhas():
+    grafo = GrafoRoteiros(_planta([
+        ("P1", 0, None, 10, "PASSADOR"),
+        ("P1", 0, "L1", 20, "FROTTEUR A"),
+        ("P1", 0, "L2", 20, "FROTTEUR B"),
+        ("P1", 0, "L1", 30, "FILATÓRIO A"),
+        ("P1", 0, "L2", 30, "FILATÓRIO B"),
+        ("P1", 0, "L1 & L2", 40, "CONICALEIRA"),
+        ("P2", 0, "L1", 10, "PASSADOR"),
+        ("P2", 0, "L1", 20, "FROTTEUR B"),
+    ]))
+
+    arestas = set(grafo.arestas[["Origem", "Destino"]].itertuples(index=False, name=None))
+    assert arestas == {
+        ("PASSADOR", "FROTTEUR A"), ("PASSADOR", "FROTTEUR B"),
+        ("FROTTEUR A", "FILATÓRIO A"), ("FROTTEUR B", "FILATÓRIO B"),
+        ("FILATÓRIO A", "CONICALEIRA"), ("FILATÓRIO B", "CONICALEIRA"),
+    }
+    assert grafo.sucessores("FROTTEUR A") == [("FILATÓRIO A", 1)]
+    assert grafo.sucessores("FROTTEUR B") == [("FILATÓRIO B", 1)]
+    # Aresta comum às duas linhas de P1 conta P1 uma vez, mais P2
+    assert dict(grafo.sucessores("PASSADOR")) == {"FROTTEUR A": 1, "FROTTEUR B": 2}
+
+
+# Sequência comparada por linha: P2 repete só a linha L2 de P1
+def test_mesma_sequencia_por_linha():
+    grafo = GrafoRoteiros(_planta([
+        ("P1", 0, None, 10, "PASSADOR"),
+        ("P1", 0, "L1", 20, "FROTTEUR A"),
+        ("P1", 0, "L2", 20, "FROTTEUR B"),
+        ("P2", 0, "L3", 10, "PASSADOR"),
+        ("P2", 0, "L3", 20, "FROTTEUR B"),
+        ("P3", 0, None, 10, "PASSADOR"),
+    ]))
+
+    iguais = grafo.mesma_sequencia("P1", 0)
+    assert iguais.to_dict("records") == [{"LINHA": "L2", "PRODUTO": "P2", "REVISÃO": 0, "LINHA IGUAL": "L3"}]
+    assert grafo.mesma_sequencia("P3", 0).empty
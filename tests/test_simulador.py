@@ -0,0 +1,133 @@
+import numpy as np
+
+from nucleo.simulador import mascara_turnos_lote, monte_carlo, simular_lote, uniforme
+
+
+# Laço dia a dia que a página do simulador usava antes de simular_lote
+def _simular_laco(meta, fusos_total, kg_por_hora, fusos_parados, eficiencia_maquina,
+                  maquinas, almoco, pico, turnos, absenteismo, novatos, dias_max):
+    fusos_ativos = fusos_total - fusos_parados
+    eficiencia_fusos = fusos_ativos / fusos_total
+    eficiencia_maquina = eficiencia_maquina / 100
+    fator_ajuste = (1 - absenteismo) * (1 - novatos)
+
+    if not turnos:
+        return None
+
+    for dias in range(1, dias_max + 1):
+        total_horas = 0
+        for t in turnos:
+            h = 8
+            if almoco:
+                h -= 1
+            if t == "B" and pico:
+                h -= 3
+            total_horas += h
+
+        total_horas *= dias * maquinas
+        producao = total_horas * kg_por_hora * eficiencia_fusos * eficiencia_maquina * fator_ajuste
+
+        if producao >= meta:
+            return dias, producao
+    return None
+
+
+# Argumentos de simular_lote, na ordem
+ORDEM = ["meta", "fusos_total", "kg_por_hora", "fusos_parados", "eficiencia_maquina", "maquinas",
+         "almoco", "pico", "turnos", "absenteismo", "novatos", "dias_max"]
+
+
+def _cenarios(quantidade, semente):
+    rng = np.random.default_rng(semente)
+    combinacoes = ["A", "B", "C", "AB", "AC", "BC", "ABC"]
+    cenarios = {
+        "fusos_total": rng.integers(1, 1000, quantidade),
+        "kg_por_hora": np.round(rng.uniform(0.5, 80, quantidade), 3),
+        "eficiencia_maquina": rng.integers(1, 101, quantidade),
+        "maquinas": rng.integers(1, 11, quantidade),
+        "almoco": rng.random(quantidade) < 0.5,
+        "pico": rng.random(quantidade) < 0.5,
+        "turnos": [combinacoes[i] for i in rng.integers(0, len(combinacoes), quantidade)],
+        "absenteismo": rng.integers(0, 30, quantidade) / 100,
+        "novatos": rng.integers(0, 30, quantidade) / 100,
+        "dias_max": rng.integers(1, 32, quantidade),
+    }
+    cenarios["fusos_parados"] = np.minimum(rng.integers(0, 200, quantidade), cenarios["fusos_total"])
+
+    # Metas sorteadas e metas exatamente iguais à produção de um número
+    # inteiro de dias (onde a correção de ±1 dia do cálculo fechado importa)
+    meta = np.round(rng.uniform(0, 200_000, quantidade), 2)
+    exatas = rng.random(quantidade) < 0.5
+    for i in np.flatnonzero(exatas):
+        diaria = _simular_laco(0, *(cenarios[c][i] for c in ORDEM[1:-1]), 1)
+        meta[i] = diaria[1] * rng.integers(1, 40) if diaria else 0.0
+    cenarios["meta"] = meta
+    return cenarios
+
+
+def test_simular_lote_igual_ao_laco_dia_a_dia():
+    cenarios = _cenarios(20_000, semente=0)
+    argumentos = [cenarios[c] for c in ORDEM]
+    argumentos[ORDEM.index("turnos")] = mascara_turnos_lote(cenarios["turnos"])
+    lote = simular_lote(*argumentos)
+
+    for i in range(len(cenarios["meta"])):
+        esperado = _simular_laco(*(cenarios[c][i] for c in ORDEM))
+        if esperado is None:
+            assert not lote["atingido"][i]
+        else:
+            assert lote["atingido"][i]
+            assert lote["dias"][i] == esperado[0]
+            assert lote["producao"][i] == esperado[1]
+
+
+def test_simular_lote_casos_limite():
+    # Meta zero, eficiência zero, sem turnos e meta que só fecha no último dia
+    casos = [
+        (0.0, 100, 10.0, 0, 90, 2, True, False, "ABC", 0.05, 0.1, 5),
+        (1000.0, 100, 10.0, 0, 0, 2, True, False, "ABC", 0.0, 0.0, 5),
+        (1000.0, 100, 10.0, 100, 90, 2, True, False, "ABC", 0.0, 0.0, 5),
+        (1000.0, 100, 10.0, 0, 90, 2, False, True, "B", 0.0, 0.0, 31),
+    ]
+    for caso in casos:
+        lote = simular_lote(*caso)
+        esperado = _simular_laco(*caso)
+        assert bool(lote["atingido"]) == (esperado is not None)
+        if esperado is not None:
+            assert (int(lote["dias"]), float(lote["producao"])) == esperado
+
+    assert not simular_lote(1000.0, 100, 10.0, 0, 90, 2, True, False, "", 0.0, 0.0, 5)["atingido"]
+
+
+# ---------------- MONTE CARLO ----------------
+
+# Turnos ABC com almoço: 21 h/dia; 1 máquina a 10 kg/h = 210 kg/dia com 100% de eficiência
+PARAMETROS_RISCO = dict(fusos_total=100, kg_por_hora=10.0, maquinas=1, almoco=True, pico=False, turnos="ABC",
+                        absenteismo=0.0, fusos_parados=0.0, trajetorias=2_000, semente=0)
+
+
+def test_monte_carlo_sem_variacao():
+    risco = monte_carlo(1000, dias_max=25, eficiencia_maquina=100, **PARAMETROS_RISCO)
+    assert (risco["dias"] == 5).all()
+    assert risco["probabilidade"] == 1.0
+    assert risco["p50"] == risco["p90"] == 5
+
+
+def test_monte_carlo_meta_inalcancavel():
+    risco = monte_carlo(10**9, dias_max=25, eficiencia_maquina=100, **PARAMETROS_RISCO)
+    assert risco["probabilidade"] == 0.0
+    assert np.isinf(risco["p50"]) and np.isinf(risco["p90"])
+
+
+# Parte das trajetórias não conclui no horizonte: os percentis são um dia
+# sorteado ou infinito, nunca nan
+def test_monte_carlo_percentis_com_trajetorias_sem_conclusao():
+    risco = monte_carlo(900, dias_max=10, horizonte=10, eficiencia_maquina=uniforme(0, 100), **PARAMETROS_RISCO)
+    sem_conclusao = np.mean(risco["dias"] == 0)
+    assert 0.1 < sem_conclusao < 0.5
+
+    conclusao = np.sort(np.where(risco["dias"] > 0, risco["dias"], np.inf))
+    assert risco["p50"] == conclusao[int(np.ceil(0.5 * len(conclusao))) - 1]
+    assert np.isfinite(risco["p50"]) and risco["p50"] in risco["dias"]
+    assert np.isinf(risco["p90"])
+    assert risco["probabilidade"] == 1 - sem_conclusao
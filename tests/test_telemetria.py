@@ -0,0 +1,29 @@
+import json
+
+from nucleo.telemetria import agregar, iniciar_medicao
+
+
+def test_finalizar_grava_uma_linha(tmp_path, monkeypatch):
+    arquivo = tmp_path / "telemetria.jsonl"
+    monkeypatch.setenv("PARAMOUNT_TELEMETRIA", str(arquivo))
+
+    medicao = iniciar_medicao("Página")
+    medicao.marcar("carga")
+    medicao.marcar("cálculo")
+    # Finalizada antes de um st.stop() e de novo no fim: grava só uma vez
+    medicao.finalizar()
+    medicao.finalizar()
+
+    linhas = arquivo.read_text(encoding="utf-8").splitlines()
+    assert len(linhas) == 1
+    assert [e["etapa"] for e in json.loads(linhas[0])["etapas"]] == ["carga", "cálculo"]
+    assert set(agregar(str(arquivo))["Etapa"]) == {"carga", "cálculo", "(total)"}
+
+
+def test_telemetria_desligada(tmp_path, monkeypatch):
+    monkeypatch.setenv("PARAMOUNT_TELEMETRIA", "0")
+    monkeypatch.chdir(tmp_path)
+    medicao = iniciar_medicao("Página")
+    medicao.marcar("carga")
+    medicao.finalizar()
+    assert medicao.etapas and not list(tmp_path.iterdir())